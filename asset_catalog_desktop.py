@@ -9,10 +9,16 @@
 ╚══════════════════════════════════════════════════════════════╝
 """
 
-import sys, os, sqlite3, json, csv, hashlib, subprocess, platform, mimetypes
+import time
+_T0 = time.perf_counter()   # start of import, for --startup-probe
+
+import sys, os, json, hashlib, subprocess, platform, mimetypes, threading, mmap, bisect, struct, wave, heapq
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from datetime import datetime
-from collections import defaultdict
+from collections import defaultdict, OrderedDict, deque
+from array import array
+import eam_core as core
 
 # ── Dependency gate ────────────────────────────────────────────
 try:
@@ -24,18 +30,18 @@ try:
         QAbstractItemView, QStyle, QStyledItemDelegate, QToolButton,
         QSizePolicy, QMessageBox, QGroupBox, QPlainTextEdit, QSlider,
         QStackedWidget, QSpacerItem, QTreeWidget, QTreeWidgetItem,
-        QHeaderView
+        QHeaderView, QTreeView, QAbstractScrollArea, QCheckBox
     )
     from PySide6.QtCore import (
         Qt, QThread, Signal, QSize, QRect, QRectF, QModelIndex, QTimer,
-        QUrl, QAbstractListModel, QEvent, QPoint, QSortFilterProxyModel,
-        QMimeData, QByteArray, Property
+        QUrl, QAbstractListModel, QAbstractItemModel, QEvent, QPoint, QSortFilterProxyModel,
+        QMimeData, QByteArray, Property, QEventLoop, QObject
     )
     from PySide6.QtGui import (
         QPixmap, QIcon, QPainter, QColor, QFont, QFontMetrics, QPen,
         QBrush, QLinearGradient, QPainterPath, QFontDatabase, QImage,
         QAction, QCursor, QDesktopServices, QPalette, QKeySequence,
-        QShortcut, QMovie, QRadialGradient
+        QShortcut, QRadialGradient, QImageReader
     )
 except ImportError:
     print("━" * 60)
@@ -44,18 +50,30 @@ except ImportError:
     print("━" * 60)
     sys.exit(1)
 
-try:
-    from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput
-    from PySide6.QtMultimediaWidgets import QVideoWidget
-    HAS_MEDIA = True
-except Exception:
-    HAS_MEDIA = False
+# QtMultimedia (FFmpeg/GStreamer backends) and PIL are the slowest imports, so they load on first use
+_HAS_MEDIA = None
+_HAS_PIL = None
 
-try:
-    from PIL import Image as PILImage
-    HAS_PIL = True
-except Exception:
-    HAS_PIL = False
+def has_media():
+    global _HAS_MEDIA, QMediaPlayer, QAudioOutput, QAudioDecoder, QAudioFormat, QVideoWidget
+    if _HAS_MEDIA is None:
+        try:
+            from PySide6.QtMultimedia import QMediaPlayer, QAudioOutput, QAudioDecoder, QAudioFormat
+            from PySide6.QtMultimediaWidgets import QVideoWidget
+            _HAS_MEDIA = True
+        except Exception:
+            _HAS_MEDIA = False
+    return _HAS_MEDIA
+
+def has_pil():
+    global _HAS_PIL, PILImage
+    if _HAS_PIL is None:
+        try:
+            from PIL import Image as PILImage
+            _HAS_PIL = True
+        except Exception:
+            _HAS_PIL = False
+    return _HAS_PIL
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -68,34 +86,21 @@ DATA_DIR    = Path.home() / ".asset_catalog"
 DB_DIR      = DATA_DIR / "databases"
 THUMB_DIR   = DATA_DIR / "thumbnails"
 CONFIG_PATH = DATA_DIR / "config.json"
-
-for _d in (DATA_DIR, DB_DIR, THUMB_DIR):
-    _d.mkdir(parents=True, exist_ok=True)
+STARTUP_PROBE = "--startup-probe" in sys.argv   # print time-to-first-window and exit (benchmarks/)
 
 THUMB_SIZE = (180, 130)
 PAGE_SIZE = 120
+TREE_PAGE_SIZE = 200
 SEARCH_DEBOUNCE_MS = 250
-
-DEFAULT_CATEGORIES = {
-    "Archives":      [".zip",".rar",".7z",".tar",".gz",".bz2",".xz"],
-    "After Effects": [".aep",".aet",".ffx"],
-    "Videos - MP4":  [".mp4"], "Videos - MOV": [".mov"], "Videos - AVI": [".avi"],
-    "Videos - Other":[".mkv",".m4v",".wmv",".flv",".webm",".mpg",".mpeg"],
-    "Images - PNG":  [".png"], "Images - JPG": [".jpg",".jpeg"],
-    "Images - Other":[".webp",".tiff",".tif",".gif",".bmp",".heic",".svg"],
-    "Icons":         [".ico"],
-    "Audio":         [".mp3",".wav",".aac",".flac",".ogg",".m4a",".wma",".aiff",".opus",".alac"],
-    "Photoshop":     [".psd",".psb",".abr",".asl",".grd",".pat"],
-    "Blender":       [".blend",".blend1"], "Vegas": [".veg",".vf"],
-    "Premiere":      [".prproj",".prel"],
-    "Documents":     [".pdf",".doc",".docx",".txt",".rtf",".md",".odt"],
-    "Spreadsheets":  [".xlsx",".xls",".csv",".ods"],
-    "Fonts":         [".ttf",".otf",".woff",".woff2"],
-    "3D Models":     [".obj",".fbx",".dae",".stl",".3ds",".gltf",".glb"],
-    "Code":          [".py",".js",".html",".css",".cpp",".java",".c",
-                      ".h",".ts",".jsx",".tsx",".json",".xml",".yaml"],
-    "Other":         [],
-}
+PREVIEW_CACHE_BYTES = 192 * 1024 * 1024   # decoded previews kept for back/forward browsing
+PREFETCH_NEIGHBORS = 2                    # grid items decoded ahead on each side of the selection
+TEXT_INDEX_BLOCK = 64 * 1024              # text preview line index keeps one anchor per block
+TEXT_MAX_LINE_BYTES = 4096                # longer lines are cut off in the text preview
+TAB_CACHE_BYTES = 96 * 1024 * 1024        # thumbnails and result rows kept for background tabs
+GIF_RING_FRAMES = 12                      # decoded GIF frames buffered ahead of playback
+PEAK_BASE_FRAMES = 256                    # audio frames per peak in the finest waveform level
+PEAK_MIN_BUCKETS = 256                    # coarsest waveform level has at least this many peaks
+PEAK_STALL_MS = 5000                      # a decoder that delivers nothing for this long is given up on
 
 IMAGE_EXTS = {".png",".jpg",".jpeg",".gif",".webp",".bmp",".tiff",".tif",".ico",".svg",".heic"}
 VIDEO_EXTS = {".mp4",".mov",".avi",".mkv",".webm",".flv",".wmv",".m4v",".mpg",".mpeg"}
@@ -227,6 +232,7 @@ QComboBox QAbstractItemView {{ background:{t['bg_secondary']}; border:1px solid
 #secondaryBtn {{ background:{t['bg_card']}; color:{t['accent_text']}; border:1px solid {t['border_light']};
     border-radius:8px; padding:7px 16px; }}
 #secondaryBtn:hover {{ background:{t['bg_card_hover']}; border-color:{t['accent']}; }}
+#secondaryBtn:checked {{ border-color:{t['accent']}; color:{t['accent']}; }}
 SidebarWidget {{ background:{t['bg_panel']}; border-right:1px solid {t['border']}; }}
 #sideHead {{ color:{t['text_muted']}; font-size:10px; font-weight:700; letter-spacing:1.5px; padding:6px 0 2px 0; }}
 #statBig {{ font-size:24px; font-weight:700; color:{t['accent_text']}; }}
@@ -238,17 +244,19 @@ SidebarWidget {{ background:{t['bg_panel']}; border-right:1px solid {t['border']
 QListView {{ background:{t['bg_primary']}; border:none; outline:none; }}
 QListView::item {{ padding:0px; border:none; }}
 QListView::item:selected {{ background:transparent; }}
-QTreeWidget {{ background:{t['bg_primary']}; border:none; outline:none; color:{t['text_primary']}; font-size:12px; }}
-QTreeWidget::item {{ padding:5px 4px; border-radius:4px; }}
-QTreeWidget::item:hover {{ background:{t['bg_card_hover']}; }}
-QTreeWidget::item:selected {{ background:{t['bg_card_selected']}; color:{t['accent_text']}; }}
-QTreeWidget::branch {{ background:transparent; }}
+QTreeView {{ background:{t['bg_primary']}; border:none; outline:none; color:{t['text_primary']}; font-size:12px; }}
+QTreeView::item {{ padding:5px 4px; border-radius:4px; }}
+QTreeView::item:hover {{ background:{t['bg_card_hover']}; }}
+QTreeView::item:selected {{ background:{t['bg_card_selected']}; color:{t['accent_text']}; }}
+QTreeView::branch {{ background:transparent; }}
 QHeaderView::section {{ background:{t['bg_secondary']}; color:{t['text_muted']}; border:none;
     border-bottom:1px solid {t['border']}; padding:6px 12px; font-size:11px; font-weight:600; }}
 PreviewPanel {{ background:{t['bg_panel']}; border-left:1px solid {t['border']}; }}
 #previewTitle {{ font-size:15px; font-weight:600; color:{t['text_primary']}; }}
 QPlainTextEdit {{ background:{t['bg_input']}; color:{t['text_secondary']}; border:1px solid {t['border']};
     border-radius:8px; padding:10px; font-family:"JetBrains Mono","Fira Code","Consolas",monospace; font-size:12px; }}
+TextPager {{ background:{t['bg_input']}; color:{t['text_secondary']}; border:1px solid {t['border']};
+    border-radius:8px; font-family:"JetBrains Mono","Fira Code","Consolas",monospace; font-size:12px; }}
 QScrollBar:vertical {{ background:transparent; width:7px; margin:0; }}
 QScrollBar::handle:vertical {{ background:{t['scrollbar']}; border-radius:3px; min-height:30px; }}
 QScrollBar::handle:vertical:hover {{ background:{t['accent']}; }}
@@ -338,8 +346,24 @@ def fmt_size(b):
     return f"{b:.2f} PB"
 
 
+def fmt_eta(secs):
+    secs=int(secs); h,m=divmod(secs//60,60)
+    return f"{h}:{m:02d}:{secs%60:02d}" if h else f"{m}:{secs%60:02d}"
+
+def fmt_duration(secs):
+    return fmt_eta(secs) if secs>=1 else f"{secs:.2f} s"
+
+def ensure_dir(d: Path) -> Path:
+    d.mkdir(parents=True, exist_ok=True); return d
+
+
+def thumb_cache_path(fpath: str, suffix=".jpg") -> Path:
+    # md5 rather than hash(): str hashes are salted per process, which made the disk cache miss on every run
+    return THUMB_DIR / (hashlib.md5(fpath.encode("utf-8","surrogatepass")).hexdigest()+suffix)
+
+
 def open_file_location(path: str):
-    p = Path(path)
+    p = Path(path if os.path.exists(path) else core.archive_of(path) or path)   # a file inside an archive: the archive
     if not p.exists(): return
     s = platform.system()
     try:
@@ -357,7 +381,7 @@ def load_config() -> dict:
 
 
 def save_config(cfg: dict):
-    try: CONFIG_PATH.write_text(json.dumps(cfg, indent=2), "utf-8")
+    try: ensure_dir(DATA_DIR); CONFIG_PATH.write_text(json.dumps(cfg, indent=2), "utf-8")
     except: pass
 
 
@@ -367,82 +391,136 @@ def save_config(cfg: dict):
 
 class AssetDatabase:
     def __init__(self, db_path: Path):
+        # nothing touches the file until the first query; restoring a dozen tabs costs no I/O
         self.path = Path(db_path)
-        self._init_db()
+        self._ready = False; self._init_lock = threading.Lock(); self._scans = 0
+        self._sim = None; self.phash_failed = set()   # (generation, SimilarityIndex); images that would not decode
+        self._sim_lock = threading.Lock(); self._quiet = None   # (signature after our own phash write, generation before it)
 
     def _conn(self):
-        c = sqlite3.connect(str(self.path), check_same_thread=False)
-        c.execute("PRAGMA journal_mode=WAL"); c.execute("PRAGMA synchronous=NORMAL")
+        c = core.connect(self.path)
+        if not self._ready:
+            with self._init_lock:
+                if not self._ready: core.init_schema(c); self._ready = True
         return c
 
-    def _init_db(self):
-        conn = self._conn(); c = conn.cursor()
-        c.execute("""CREATE TABLE IF NOT EXISTS files (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, path TEXT UNIQUE,
-            extension TEXT, category TEXT, size INTEGER,
-            modified_date TEXT, created_date TEXT, file_hash TEXT)""")
-        c.execute("""CREATE TABLE IF NOT EXISTS categories (
-            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, extensions TEXT)""")
-        c.execute("SELECT COUNT(*) FROM categories")
-        if c.fetchone()[0] == 0:
-            for name, exts in DEFAULT_CATEGORIES.items():
-                c.execute("INSERT INTO categories (name,extensions) VALUES (?,?)", (name, json.dumps(exts)))
-        c.execute("CREATE INDEX IF NOT EXISTS idx_files_name ON files(name COLLATE NOCASE)")
-        c.execute("CREATE INDEX IF NOT EXISTS idx_files_cat  ON files(category)")
-        conn.commit(); conn.close()
+    def _signature(self):
+        def sig(p):
+            try: st = os.stat(p); return (st.st_mtime_ns, st.st_size)
+            except OSError: return None
+        return (self._scans, sig(self.path), sig(f"{self.path}-wal"))
+
+    def generation(self):
+        # changes whenever the catalog may have changed (our own scans, or any writer touching db/-wal); stat only, no SQL.
+        # Filling in perceptual hashes changes no row anyone shows, so set_phashes() leaves it where it was.
+        g = self._signature(); q = self._quiet
+        return q[1] if q and q[0] == g else g
 
+    def bump_generation(self): self._scans += 1
+
+    @core.perf.timed("db.get_categories")
     def get_categories(self):
-        conn = self._conn()
-        rows = conn.execute("SELECT name, extensions FROM categories").fetchall()
-        conn.close()
-        return {r[0]: json.loads(r[1]) for r in rows}
-
-    def category_for_ext(self, ext, cats):
-        el = ext.lower()
-        for name, exts in cats.items():
-            if el in (e.lower() for e in exts): return name
-        return "Other"
-
-    def search(self, query="", category=None, extension=None, limit=PAGE_SIZE, offset=0, sort="name"):
-        conn = self._conn(); where, params = ["1=1"], []
-        if query: where.append("name LIKE ? COLLATE NOCASE"); params.append(f"%{query}%")
-        if category and category != "All": where.append("category = ?"); params.append(category)
-        if extension: where.append("extension = ?"); params.append(extension)
-        w = " AND ".join(where)
-        order = {"name":"name COLLATE NOCASE","size":"size DESC","date":"modified_date DESC"}.get(sort,"name COLLATE NOCASE")
-        rows = conn.execute(f"SELECT id,name,path,extension,category,size,modified_date,created_date FROM files WHERE {w} ORDER BY {order} LIMIT ? OFFSET ?", params+[limit,offset]).fetchall()
-        total = conn.execute(f"SELECT COUNT(*) FROM files WHERE {w}", params).fetchone()[0]
-        conn.close()
-        keys = ("id","name","path","extension","category","size","modified_date","created_date")
-        return [dict(zip(keys, r)) for r in rows], total
+        conn = self._conn(); cats = core.load_categories(conn); conn.close()
+        return cats
 
+    @core.perf.timed("db.pending_scans")
+    def pending_scans(self):
+        conn = self._conn(); st = core.get_scan_state(conn); conn.close()
+        return st
+
+    def discard_scan(self, root):
+        conn = self._conn(); core.discard_scan(conn, root); conn.close()
+
+    @core.perf.timed("db.roots")
+    def roots(self):
+        conn = self._conn(); roots = core.get_roots(conn); conn.close()
+        return roots
+
+    @core.perf.timed("db.remove_root")
+    def remove_root(self, path):
+        conn = self._conn(); core.remove_root(conn, path); conn.close()
+
+    @core.perf.timed("db.set_root_rules")
+    def set_root_rules(self, path, rules):
+        conn = self._conn(); core.set_root_rules(conn, path, rules); conn.close()
+
+    @core.perf.timed("db.search")
+    def search(self, query="", category=None, extension=None, limit=PAGE_SIZE, offset=0, sort="name", count=True):
+        # query is search box text, see core.Query for the syntax
+        conn = self._conn(); res = core.search(conn, query, category, extension, limit, offset, sort, count); conn.close()
+        return res
+
+    @core.perf.timed("db.stats")
     def stats(self):
-        conn = self._conn()
-        tf, ts = conn.execute("SELECT COUNT(*), COALESCE(SUM(size),0) FROM files").fetchone()
-        by_cat = conn.execute("SELECT category, COUNT(*), COALESCE(SUM(size),0) FROM files GROUP BY category").fetchall()
-        by_ext = conn.execute("SELECT extension, COUNT(*) FROM files GROUP BY extension ORDER BY COUNT(*) DESC LIMIT 30").fetchall()
-        conn.close()
-        return {"total_files":tf or 0,"total_size":ts or 0,
-                "by_category":[{"category":r[0],"count":r[1],"size":r[2]} for r in by_cat],
-                "by_extension":[{"extension":r[0],"count":r[1]} for r in by_ext]}
+        conn = self._conn(); st = core.stats(conn); conn.close()
+        return st
+
+    @core.perf.timed("db.category_totals")
+    def category_totals(self):
+        conn = self._conn(); rows = core.category_totals(conn); conn.close()
+        return rows
+
+    @core.perf.timed("db.media")
+    def media(self, fid):
+        conn = self._conn(); m = core.get_media(conn, fid); conn.close()
+        return m
 
+    @core.perf.timed("db.find_duplicates")
     def find_duplicates(self):
-        conn = self._conn()
-        rows = conn.execute("SELECT file_hash,COUNT(*),GROUP_CONCAT(path,'||') FROM files WHERE file_hash IS NOT NULL GROUP BY file_hash HAVING COUNT(*)>1").fetchall()
+        conn = self._conn(); groups = list(core.iter_duplicates(conn)); conn.close()
+        return groups
+
+    @core.perf.timed("db.phash_todo")
+    def phash_todo(self, after=0, limit=64):
+        # images that would not decode this session are left out in SQL, so a page of them can't end the paging
+        conn = self._conn(); failed = set(self.phash_failed); rows = core.phash_todo(conn, sorted(IMAGE_EXTS), after, limit, failed)
+        n = core.phash_pending(conn, sorted(IMAGE_EXTS), failed) if not after else None
+        conn.close()
+        return rows, n
+
+    @core.perf.timed("db.phash")
+    def phash(self, fid):
+        conn = self._conn(); h = core.get_phash(conn, fid); conn.close()
+        return h
+
+    @core.perf.timed("db.set_phashes")
+    def set_phashes(self, pairs):
+        # called from the thumbnail and similar-image workers; a current index takes the new hashes in place.
+        # Both stats are taken with no connection open (the last close checkpoints and removes -wal).
+        with self._sim_lock:
+            gen = self.generation(); conn = self._conn(); pairs = core.set_phashes(conn, pairs); conn.close()
+            if not pairs: return
+            if self._sim and self._sim[0] == gen: self._sim[1].add(pairs)
+            self._quiet = (self._signature(), gen)
+
+    @core.perf.timed("db.similar")
+    def similar(self, fid, max_distance=core.PHASH_DISTANCE):
+        # -> [(distance, row)] nearest first, the file itself included; the index is rebuilt once the catalog has changed
+        gen = self.generation(); conn = self._conn(); h = core.get_phash(conn, fid)   # stat before connecting, as everywhere
+        if h is None: conn.close(); return []
+        with self._sim_lock:
+            if not self._sim or self._sim[0] != gen: self._sim = (gen, core.SimilarityIndex(core.load_phashes(conn)))
+            hits = self._sim[1].near(h, max_distance)
+        rows = {}
+        for i in range(0, len(hits), 900):
+            ids = [fid for _, fid in hits[i:i+900]]
+            for r in conn.execute(f"SELECT id,name,path,extension,category,size,modified_date,created_date FROM files WHERE id IN ({','.join('?'*len(ids))})", ids):
+                rows[r[0]] = dict(zip(core.ROW_KEYS, r))
+        conn.close()
+        return [(d, rows[fid]) for d, fid in hits if fid in rows]
+
+    @core.perf.timed("db.category_page")
+    def category_page(self, category, after=None, limit=TREE_PAGE_SIZE):
+        # keyset paging on (name NOCASE, id) so deep pages cost the same as the first one
+        conn = self._conn(); where, params = "category = ?", [category]
+        if after:
+            where += " AND name COLLATE NOCASE >= ? AND (name COLLATE NOCASE, id) > (?, ?)"; params += [after[0], after[0], after[1]]
+        rows = conn.execute(f"SELECT id,name,path,extension,category,size,modified_date,created_date FROM files WHERE {where} ORDER BY name COLLATE NOCASE, id LIMIT ?", params+[limit]).fetchall()
         conn.close()
-        return [{"hash":r[0],"count":r[1],"paths":r[2].split("||")} for r in rows]
-
-    def get_files_by_category(self, limit_per_cat=500):
-        conn = self._conn()
-        cats = conn.execute("SELECT DISTINCT category FROM files ORDER BY category").fetchall()
-        groups = {}
         keys = ("id","name","path","extension","category","size","modified_date","created_date")
-        for (cat,) in cats:
-            rows = conn.execute("SELECT id,name,path,extension,category,size,modified_date,created_date FROM files WHERE category=? ORDER BY name LIMIT ?", (cat, limit_per_cat)).fetchall()
-            total = conn.execute("SELECT COUNT(*) FROM files WHERE category=?", (cat,)).fetchone()[0]
-            groups[cat] = {"files":[dict(zip(keys, r)) for r in rows], "total":total}
-        conn.close(); return groups
+        return [dict(zip(keys, r)) for r in rows]
 
+    @core.perf.timed("db.get_folder_tree")
     def get_folder_tree(self, limit=8000):
         conn = self._conn()
         keys = ("id","name","path","extension","category","size","modified_date","created_date")
@@ -451,6 +529,176 @@ class AssetDatabase:
         return [dict(zip(keys, r)) for r in rows]
 
 
+class _Desc:
+    # heap key for descending orders
+    __slots__ = ("v",)
+    def __init__(self, v): self.v = v
+    def __lt__(self, o): return o.v < self.v
+    def __eq__(self, o): return self.v == o.v
+
+
+class FederatedSearch:
+    # One query over several catalogs. The first page of every catalog is fetched in parallel (each search runs on
+    # its own connection), then the per-catalog pages, already in the same order, are k-way merged on a heap; a
+    # catalog is only asked for its next page once the merge has used up the previous one.
+    # Rows get a fresh id (ids collide across catalogs), keep theirs as file_id, and are labelled with catalog.
+    KEYS = {"name": lambda f: f["name"].translate(core.ASCII_LOWER),   # NOCASE folds ASCII only
+            "size": lambda f: _Desc(f["size"] or 0), "date": lambda f: _Desc(f["modified_date"] or "")}
+
+    def __init__(self, sources, query="", category=None, extension=None, sort="name", page=PAGE_SIZE):
+        self._sources = sources; self._page = page; self._uid = 0; self.catalogs = len(sources)
+        self._args = dict(query=query, category=category, extension=extension, sort=sort)
+        self.key = self.KEYS.get(sort, self.KEYS["name"])
+        with ThreadPoolExecutor(max_workers=max(1, min(8, len(sources)))) as ex:
+            first = list(ex.map(lambda s: s[1].search(limit=page, offset=0, **self._args), sources))
+        self.total = sum(t for _, t in first)
+        self._bufs = [deque(rows) for rows, _ in first]; self._offsets = [len(rows) for rows, _ in first]
+        self._taken = [0] * len(sources)   # rows of each catalog handed out so far
+        self._done = [len(rows) < page for rows, _ in first]
+        self._heap = [(self.key(b[0]), i) for i, b in enumerate(self._bufs) if b]; heapq.heapify(self._heap)
+
+    def next_page(self, n=PAGE_SIZE):
+        out = []
+        while self._heap and len(out) < n:
+            _, i = heapq.heappop(self._heap); f = dict(self._bufs[i].popleft()); self._uid += 1
+            f["file_id"] = f["id"]; f["id"] = self._uid; f["catalog"] = self._sources[i][0]; out.append(f); self._taken[i] += 1
+            if not self._bufs[i] and not self._done[i]:
+                rows, _ = self._sources[i][1].search(limit=self._page, offset=self._offsets[i], count=False, **self._args)
+                self._bufs[i].extend(rows); self._offsets[i] += len(rows); self._done[i] = len(rows) < self._page
+            if self._bufs[i]: heapq.heappush(self._heap, (self.key(self._bufs[i][0]), i))
+        return out
+
+    def reload(self, source):
+        # rows of one catalog changed past what has been handed out: drop its read-ahead and fetch again from there
+        i = next((k for k, s in enumerate(self._sources) if s[0] == source), None)
+        if i is None: return
+        self._heap = [e for e in self._heap if e[1] != i]; heapq.heapify(self._heap)
+        rows, _ = self._sources[i][1].search(limit=self._page, offset=self._taken[i], count=False, **self._args)
+        self._bufs[i] = deque(rows); self._offsets[i] = self._taken[i] + len(rows); self._done[i] = len(rows) < self._page
+        if rows: heapq.heappush(self._heap, (self.key(rows[0]), i))
+
+
+# ═══════════════════════════════════════════════════════════════
+# AUDIO PEAKS  – multi-resolution min/max envelope, cached as <thumb key>.peaks
+# ═══════════════════════════════════════════════════════════════
+
+PEAK_MAGIC = b"EAMPK1"
+
+class PeakBuilder:
+    # streaming min/max over interleaved samples, normalised to int8
+    def __init__(self, channels):
+        self.channels=max(1,channels); self.step=PEAK_BASE_FRAMES*self.channels; self.samples=0
+        self.lo=array("b"); self.hi=array("b"); self._n=0; self._lo=0; self._hi=0
+    def feed(self, mv, offset=0, scale=1.0):
+        i=0; total=len(mv); self.samples+=total
+        while i<total:
+            seg=mv[i:i+self.step-self._n]; lo=min(seg); hi=max(seg)
+            if self._n==0: self._lo,self._hi=lo,hi
+            else: self._lo=min(self._lo,lo); self._hi=max(self._hi,hi)
+            self._n+=len(seg); i+=len(seg)
+            if self._n==self.step: self._flush(offset,scale)
+    def _flush(self, offset, scale):
+        self.lo.append(max(-127,min(127,int((self._lo-offset)*scale))))
+        self.hi.append(max(-127,min(127,int((self._hi-offset)*scale)))); self._n=0
+    def finish(self, rate, offset=0, scale=1.0):
+        if self._n: self._flush(offset,scale)
+        levels=[(self.lo,self.hi)]
+        while len(levels[-1][0])>=PEAK_MIN_BUCKETS*4:
+            lo,hi=levels[-1]
+            levels.append((array("b",(min(lo[k:k+4]) for k in range(0,len(lo),4))),
+                           array("b",(max(hi[k:k+4]) for k in range(0,len(hi),4)))))
+        dur=int(self.samples/self.channels/rate*1000) if rate else 0
+        return {"rate":rate,"channels":self.channels,"duration_ms":dur,"levels":levels}
+
+
+def save_peaks(path, peaks):
+    out=thumb_cache_path(path,".peaks")
+    try:
+        with open(out,"wb") as f:
+            f.write(PEAK_MAGIC+struct.pack("<IIIH",peaks["rate"],peaks["channels"],peaks["duration_ms"],len(peaks["levels"])))
+            for lo,hi in peaks["levels"]: f.write(struct.pack("<I",len(lo))); f.write(lo.tobytes()); f.write(hi.tobytes())
+    except OSError: pass
+
+
+def load_peaks(path):
+    pf=thumb_cache_path(path,".peaks")
+    try:
+        if pf.stat().st_mtime<os.stat(path).st_mtime: return None   # audio changed since it was analysed
+        data=pf.read_bytes()
+    except OSError: return None
+    if not data.startswith(PEAK_MAGIC): return None
+    pos=len(PEAK_MAGIC); rate,ch,dur,nl=struct.unpack_from("<IIIH",data,pos); pos+=14; levels=[]
+    for _ in range(nl):
+        (n,)=struct.unpack_from("<I",data,pos); pos+=4
+        lo=array("b",data[pos:pos+n]); hi=array("b",data[pos+n:pos+2*n]); pos+=2*n; levels.append((lo,hi))
+    return {"rate":rate,"channels":ch,"duration_ms":dur,"levels":levels}
+
+
+def _wav_peaks(path):
+    # stdlib fast path for plain PCM WAV; anything else goes through QAudioDecoder
+    codes={1:("B",128,127/128),2:("h",0,127/32768),4:("i",0,127/2**31)}
+    try:
+        with wave.open(path,"rb") as w:
+            if w.getsampwidth() not in codes: return None
+            code,off,scale=codes[w.getsampwidth()]; b=PeakBuilder(w.getnchannels())
+            while True:
+                chunk=w.readframes(1<<16)
+                if not chunk: break
+                b.feed(memoryview(chunk).cast(code),off,scale)
+            return b.finish(w.getframerate(),off,scale)
+    except Exception: return None
+
+
+def _decoded_peaks(path, should_stop=None):
+    # runs on a worker thread: QAudioDecoder delivers buffers through a local event loop, left when the decoder
+    # finishes, fails, goes quiet for PEAK_STALL_MS or the worker is stopped
+    if not has_media(): return None
+    codes={QAudioFormat.UInt8:("B",128,127/128),QAudioFormat.Int16:("h",0,127/32768),
+           QAudioFormat.Int32:("i",0,127/2**31),QAudioFormat.Float:("f",0,127.0)}
+    dec=QAudioDecoder(); loop=QEventLoop(); st={"b":None,"rate":0,"fmt":None}
+    stall=QTimer(); stall.setSingleShot(True); stall.timeout.connect(lambda: (st.update(stalled=True),loop.quit()))
+    poll=QTimer(); poll.timeout.connect(lambda: should_stop and should_stop() and loop.quit())
+    def on_buffer():
+        stall.start(PEAK_STALL_MS)
+        buf=dec.read(); f=buf.format(); spec=codes.get(f.sampleFormat())
+        if not buf.isValid() or not spec: return
+        if st["b"] is None: st["b"]=PeakBuilder(f.channelCount()); st["rate"]=f.sampleRate(); st["fmt"]=spec
+        mv=memoryview(buf.constData()).cast("B"); size=struct.calcsize(spec[0])
+        st["b"].feed(mv[:len(mv)//size*size].cast(spec[0]),spec[1],spec[2])
+    dec.bufferReady.connect(on_buffer); dec.finished.connect(loop.quit); dec.error.connect(lambda *_: loop.quit())
+    dec.setSource(QUrl.fromLocalFile(path)); dec.start(); stall.start(PEAK_STALL_MS); poll.start(200)
+    loop.exec(); dec.stop(); stall.stop(); poll.stop()
+    if st["b"] is None or not st["b"].samples or st.get("stalled") or (should_stop and should_stop()): return None   # never cache a partial waveform
+    return st["b"].finish(st["rate"],st["fmt"][1],st["fmt"][2])
+
+
+@core.perf.timed("waveform.peaks")
+def compute_peaks(path, should_stop=None):
+    peaks=(_wav_peaks(path) if path.lower().endswith(".wav") else None) or _decoded_peaks(path,should_stop)
+    if peaks: save_peaks(path,peaks)
+    return peaks
+
+
+def peak_columns(peaks, width):
+    # per-pixel (lo, hi) from the coarsest level that still has a peak per column
+    levels=peaks["levels"]; lo,hi=levels[0]
+    for l in levels:
+        if len(l[0])>=width: lo,hi=l
+    n=len(lo); cols=[]
+    if not n: return cols
+    for x in range(width):
+        a=x*n//width; b=max(a+1,(x+1)*n//width); cols.append((min(lo[a:b]),max(hi[a:b])))
+    return cols
+
+
+def render_waveform(peaks, w, h, color):
+    img=QImage(w,h,QImage.Format_RGB32); cc=QColor(color); img.fill(cc.darker(320))
+    p=QPainter(img); p.setPen(QPen(cc,1)); mid=h/2
+    for x,(lo,hi) in enumerate(peak_columns(peaks,w)):
+        p.drawLine(x,int(mid-hi*mid/128),x,int(mid-lo*mid/128))
+    p.end(); return img
+
+
 # ═══════════════════════════════════════════════════════════════
 # WORKERS
 # ═══════════════════════════════════════════════════════════════
@@ -458,72 +706,422 @@ class AssetDatabase:
 class ScanWorker(QThread):
     progress = Signal(int, int, str)
     finished_ok = Signal()
-    def __init__(self, db_path, root_path, hash_small=False):
-        super().__init__(); self.db_path=db_path; self.root=root_path; self.hash_small=hash_small; self._stop=False
-    def stop(self): self._stop=True
+    failed = Signal(str)
+    def __init__(self, db_path, root_path, hash_small=False, resume=False, throttle=None):
+        super().__init__(); self.db_path=db_path; self.root=root_path; self.hash_small=hash_small; self.resume=resume
+        self.throttle=throttle; self._stop=False
+    def stop(self): self._stop=True   # the scan checkpoints what it has and can be resumed later
     def run(self):
-        db = AssetDatabase(self.db_path); cats = db.get_categories()
-        self.progress.emit(0,0,"counting")
-        all_files=[]
-        for r,_,fnames in os.walk(self.root):
-            for fn in fnames:
-                all_files.append(os.path.join(r,fn))
-                if self._stop: return
-        total=len(all_files); self.progress.emit(0,total,"scanning")
-        conn=db._conn(); conn.execute("DELETE FROM files"); conn.commit()
-        batch,bs=[],800
-        for i,fp in enumerate(all_files):
-            if self._stop: conn.close(); return
-            try:
-                st=os.stat(fp); ext=Path(fp).suffix.lower(); cat=db.category_for_ext(ext,cats); fh=None
-                if self.hash_small and st.st_size<10*1024*1024:
-                    try: fh=hashlib.md5(open(fp,"rb").read()).hexdigest()
-                    except: pass
-                batch.append((Path(fp).name,fp,ext,cat,st.st_size,
-                    datetime.fromtimestamp(st.st_mtime).isoformat(),
-                    datetime.fromtimestamp(st.st_ctime).isoformat(),fh))
-                if len(batch)>=bs:
-                    conn.executemany("INSERT OR REPLACE INTO files (name,path,extension,category,size,modified_date,created_date,file_hash) VALUES (?,?,?,?,?,?,?,?)",batch)
-                    conn.commit(); batch.clear()
-            except: pass
-            if i%200==0: self.progress.emit(i+1,total,"scanning")
-        if batch:
-            conn.executemany("INSERT OR REPLACE INTO files (name,path,extension,category,size,modified_date,created_date,file_hash) VALUES (?,?,?,?,?,?,?,?)",batch)
-            conn.commit()
-        conn.close(); self.progress.emit(total,total,"complete"); self.finished_ok.emit()
+        try:
+            r=core.scan(self.db_path, self.root, self.hash_small, resume=self.resume, progress=self.progress.emit,
+                        should_stop=lambda: self._stop, throttle=self.throttle)
+        except Exception as e: self.failed.emit(str(e) or type(e).__name__); return
+        # a missing root comes back at once with one error and nothing indexed, and leaves no checkpoint behind
+        if r is None and not self._stop: self.failed.emit("the scan ended without finishing")
+        elif r is not None and r["errors"] and not r["indexed"]:
+            self.failed.emit("folder not found" if not os.path.isdir(self.root) else "nothing in it could be read")
+        elif r is not None: self.finished_ok.emit()
+
+
+class ScanScheduler(QObject):
+    # Queues scans of any open catalog and runs up to `limit` of them at once, never two on one catalog (SQLite
+    # has a single writer). While the user clicks, types or scrolls, the running scans share `busy_rate` files/s,
+    # so thumbnails and previews keep the disk; the limit lifts IDLE_AFTER seconds after the last input.
+    changed = Signal()
+    done = Signal(object, bool)   # job, completed (False: stopped and resumable, or failed with job["error"] set)
+    IDLE_AFTER = 2.0
+    def __init__(self, limit=2, busy_rate=500, parent=None):
+        super().__init__(parent); self.limit=max(1,int(limit)); self.busy_rate=busy_rate
+        self.limiter=core.RateLimiter(); self.jobs=[]; self._input=0.0
+        self._tick=QTimer(self); self._tick.timeout.connect(self._on_tick); self._tick.start(500)
+        self._filtering=False   # the app-wide input filter is only installed while a scan runs
+
+    def _watch_input(self, on):
+        app=QApplication.instance()
+        if not app or on==self._filtering: return
+        if on: app.installEventFilter(self)
+        else: app.removeEventFilter(self)
+        self._filtering=on
+
+    def submit(self, db_path, root, resume=False):
+        db_path=str(db_path); root=os.path.abspath(root)
+        if any(j["db"]==db_path and j["root"]==root for j in self.jobs): return False
+        self.jobs.append({"db":db_path,"root":root,"resume":resume,"worker":None,"status":"queued",
+                          "done":0,"total":0,"rate":0.0,"mark":None,"error":None})
+        self._pump(); self.changed.emit(); return True
+
+    def running(self): return [j for j in self.jobs if j["worker"]]
+    def jobs_for(self, db_path): return [j for j in self.jobs if j["db"]==str(db_path)]
+    def throttled(self): return self.limiter.rate is not None
+
+    def eta(self, j):
+        left=j["total"]-j["done"]
+        return left/j["rate"] if left>0 and j["rate"]>0 and j["status"]=="scanning" else None
+
+    def cancel(self, j):
+        if j["worker"]: j["worker"].stop()   # finishes through _on_finished
+        elif j in self.jobs: self.jobs.remove(j); self.changed.emit()
+
+    def stop_all(self):
+        # at exit: every scan checkpoints and returns soon after stop(), so wait for each one rather than letting
+        # a thread be destroyed while it runs (a walk stuck on slow I/O is reported, and waited for)
+        self.jobs=[j for j in self.jobs if j["worker"]]
+        for j in self.jobs: j["worker"].stop()
+        for j in self.jobs:
+            while not j["worker"].wait(3000): print(f"waiting for the scan of {j['root']} to stop…",file=sys.stderr)
+        self.jobs=[]; self._watch_input(False)   # their queued finished signals find no job: nothing starts after close
+
+    def _pump(self):
+        busy={j["db"] for j in self.running()}
+        for j in self.jobs:
+            if len(busy)>=self.limit: break
+            if j["worker"] or j["db"] in busy: continue
+            w=ScanWorker(j["db"],j["root"],resume=j["resume"],throttle=self.limiter); j["worker"]=w; j["status"]="scanning"
+            w.progress.connect(self._on_progress); w.failed.connect(self._on_failed); w.finished_ok.connect(self._on_complete)
+            w.finished.connect(self._on_finished); busy.add(j["db"]); w.start(); self._watch_input(True)
+
+    def _job(self, worker): return next((j for j in self.jobs if j["worker"] is worker), None)
+
+    def _on_progress(self, done, total, status):
+        j=self._job(self.sender())
+        if not j: return
+        now=time.monotonic(); j["done"],j["total"],j["status"]=done,total,status
+        # files/s smoothed over ≥1 s windows; the first report of a resumed scan only sets the mark
+        if j["mark"] is None: j["mark"]=(now,done)
+        elif now-j["mark"][0]>=1.0:
+            inst=(done-j["mark"][1])/(now-j["mark"][0]); j["rate"]=inst if not j["rate"] else 0.7*j["rate"]+0.3*inst
+            j["mark"]=(now,done)
+        self.changed.emit()
+
+    def _on_failed(self, err):
+        j=self._job(self.sender())
+        if j: j["status"]="failed"; j["error"]=err
+
+    def _on_complete(self):
+        j=self._job(self.sender())
+        if j: j["status"]="complete"
+
+    def _on_finished(self):
+        j=self._job(self.sender())
+        if not j: return
+        self.jobs.remove(j); j["worker"].deleteLater()
+        self._pump(); self._watch_input(bool(self.running())); self.done.emit(j, j["status"]=="complete"); self.changed.emit()
+
+    def _on_tick(self):
+        if not self.running(): self.limiter.rate=None; return
+        busy=self.busy_rate and time.monotonic()-self._input<self.IDLE_AFTER
+        self.limiter.rate=self.busy_rate if busy else None; self.changed.emit()
+
+    def eventFilter(self, obj, event):
+        if event.type() in (QEvent.MouseButtonPress, QEvent.KeyPress, QEvent.Wheel):
+            self._input=time.monotonic()
+            if self.busy_rate and self.jobs and self.limiter.rate is None: self.limiter.rate=self.busy_rate
+        return False
+
+
+def make_thumbnail(fpath, ext):
+    # grid-card thumbnail through the disk cache; written aside and renamed in, two workers may decode the same file
+    ext=ext.lower(); cached=thumb_cache_path(fpath)
+    if cached.exists(): return QImage(str(cached))
+    tmp=f"{cached}.{threading.get_ident()}.tmp"
+    if ext in IMAGE_EXTS and ext not in (".svg",".heic") and has_pil():
+        try:
+            im=PILImage.open(fpath)
+            if hasattr(im,'n_frames') and im.n_frames>1: im.seek(0)
+            im.thumbnail(THUMB_SIZE)
+            if im.mode in ("RGBA","P","LA"): im=im.convert("RGB")
+            im.save(tmp,"JPEG",quality=78); os.replace(tmp,cached); return QImage(str(cached))
+        except: pass
+    if ext in IMAGE_EXTS:
+        try:
+            qimg=QImage(fpath)
+            if not qimg.isNull():
+                qimg=qimg.scaled(THUMB_SIZE[0],THUMB_SIZE[1],Qt.KeepAspectRatio,Qt.SmoothTransformation)
+                if qimg.save(tmp,"JPEG",78): os.replace(tmp,cached)
+                return qimg
+        except: pass
+    return None
+
+def dhash(img):
+    # 64-bit difference hash of a thumbnail: 9x8 grey, one bit per pixel brighter than its right-hand neighbour
+    g=img.scaled(9,8,Qt.IgnoreAspectRatio,Qt.SmoothTransformation).convertToFormat(QImage.Format_Grayscale8)
+    bpl=g.bytesPerLine(); px=bytes(g.constBits())[:bpl*8]; h=0
+    for y in range(8):
+        for x in range(8): h=h<<1|(px[y*bpl+x]>px[y*bpl+x+1])
+    return h
 
 
 class ThumbWorker(QThread):
+    # items are (grid id, path, ext, catalog, file id): with the thumbnail decoded anyway, an image's difference hash
+    # costs next to nothing, so it is taken here and written to its catalog in batches for 🔍 Find similar
     ready = Signal(int, QImage)
-    def __init__(self): super().__init__(); self._queue=[]; self._stop=False
+    HASH_BATCH = 64
+    def __init__(self): super().__init__(); self._queue=[]; self._stop=False; self._hashes={}
     def enqueue(self, items): self._queue.extend(items)
     def clear_queue(self): self._queue.clear()
     def stop(self): self._stop=True
     def run(self):
+        ensure_dir(THUMB_DIR)
         while not self._stop:
-            if not self._queue: self.msleep(50); continue
-            fid,fpath,ext = self._queue.pop(0)
-            img = self._generate(fpath,ext)
-            if img and not img.isNull(): self.ready.emit(fid,img)
-    def _generate(self, fpath, ext):
-        ext=ext.lower(); thumb_key=f"{abs(hash(fpath))}.jpg"; cached=THUMB_DIR/thumb_key
-        if cached.exists(): return QImage(str(cached))
-        if ext in IMAGE_EXTS and HAS_PIL and ext not in (".svg",".heic"):
-            try:
-                im=PILImage.open(fpath)
-                if hasattr(im,'n_frames') and im.n_frames>1: im.seek(0)
-                im.thumbnail(THUMB_SIZE)
-                if im.mode in ("RGBA","P","LA"): im=im.convert("RGB")
-                im.save(str(cached),"JPEG",quality=78); return QImage(str(cached))
-            except: pass
-        if ext in IMAGE_EXTS:
+            if not self._queue: self._flush_hashes(); self.msleep(50); continue
+            fid,fpath,ext,db,file_id = self._queue.pop(0)
+            t0 = core.perf.start(); hit = t0 is not None and thumb_cache_path(fpath).exists()
+            img = make_thumbnail(fpath,ext); core.perf.stop("thumb.cached" if hit else "thumb.decode", t0)
+            if img and not img.isNull():
+                self.ready.emit(fid,img)
+                if db is not None:
+                    pend=self._hashes.setdefault(db,[]); pend.append((file_id,dhash(img)))
+                    if len(pend)>=self.HASH_BATCH: self._flush_hashes()
+    def _flush_hashes(self):
+        for db,pairs in self._hashes.items():
+            try: db.set_phashes(pairs)   # rows hashed already are skipped
+            except Exception: pass   # catalog busy or gone: Find similar hashes these itself
+        self._hashes.clear()
+class WaveformWorker(QThread):
+    # analyses audio once into a .peaks file; previews jump the queue, grid cards get rendered waveforms
+    peaks_ready = Signal(str, object)
+    ready = Signal(int, QImage)
+    def __init__(self): super().__init__(); self._queue=[]; self._lock=threading.Lock(); self._stop=False
+    def request(self, path):
+        with self._lock: self._queue.insert(0,(None,path))
+    def enqueue(self, items):
+        with self._lock: self._queue.extend((fid,fpath) for fid,fpath,_ in items)
+    def clear_queue(self):
+        with self._lock: self._queue=[j for j in self._queue if j[0] is None]
+    def stop(self): self._stop=True
+    def run(self):
+        ensure_dir(THUMB_DIR)
+        while not self._stop:
+            with self._lock: job=self._queue.pop(0) if self._queue else None
+            if not job: self.msleep(50); continue
+            fid,path=job; cached=thumb_cache_path(path)
+            if fid is not None and cached.exists(): self.ready.emit(fid,QImage(str(cached))); continue
+            peaks=load_peaks(path) or compute_peaks(path,lambda: self._stop)
+            if fid is None: self.peaks_ready.emit(path,peaks); continue
+            if peaks:
+                img=render_waveform(peaks,THUMB_SIZE[0],THUMB_SIZE[1],cat_color("Audio"))
+                img.save(str(cached),"JPEG",82); self.ready.emit(fid,img)
+
+
+class ExportWorker(QThread):
+    progress = Signal(int, int)
+    done = Signal(object, str)   # rows written (None: cancelled), error message
+    def __init__(self, db_path, out_path, search):
+        super().__init__(); self.db_path=db_path; self.out_path=out_path; self.search=search; self._stop=False
+    def stop(self): self._stop=True
+    def run(self):
+        try: self.done.emit(core.export(self.db_path,self.out_path,progress=self.progress.emit,should_stop=lambda: self._stop,**self.search),"")
+        except Exception as e: self.done.emit(None,str(e))
+
+
+class SimilarWorker(QThread):
+    # hashes the catalog's images that have no perceptual hash yet (through the thumbnail cache), then looks up
+    # the neighbours of one file; stopping skips the rest of the hashing and searches what is hashed so far
+    progress = Signal(int, int)
+    done = Signal(object, int)   # [(distance, row)], images still unhashed
+    def __init__(self, db, fid, path, ext):
+        super().__init__(); self.db=db; self.fid=fid; self.path=path; self.ext=ext; self._stop=False
+    def stop(self): self._stop=True
+    def _hash(self, fid, path, ext):
+        img=make_thumbnail(path,ext)
+        if img is None or img.isNull(): self.db.phash_failed.add(fid); return None
+        return fid,dhash(img)
+    def run(self):
+        ensure_dir(THUMB_DIR); todo,total=self.db.phash_todo(); n=0
+        if todo and self.db.phash(self.fid) is None:
+            first=self._hash(self.fid,self.path,self.ext)   # the file asked about goes first
+            if first: self.db.set_phashes([first])
+        while todo and not self._stop:
+            pairs=[p for p in (self._hash(*r) for r in todo if not self._stop) if p]
+            if pairs: self.db.set_phashes(pairs)
+            n+=len(todo); self.progress.emit(min(n,total),total); todo,_=self.db.phash_todo(todo[-1][0])
+        self.done.emit(self.db.similar(self.fid),max(0,total-n) if self._stop else 0)
+
+
+class EnrichWorker(QThread):
+    # probes new and changed media files of one catalog after its scan (core.enrich, in a process pool)
+    progress = Signal(int, int)
+    done = Signal(object, str)   # files probed, error message
+    def __init__(self, db_path, workers=None):
+        super().__init__(); self.db_path=db_path; self.workers=workers; self._stop=False
+    def stop(self): self._stop=True
+    def run(self):
+        try: self.done.emit(core.enrich(self.db_path,self.progress.emit,lambda: self._stop,self.workers),"")
+        except Exception as e: self.done.emit(None,str(e))
+
+
+class MergeWorker(QThread):
+    # folds other machines' catalogs into one (core.merge: one transaction, nothing visible until it commits)
+    progress = Signal(int, int, str)
+    done = Signal(object, str)   # {"sources", "rows", "added", "updated", "removed"} (None: cancelled), error message
+    def __init__(self, db_path, sources):
+        super().__init__(); self.db_path=db_path; self.sources=sources; self._stop=False
+    def stop(self): self._stop=True
+    def run(self):
+        try: self.done.emit(core.merge(self.db_path,self.sources,self.progress.emit,lambda: self._stop),"")
+        except Exception as e: self.done.emit(None,str(e))
+
+
+class WatchWorker(QThread):
+    # one per open catalog while "Live" is on; batches arrive already written to the catalog
+    changed = Signal(str, object)
+    def __init__(self, db_id, db_path):
+        super().__init__(); self.db_id=db_id; self._watcher=core.Watcher(db_path,lambda ch: self.changed.emit(self.db_id,ch))
+    def mode(self): return self._watcher.mode
+    def stop(self): self._watcher.stop()
+    def run(self): self._watcher.run()
+
+
+class PreviewDecoder(QThread):
+    # decodes previews straight to the requested bounds; one foreground job, the rest are prefetches
+    ready = Signal(str, QImage, QSize)
+    def __init__(self):
+        super().__init__(); self._queue=[]; self._lock=threading.Lock(); self._stop=False
+    def request(self, path, bounds):
+        with self._lock: self._queue=[(path,bounds)]   # stale prefetches are dropped with the old selection
+    def prefetch(self, path, bounds):
+        with self._lock:
+            if all(j[0]!=path for j in self._queue): self._queue.append((path,bounds))
+    def stop(self): self._stop=True
+    def run(self):
+        while not self._stop:
+            with self._lock: job=self._queue.pop(0) if self._queue else None
+            if not job: self.msleep(20); continue
+            path,bounds=job; t0=core.perf.start(); img=self._decode(path,bounds); core.perf.stop("preview.decode",t0)
+            self.ready.emit(path,img,bounds)
+
+    @staticmethod
+    def _decode(path, bounds):
+        reader=QImageReader(path); reader.setAutoTransform(True); sz=reader.size()
+        if sz.isValid() and (sz.width()>bounds.width() or sz.height()>bounds.height()):
+            reader.setScaledSize(sz.scaled(bounds,Qt.KeepAspectRatio))
+        img=reader.read()
+        if not img.isNull(): return img
+        if has_pil():   # formats / sizes QImageReader refuses (allocation limit, exotic TIFFs)
             try:
-                qimg=QImage(fpath)
-                if not qimg.isNull():
-                    qimg=qimg.scaled(THUMB_SIZE[0],THUMB_SIZE[1],Qt.KeepAspectRatio,Qt.SmoothTransformation)
-                    qimg.save(str(cached),"JPEG",78); return qimg
-            except: pass
-        return None
+                im=PILImage.open(path); im.draft("RGB",(bounds.width(),bounds.height()))
+                im.thumbnail((bounds.width(),bounds.height())); im=im.convert("RGBA")
+                return QImage(im.tobytes("raw","RGBA"),im.width,im.height,QImage.Format_RGBA8888).copy()
+            except Exception: pass
+        return QImage()
+
+
+class GifDecoder(QThread):
+    # decodes frames at display size into a small ring; playback pops from the other end
+    failed = Signal()
+    def __init__(self, path, max_w, max_h):
+        super().__init__(); self.path=path; self.max_w=max_w; self.max_h=max_h
+        self.ring=deque(); self._stop=False
+    def stop(self): self._stop=True
+    def _open(self):
+        reader=QImageReader(self.path); sz=reader.size()
+        if sz.isValid() and sz.width()>0 and sz.height()>0:
+            ratio=min(self.max_w/sz.width(),self.max_h/sz.height())
+            if ratio<1: reader.setScaledSize(QSize(max(1,int(sz.width()*ratio)),max(1,int(sz.height()*ratio))))
+        return reader
+    def run(self):
+        reader=self._open(); frames=0; total=0
+        while not self._stop:
+            if len(self.ring)>=GIF_RING_FRAMES: self.msleep(5); continue
+            img=reader.read() if reader.canRead() else QImage()
+            if img.isNull():
+                if total==0: self.failed.emit(); return
+                if frames<=1: return   # single frame: nothing to loop
+                reader=self._open(); frames=0; continue
+            frames+=1; total+=1; self.ring.append((img,reader.nextImageDelay()))
+
+
+class LineIndexer(QThread):
+    # walks the file once, recording (line number, byte offset) of a line start every TEXT_INDEX_BLOCK bytes
+    progress = Signal(int)
+    done = Signal(int)
+    def __init__(self, path, anchors):
+        super().__init__(); self.path=path; self.anchors=anchors; self._stop=False
+    def stop(self): self._stop=True
+    def run(self):
+        try:
+            with open(self.path,"rb") as f, mmap.mmap(f.fileno(),0,access=mmap.ACCESS_READ) as mm:
+                size=len(mm); pos=0; line=0; last_emit=0
+                while pos<size and not self._stop:
+                    end=mm.find(b"\n",min(pos+TEXT_INDEX_BLOCK,size)); end=size-1 if end<0 else end
+                    line+=mm[pos:end+1].count(b"\n"); pos=end+1
+                    if pos<size: self.anchors.append((line,pos))
+                    if line-last_emit>=20_000: self.progress.emit(line); last_emit=line
+                if not self._stop: self.done.emit(line+(1 if mm[size-1:size]!=b"\n" else 0))
+        except Exception: pass
+
+
+class TextPager(QAbstractScrollArea):
+    # read-only view over an mmap: only the visible lines are decoded, the scroll range grows with the index
+    def __init__(self, parent=None):
+        super().__init__(parent); self._file=None; self._mm=None; self._indexer=None
+        self._anchors=[(0,0)]; self._lines=0; self._widest=0; self._hint=(0,0)
+        self.setFocusPolicy(Qt.StrongFocus)
+
+    def open_file(self, path):
+        self.close_file()
+        try:
+            self._file=open(path,"rb")
+            if os.fstat(self._file.fileno()).st_size:
+                self._mm=mmap.mmap(self._file.fileno(),0,access=mmap.ACCESS_READ)
+        except Exception: self.close_file(); return False
+        self._anchors=[(0,0)]; self._lines=self._mm[:TEXT_INDEX_BLOCK].count(b"\n")+1 if self._mm else 0
+        if self._mm and len(self._mm)>TEXT_INDEX_BLOCK:
+            self._indexer=LineIndexer(path,self._anchors)
+            self._indexer.progress.connect(self._set_lines); self._indexer.done.connect(self._set_lines)
+            self._indexer.start()
+        self.verticalScrollBar().setValue(0); self.horizontalScrollBar().setValue(0); self._update_bars()
+        self.viewport().update(); return True
+
+    def close_file(self):
+        if self._indexer:
+            self._indexer.stop(); self._indexer.progress.disconnect(); self._indexer.done.disconnect()
+            self._indexer.wait(); self._indexer=None
+        if self._mm: self._mm.close(); self._mm=None
+        if self._file: self._file.close(); self._file=None
+        self._lines=0; self._widest=0; self._hint=(0,0); self._anchors=[(0,0)]
+
+    def _set_lines(self, n): self._lines=max(self._lines,n); self._update_bars()
+
+    def _line_h(self): return QFontMetrics(self.font()).lineSpacing()
+    def _visible_lines(self): return max(1,self.viewport().height()//self._line_h())
+
+    def _update_bars(self):
+        vis=self._visible_lines(); vb=self.verticalScrollBar()
+        vb.setRange(0,max(0,self._lines-vis)); vb.setPageStep(vis)
+        hb=self.horizontalScrollBar(); hb.setRange(0,max(0,self._widest-self.viewport().width()+20))
+        hb.setPageStep(self.viewport().width())
+
+    def _offset_of(self, line):
+        # nearest anchor (or the last position painted) at or before `line`, then step forward
+        i=bisect.bisect_right(self._anchors,(line,float("inf")))-1; ln,off=self._anchors[max(i,0)]
+        if ln<=self._hint[0]<=line: ln,off=self._hint
+        mm=self._mm; size=len(mm)
+        while ln<line and off<size:
+            nxt=mm.find(b"\n",off); off=size if nxt<0 else nxt+1; ln+=1
+        self._hint=(ln,off); return off
+
+    def resizeEvent(self, event): super().resizeEvent(event); self._update_bars()
+
+    def keyPressEvent(self, event):
+        vb=self.verticalScrollBar()
+        if event.key()==Qt.Key_Home and event.modifiers()&Qt.ControlModifier: vb.setValue(0)
+        elif event.key()==Qt.Key_End and event.modifiers()&Qt.ControlModifier: vb.setValue(vb.maximum())
+        else: super().keyPressEvent(event)
+
+    def paintEvent(self, event):
+        if not self._mm: return
+        p=QPainter(self.viewport()); p.setFont(self.font()); p.setPen(self.palette().color(QPalette.Text))
+        fm=QFontMetrics(self.font()); lh=fm.lineSpacing(); x=8-self.horizontalScrollBar().value()
+        mm=self._mm; size=len(mm); off=self._offset_of(self.verticalScrollBar().value()); y=4; widest=self._widest
+        while off<size and y<self.viewport().height():
+            nl=mm.find(b"\n",off,off+TEXT_MAX_LINE_BYTES); end=nl if nl>=0 else min(off+TEXT_MAX_LINE_BYTES,size)
+            txt=mm[off:end].decode("utf-8","replace").rstrip("\r").expandtabs(4)
+            p.drawText(x,y+fm.ascent(),txt); widest=max(widest,fm.horizontalAdvance(txt)+16); y+=lh
+            if nl>=0: off=nl+1
+            else: nxt=mm.find(b"\n",end); off=size if nxt<0 else nxt+1
+        p.end()
+        if widest!=self._widest: self._widest=widest; self._update_bars()
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -544,8 +1142,10 @@ class FileListModel(QAbstractListModel):
         if role==ROLE_FILEDATA: return f
         if role==ROLE_THUMBNAIL: return self._thumbs.get(f["id"])
         return None
+    @core.perf.timed("model.grid_reset")
     def set_files(self, files):
         self.beginResetModel(); self._files=list(files); self._thumbs.clear(); self.endResetModel()
+    @core.perf.timed("model.grid_append")
     def append_files(self, files):
         if not files: return
         first=len(self._files)
@@ -556,6 +1156,17 @@ class FileListModel(QAbstractListModel):
             if f["id"]==fid:
                 idx=self.index(i); self.dataChanged.emit(idx,idx,[ROLE_THUMBNAIL]); break
     def file_at(self, row): return self._files[row] if 0<=row<len(self._files) else None
+    def row_of(self, fid): return next((i for i,f in enumerate(self._files) if f["id"]==fid),-1)
+    def insert_at(self, row, f):
+        self.beginInsertRows(QModelIndex(),row,row); self._files.insert(row,f); self.endInsertRows()
+    def remove_at(self, row):
+        self.beginRemoveRows(QModelIndex(),row,row); self._thumbs.pop(self._files.pop(row)["id"],None); self.endRemoveRows()
+    def replace_at(self, row, f):
+        self._files[row]=f; self._thumbs.pop(f["id"],None); idx=self.index(row); self.dataChanged.emit(idx,idx)
+    def snapshot(self): return list(self._files), dict(self._thumbs)
+    @core.perf.timed("model.grid_reset")
+    def restore(self, files, thumbs):
+        self.beginResetModel(); self._files=list(files); self._thumbs=dict(thumbs); self.endResetModel()
 
 
 class FileCardDelegate(QStyledItemDelegate):
@@ -567,7 +1178,7 @@ class FileCardDelegate(QStyledItemDelegate):
     def sizeHint(self, option, index): return QSize(self.CARD_W, self.CARD_H)
 
     def paint(self, painter, option, index):
-        painter.save(); painter.setRenderHint(QPainter.Antialiasing)
+        t0=core.perf.start(); painter.save(); painter.setRenderHint(QPainter.Antialiasing)
         t=self.theme; r=option.rect.adjusted(5,5,-5,-5)
         hovered = index==self._hovered
         selected = bool(option.state & QStyle.State_Selected)
@@ -629,6 +1240,14 @@ class FileCardDelegate(QStyledItemDelegate):
                 painter.setPen(QColor("#ffffff"))
                 painter.drawText(QRect(int(bx),int(by),int(bw),int(bh)),Qt.AlignCenter,"GIF" if is_gif else ext_s)
 
+        # source catalog, in "All" search mode
+        if fd and fd.get("catalog"):
+            fnt=painter.font(); fnt.setPixelSize(9); fnt.setBold(True); painter.setFont(fnt); fm=QFontMetrics(fnt)
+            label=fm.elidedText(fd["catalog"],Qt.ElideRight,tr.width()-12); bw=fm.horizontalAdvance(label)+10; bh=16
+            badge=QPainterPath(); badge.addRoundedRect(QRectF(tr.x()+4,tr.y()+4,bw,bh),4,4)
+            painter.fillPath(badge,QColor(t['accent'])); painter.setPen(QColor("#ffffff"))
+            painter.drawText(QRect(tr.x()+4,tr.y()+4,bw,bh),Qt.AlignCenter,label)
+
         # filename
         text_y=tr.bottom()+10
         text_r=QRect(r.x()+self.PAD+self.ACCENT_W,text_y,r.width()-2*self.PAD-self.ACCENT_W,18)
@@ -642,19 +1261,47 @@ class FileCardDelegate(QStyledItemDelegate):
             info_r=QRect(r.x()+self.PAD+self.ACCENT_W,text_r.bottom()+2,r.width()-2*self.PAD-self.ACCENT_W,14)
             painter.setPen(QColor(t['text_muted'])); fnt.setPixelSize(10); painter.setFont(fnt)
             painter.drawText(info_r,Qt.AlignLeft|Qt.AlignVCenter,f"{fmt_size(fd.get('size',0))}  •  {fd.get('category','')}")
-        painter.restore()
+        painter.restore(); core.perf.stop("paint.card",t0)
 
 
 # ═══════════════════════════════════════════════════════════════
-# PREVIEW PANEL  (animated GIF via QMovie)
+# PREVIEW PANEL
 # ═══════════════════════════════════════════════════════════════
 
+class WaveformView(QWidget):
+    seek = Signal(float)
+    def __init__(self, parent=None):
+        super().__init__(parent); self._peaks=None; self._pos=0.0; self._cols=None; self._msg="Analyzing waveform…"
+        self.setMinimumHeight(110); self.setCursor(Qt.PointingHandCursor)
+    def set_peaks(self, peaks, msg="Analyzing waveform…"):
+        self._peaks=peaks; self._cols=None; self._msg=msg; self.update()
+    def set_position(self, frac): self._pos=frac; self.update()
+    def resizeEvent(self, event): self._cols=None; super().resizeEvent(event)
+    def mousePressEvent(self, event): self._seek_to(event.position().x())
+    def mouseMoveEvent(self, event):
+        if event.buttons()&Qt.LeftButton: self._seek_to(event.position().x())
+    def _seek_to(self, x):
+        if self._peaks and self.width()>0:
+            self._pos=min(1.0,max(0.0,x/self.width())); self.update(); self.seek.emit(self._pos)
+    def paintEvent(self, event):
+        p=QPainter(self); pal=self.palette(); w,h=self.width(),self.height()
+        if not self._peaks:
+            p.setPen(pal.color(QPalette.PlaceholderText)); p.drawText(self.rect(),Qt.AlignCenter,self._msg); return
+        if self._cols is None or len(self._cols)!=w: self._cols=peak_columns(self._peaks,w)
+        played=pal.color(QPalette.Highlight); rest=QColor(pal.color(QPalette.Text)); rest.setAlpha(90)
+        mid=h/2; cut=int(self._pos*w)
+        for x,(lo,hi) in enumerate(self._cols):
+            p.setPen(played if x<cut else rest); p.drawLine(x,int(mid-hi*mid/128),x,int(mid-lo*mid/128))
+        p.setPen(QPen(played,2)); p.drawLine(cut,0,cut,h)
+
+
 class PreviewPanel(QWidget):
     open_location = Signal(str)
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setMinimumWidth(280); self._current_path=None; self._media_player=None
-        self._audio_output=None; self._loaded_font_id=-1; self._gif_movie=None
+        self._audio_output=None; self._loaded_font_id=-1; self._gif_decoder=None
+        self._decoder=None; self._img_cache=OrderedDict(); self._img_cache_bytes=0; self._waves=None
         self._build_ui()
 
     def _build_ui(self):
@@ -674,15 +1321,13 @@ class PreviewPanel(QWidget):
         self._img_label=QLabel(); self._img_label.setAlignment(Qt.AlignCenter)
         self._img_scroll.setWidget(self._img_label); self.stack.addWidget(self._img_scroll)
 
-        if HAS_MEDIA:
-            self._video_w=QVideoWidget(); self.stack.addWidget(self._video_w)
-        else:
-            lbl=QLabel("Video preview needs QtMultimedia"); lbl.setAlignment(Qt.AlignCenter)
-            lbl.setStyleSheet("color:#64748b"); self.stack.addWidget(lbl)
+        # 2 – placeholder until the first video swaps in a QVideoWidget (see _video_widget)
+        self._video_w=None; self._no_video=QLabel("Video preview needs QtMultimedia")
+        self._no_video.setAlignment(Qt.AlignCenter); self._no_video.setStyleSheet("color:#64748b")
+        self.stack.addWidget(self._no_video)
 
         self._audio_box=QWidget(); alay=QVBoxLayout(self._audio_box); alay.setAlignment(Qt.AlignCenter)
-        self._audio_icon=QLabel("🎵"); self._audio_icon.setStyleSheet("font-size:52px")
-        self._audio_icon.setAlignment(Qt.AlignCenter); alay.addWidget(self._audio_icon)
+        self._waveform=WaveformView(); self._waveform.seek.connect(self._seek_fraction); alay.addWidget(self._waveform)
         self._audio_slider=QSlider(Qt.Horizontal); self._audio_slider.setRange(0,1000); alay.addWidget(self._audio_slider)
         ab=QHBoxLayout()
         self._audio_play=QPushButton("▶  Play"); self._audio_play.setObjectName("accentBtn")
@@ -692,8 +1337,7 @@ class PreviewPanel(QWidget):
         self._audio_time.setStyleSheet("color:#94a3b8; font-size:11px"); alay.addWidget(self._audio_time)
         self.stack.addWidget(self._audio_box)
 
-        self._text_edit=QPlainTextEdit(); self._text_edit.setReadOnly(True)
-        self._text_edit.setMaximumBlockCount(2000); self.stack.addWidget(self._text_edit)
+        self._text_view=TextPager(); self.stack.addWidget(self._text_view)
 
         self._font_box=QWidget(); flay=QVBoxLayout(self._font_box)
         self._font_sample=QLabel(); self._font_sample.setAlignment(Qt.AlignCenter)
@@ -710,6 +1354,7 @@ class PreviewPanel(QWidget):
         self._gif_label=QLabel(); self._gif_label.setAlignment(Qt.AlignCenter)
         self._gif_scroll=QScrollArea(); self._gif_scroll.setWidgetResizable(True)
         self._gif_scroll.setWidget(self._gif_label); self.stack.addWidget(self._gif_scroll)
+        self._gif_timer=QTimer(self); self._gif_timer.setSingleShot(True); self._gif_timer.timeout.connect(self._gif_tick)
 
         lay.addWidget(self.stack, 1)
 
@@ -727,13 +1372,18 @@ class PreviewPanel(QWidget):
         self._btn_open.clicked.connect(lambda: self.open_location.emit(self._current_path or ""))
         self._btn_copy.clicked.connect(lambda: QApplication.clipboard().setText(self._current_path or ""))
 
-        if HAS_MEDIA:
-            self._audio_play.clicked.connect(self._toggle_play)
-            self._audio_stop.clicked.connect(self._stop_media)
-            self._audio_slider.sliderMoved.connect(self._seek_media)
+        self._audio_play.clicked.connect(self._toggle_play)
+        self._audio_stop.clicked.connect(self._stop_media)
+        self._audio_slider.sliderMoved.connect(self._seek_media)
+
+    def _video_widget(self):
+        if self._video_w is None:
+            self._video_w=QVideoWidget(); self.stack.removeWidget(self._no_video)
+            self.stack.insertWidget(2,self._video_w); self._no_video.deleteLater()
+        return self._video_w
 
     def _ensure_player(self):
-        if not HAS_MEDIA: return
+        if not has_media(): return
         if self._media_player is None:
             self._media_player=QMediaPlayer(); self._audio_output=QAudioOutput()
             self._media_player.setAudioOutput(self._audio_output)
@@ -741,7 +1391,7 @@ class PreviewPanel(QWidget):
             self._media_player.durationChanged.connect(lambda d: None)
 
     def _toggle_play(self):
-        if not HAS_MEDIA or not self._media_player: return
+        if not self._media_player: return
         if self._media_player.playbackState()==QMediaPlayer.PlayingState:
             self._media_player.pause(); self._audio_play.setText("▶  Play")
         else: self._media_player.play(); self._audio_play.setText("⏸  Pause")
@@ -753,17 +1403,22 @@ class PreviewPanel(QWidget):
         if self._media_player and self._media_player.duration()>0:
             self._media_player.setPosition(int(val/1000*self._media_player.duration()))
 
+    def _seek_fraction(self, frac):
+        if self._media_player and self._media_player.duration()>0:
+            self._media_player.setPosition(int(frac*self._media_player.duration()))
+
     def _on_pos(self, pos):
         dur=self._media_player.duration() if self._media_player else 0
         if dur>0:
             self._audio_slider.blockSignals(True); self._audio_slider.setValue(int(pos/dur*1000)); self._audio_slider.blockSignals(False)
+            self._waveform.set_position(pos/dur)
         self._audio_time.setText(f"{self._fmt_ms(pos)} / {self._fmt_ms(dur)}")
 
     @staticmethod
     def _fmt_ms(ms): s=max(0,ms//1000); return f"{s//60}:{s%60:02d}"
 
-    def show_file(self, fd):
-        self._release_media(); self._stop_gif()
+    def show_file(self, fd, media=None):
+        self._release_media(); self._stop_gif(); self._text_view.close_file()
         self._current_path=fd.get("path",""); ext=fd.get("extension","").lower()
         self.title.setText(fd.get("name",""))
         if self._loaded_font_id>=0: QFontDatabase.removeApplicationFont(self._loaded_font_id); self._loaded_font_id=-1
@@ -771,11 +1426,12 @@ class PreviewPanel(QWidget):
 
         if ext==".gif" and exists: self._show_gif(path)
         elif ext in IMAGE_EXTS and exists: self._show_image(path)
-        elif ext in VIDEO_EXTS and exists and HAS_MEDIA: self._show_video(path)
-        elif ext in AUDIO_EXTS and exists and HAS_MEDIA: self._show_audio(path)
+        elif ext in VIDEO_EXTS and exists and has_media(): self._show_video(path)
+        elif ext in AUDIO_EXTS and exists: self._show_audio(path)
         elif ext in TEXT_EXTS and exists: self._show_text(path)
         elif ext in FONT_EXTS and exists: self._show_font(path, fd.get("name",""))
         elif exists: self.stack.setCurrentIndex(6)
+        elif core.archive_of(path): self._empty.setText(f"Inside {os.path.basename(core.archive_of(path))}\n(not extracted)"); self.stack.setCurrentIndex(0)
         else: self._empty.setText("File not found on disk"); self.stack.setCurrentIndex(0)
 
         props=[]
@@ -787,49 +1443,110 @@ class PreviewPanel(QWidget):
             if fd.get(key):
                 try: dt=datetime.fromisoformat(fd[key]); props.append(f"<b>{label}:</b> {dt.strftime('%Y-%m-%d  %H:%M')}")
                 except: props.append(f"<b>{label}:</b> {fd[key]}")
+        m=media or {}
+        if m.get("width"): props.append(f"<b>Resolution:</b> {m['width']} × {m.get('height','?')}")
+        if m.get("duration"): props.append(f"<b>Duration:</b> {fmt_duration(m['duration'])}")
+        if m.get("fps"): props.append(f"<b>Frame rate:</b> {m['fps']:g} fps")
+        if m.get("codec"): props.append(f"<b>Codec:</b> {m['codec']}")
+        if m.get("sample_rate"):
+            ch={1:"mono",2:"stereo"}.get(m.get("channels"),f"{m.get('channels','?')} ch")
+            props.append(f"<b>Audio:</b> {m['sample_rate']/1000:g} kHz, {ch}")
+        if m.get("family"): props.append(f"<b>Font family:</b> {m['family']}")
         self._props.setText("<br>".join(props))
 
     def _show_gif(self, path):
-        self._gif_movie=QMovie(path)
-        if not self._gif_movie.isValid(): self._show_image(path); return
-        # scale nicely
         w=max(200, self._gif_scroll.viewport().width()-20)
-        size = self._gif_movie.scaledSize()
-        if size.isEmpty():
-            self._gif_movie.jumpToFrame(0)
-            size = self._gif_movie.currentImage().size()
-        if not size.isEmpty() and size.width() > 0:
-            ratio = min(w / size.width(), 600 / size.height())
-            if ratio < 1:
-                self._gif_movie.setScaledSize(QSize(int(size.width()*ratio), int(size.height()*ratio)))
-        self._gif_label.setMovie(self._gif_movie)
-        self._gif_movie.start()
-        self.stack.setCurrentIndex(7)
+        self._gif_decoder=GifDecoder(path,w,600); self._gif_decoder.failed.connect(lambda p=path: self._gif_failed(p))
+        self._gif_label.setPixmap(QPixmap()); self._gif_decoder.start()
+        self.stack.setCurrentIndex(7); self._gif_timer.start(0)
+
+    def _gif_tick(self):
+        dec=self._gif_decoder
+        if not dec: return
+        if dec.ring:
+            img,delay=dec.ring.popleft(); self._gif_label.setPixmap(QPixmap.fromImage(img))
+            self._gif_timer.start(max(20,delay))
+        elif not dec.isFinished(): self._gif_timer.start(10)   # decoder behind, poll again shortly
+
+    def _gif_failed(self, path):
+        if self._gif_decoder and self._gif_decoder.path==path and path==self._current_path:
+            self._stop_gif(); self._show_image(path)
 
     def _stop_gif(self):
-        if self._gif_movie: self._gif_movie.stop(); self._gif_label.setMovie(None); self._gif_movie=None
+        self._gif_timer.stop()
+        if self._gif_decoder:
+            self._gif_decoder.stop(); self._gif_decoder.wait(); self._gif_decoder=None
+            self._gif_label.setPixmap(QPixmap())
 
     def _show_image(self, path):
-        pix=QPixmap(path)
-        if pix.isNull(): self.stack.setCurrentIndex(6); return
-        w=self._img_scroll.viewport().width()-10
-        if pix.width()>w: pix=pix.scaledToWidth(w,Qt.SmoothTransformation)
-        self._img_label.setPixmap(pix); self.stack.setCurrentIndex(1)
+        bounds=self._preview_bounds(); img=self._cached_preview(path,bounds)
+        if img is not None: self._set_preview(img); self.stack.setCurrentIndex(1); return
+        # cached grid thumbnail first, the screen-sized decode replaces it in _on_decoded
+        thumb=thumb_cache_path(path); pix=QPixmap(str(thumb)) if thumb.exists() else QPixmap()
+        if not pix.isNull():
+            w=self._img_scroll.viewport().width()-10
+            self._img_label.setPixmap(pix.scaledToWidth(min(w,pix.width()*3),Qt.FastTransformation))
+        else: self._img_label.setPixmap(QPixmap()); self._img_label.setText("Loading…")
+        self.stack.setCurrentIndex(1); self._ensure_decoder().request(path,bounds)
+
+    def prefetch(self, paths):
+        bounds=self._preview_bounds()
+        for p in paths:
+            if self._cached_preview(p,bounds) is None: self._ensure_decoder().prefetch(p,bounds)
+
+    def _ensure_decoder(self):
+        if self._decoder is None:
+            self._decoder=PreviewDecoder(); self._decoder.ready.connect(self._on_decoded); self._decoder.start()
+        return self._decoder
+
+    def _preview_bounds(self):
+        dpr=self.devicePixelRatioF(); w=max(200,self._img_scroll.viewport().width()-10)
+        scr=self.screen(); h=scr.availableGeometry().height() if scr else 1080
+        return QSize(int(w*dpr),int(h*dpr))
+
+    def _cached_preview(self, path, bounds):
+        hit=self._img_cache.get(path)
+        if hit is None or hit[1].width()<bounds.width() or hit[1].height()<bounds.height(): return None
+        self._img_cache.move_to_end(path); return hit[0]
+
+    def _on_decoded(self, path, img, bounds):
+        if not img.isNull():
+            old=self._img_cache.pop(path,None)
+            if old: self._img_cache_bytes-=old[0].sizeInBytes()
+            self._img_cache[path]=(img,bounds); self._img_cache_bytes+=img.sizeInBytes()
+            while self._img_cache_bytes>PREVIEW_CACHE_BYTES and len(self._img_cache)>1:
+                _,(ev,_b)=self._img_cache.popitem(last=False); self._img_cache_bytes-=ev.sizeInBytes()
+        if path!=self._current_path or self.stack.currentIndex()!=1: return
+        if img.isNull(): self.stack.setCurrentIndex(6)
+        else: self._set_preview(img)
+
+    def _set_preview(self, img):
+        pix=QPixmap.fromImage(img); pix.setDevicePixelRatio(self.devicePixelRatioF())
+        self._img_label.setText(""); self._img_label.setPixmap(pix)
 
     def _show_video(self, path):
-        self._ensure_player(); self._media_player.setVideoOutput(self._video_w)
+        self._ensure_player(); self._media_player.setVideoOutput(self._video_widget())
         self._media_player.setSource(QUrl.fromLocalFile(path)); self._media_player.play(); self.stack.setCurrentIndex(2)
 
     def _show_audio(self, path):
-        self._ensure_player(); self._media_player.setVideoOutput(None)
-        self._media_player.setSource(QUrl.fromLocalFile(path))
+        peaks=load_peaks(path); self._waveform.set_peaks(peaks); self._waveform.set_position(0)
+        if peaks is None and self._waves: self._waves.request(path)
+        if has_media():
+            self._ensure_player(); self._media_player.setVideoOutput(None)
+            self._media_player.setSource(QUrl.fromLocalFile(path))
         self._audio_play.setText("▶  Play"); self._audio_slider.setValue(0)
-        self._audio_time.setText("0:00 / 0:00"); self.stack.setCurrentIndex(3)
+        dur=self._fmt_ms(peaks["duration_ms"]) if peaks else "0:00"
+        self._audio_time.setText(f"0:00 / {dur}"); self.stack.setCurrentIndex(3)
+
+    def set_waveform_worker(self, worker):
+        self._waves=worker; worker.peaks_ready.connect(self._on_peaks)
+
+    def _on_peaks(self, path, peaks):
+        if path==self._current_path and self.stack.currentIndex()==3:
+            self._waveform.set_peaks(peaks,"Waveform unavailable")
 
     def _show_text(self, path):
-        try: txt=Path(path).read_text("utf-8",errors="replace")[:50_000]
-        except: txt="(unable to read file)"
-        self._text_edit.setPlainText(txt); self.stack.setCurrentIndex(4)
+        self.stack.setCurrentIndex(4 if self._text_view.open_file(path) else 6)
 
     def _show_font(self, path, name):
         fid=QFontDatabase.addApplicationFont(path); self._loaded_font_id=fid
@@ -846,46 +1563,114 @@ class PreviewPanel(QWidget):
         if self._media_player: self._media_player.stop(); self._media_player.setSource(QUrl())
 
     def clear_preview(self):
-        self._release_media(); self._stop_gif()
+        self._release_media(); self._stop_gif(); self._text_view.close_file()
         self.title.setText("No file selected"); self._props.setText(""); self.stack.setCurrentIndex(0)
 
+    def shutdown(self):
+        self.clear_preview()
+        if self._decoder: self._decoder.stop(); self._decoder.wait(2000)
+
 
 # ═══════════════════════════════════════════════════════════════
 # ORGANIZER TREE
 # ═══════════════════════════════════════════════════════════════
 
+class CategoryTreeModel(QAbstractItemModel):
+    # top level = categories (internalId 0), children = files (internalId = category row + 1),
+    # fetched a page at a time through canFetchMore/fetchMore as the view scrolls
+    HEADERS=("Name","Size","Extension","Path")
+    def __init__(self, parent=None):
+        super().__init__(parent); self._db=None; self._cats=[]
+    @core.perf.timed("model.type_reset")
+    def reset(self, db, totals):
+        self.beginResetModel(); self._db=db
+        self._cats=[{"name":c["category"],"count":c["count"],"size":c["size"],"files":[]}
+                    for c in sorted(totals,key=lambda c:c["category"] or "")]
+        self.endResetModel()
+    def _cat(self, parent):
+        return self._cats[parent.row()] if parent.isValid() and parent.internalId()==0 else None
+
+    def index(self, row, col, parent=QModelIndex()):
+        if not self.hasIndex(row,col,parent): return QModelIndex()
+        return self.createIndex(row,col,parent.row()+1 if parent.isValid() else 0)
+    def parent(self, index):
+        if not index.isValid() or index.internalId()==0: return QModelIndex()
+        return self.createIndex(index.internalId()-1,0,0)
+    def rowCount(self, parent=QModelIndex()):
+        if not parent.isValid(): return len(self._cats)
+        c=self._cat(parent); return len(c["files"]) if c else 0
+    def columnCount(self, parent=QModelIndex()): return len(self.HEADERS)
+    def hasChildren(self, parent=QModelIndex()):
+        if not parent.isValid(): return bool(self._cats)
+        c=self._cat(parent); return bool(c and c["count"])
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation==Qt.Horizontal and role==Qt.DisplayRole: return self.HEADERS[section]
+        return None
+
+    def canFetchMore(self, parent):
+        c=self._cat(parent); return bool(c and self._db and len(c["files"])<c["count"])
+    @core.perf.timed("model.type_fetch")
+    def fetchMore(self, parent):
+        c=self._cat(parent)
+        if not c or not self._db: return
+        last=c["files"][-1] if c["files"] else None
+        page=self._db.category_page(c["name"],after=(last["name"],last["id"]) if last else None)
+        if not page: c["count"]=len(c["files"]); return   # catalog shrank underneath us
+        first=len(c["files"])
+        self.beginInsertRows(parent,first,first+len(page)-1); c["files"].extend(page); self.endInsertRows()
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid(): return None
+        col=index.column()
+        if index.internalId()==0:
+            c=self._cats[index.row()]
+            if role==Qt.DisplayRole:
+                if col==0: return f"📁 {c['name']}  ({c['count']:,} files)"
+                if col==1: return fmt_size(c["size"])
+            return None
+        files=self._cats[index.internalId()-1]["files"]
+        if index.row()>=len(files): return None
+        f=files[index.row()]
+        if role==ROLE_FILEDATA: return f
+        if role==Qt.DisplayRole:
+            if col==0: return f["name"]
+            if col==1: return fmt_size(f.get("size",0))
+            if col==2: return f.get("extension","")
+            if col==3: return f.get("path","")
+        return None
+
+
 class OrganizerTree(QWidget):
     file_selected = Signal(dict)
     def __init__(self, parent=None):
         super().__init__(parent); lay=QVBoxLayout(self); lay.setContentsMargins(0,0,0,0); lay.setSpacing(0)
+        self._stack=QStackedWidget()
         self.tree=QTreeWidget(); self.tree.setHeaderLabels(["Name","Size","Extension","Path"])
         self.tree.setColumnWidth(0,320); self.tree.setColumnWidth(1,90); self.tree.setColumnWidth(2,70)
         self.tree.setIndentation(20); self.tree.setAnimated(True); self.tree.setRootIsDecorated(True)
         self.tree.itemClicked.connect(self._on_click)
         self.tree.setContextMenuPolicy(Qt.CustomContextMenu)
         self.tree.customContextMenuRequested.connect(self._on_ctx)
-        lay.addWidget(self.tree)
-
-    def populate_by_type(self, db):
-        self.tree.clear()
-        if not db: return
-        groups = db.get_files_by_category()
-        for cat in sorted(groups.keys()):
-            info=groups[cat]; total=info["total"]; files=info["files"]
-            ts=sum(f.get("size",0) for f in files)
-            node=QTreeWidgetItem(self.tree)
-            node.setText(0,f"📁 {cat}  ({total:,} files)"); node.setText(1,fmt_size(ts))
-            node.setData(0,Qt.UserRole,None)
-            for f in files:
-                child=QTreeWidgetItem(node); child.setText(0,f["name"]); child.setText(1,fmt_size(f.get("size",0)))
-                child.setText(2,f.get("extension","")); child.setText(3,f.get("path",""))
-                child.setData(0,Qt.UserRole,f)
-            if total>len(files):
-                more=QTreeWidgetItem(node); more.setText(0,f"  … and {total-len(files):,} more")
-                more.setData(0,Qt.UserRole,None)
-
+        self._stack.addWidget(self.tree)
+
+        self.type_model=CategoryTreeModel(self)
+        self.type_view=QTreeView(); self.type_view.setModel(self.type_model)
+        self.type_view.setColumnWidth(0,320); self.type_view.setColumnWidth(1,90); self.type_view.setColumnWidth(2,70)
+        self.type_view.setIndentation(20); self.type_view.setAnimated(True); self.type_view.setUniformRowHeights(True)
+        self.type_view.clicked.connect(lambda idx: self._emit_file(idx.data(ROLE_FILEDATA)))
+        self.type_view.setContextMenuPolicy(Qt.CustomContextMenu)
+        self.type_view.customContextMenuRequested.connect(self._on_type_ctx)
+        self._stack.addWidget(self.type_view)
+        lay.addWidget(self._stack)
+
+    def populate_by_type(self, db, totals=None):
+        self._stack.setCurrentWidget(self.type_view)
+        if not db: self.type_model.reset(None,[]); return
+        self.type_model.reset(db, totals if totals is not None else db.category_totals())
+
+    @core.perf.timed("model.folder_build")
     def populate_by_folder(self, db):
-        self.tree.clear()
+        self._stack.setCurrentWidget(self.tree); self.tree.clear()
         if not db: return
         files=db.get_folder_tree()
         if not files: return
@@ -932,19 +1717,25 @@ class OrganizerTree(QWidget):
             else: break
         add(self.tree.invisibleRootItem(),nd)
 
-    def _on_click(self, item, col):
-        fd=item.data(0,Qt.UserRole)
+    def _on_click(self, item, col): self._emit_file(item.data(0,Qt.UserRole))
+
+    def _emit_file(self, fd):
         if fd and isinstance(fd,dict) and "id" in fd: self.file_selected.emit(fd)
 
     def _on_ctx(self, pos):
         item=self.tree.itemAt(pos)
-        if not item: return
-        fd=item.data(0,Qt.UserRole)
+        if item: self._file_menu(item.data(0,Qt.UserRole),self.tree.viewport().mapToGlobal(pos))
+
+    def _on_type_ctx(self, pos):
+        idx=self.type_view.indexAt(pos)
+        if idx.isValid(): self._file_menu(idx.data(ROLE_FILEDATA),self.type_view.viewport().mapToGlobal(pos))
+
+    def _file_menu(self, fd, global_pos):
         if not fd or "id" not in fd: return
         menu=QMenu(self)
         a_open=menu.addAction("📂  Open File Location")
         a_copy=menu.addAction("📋  Copy Path"); a_name=menu.addAction("📝  Copy Name")
-        action=menu.exec(self.tree.viewport().mapToGlobal(pos))
+        action=menu.exec(global_pos)
         if action==a_open: open_file_location(fd["path"])
         elif action==a_copy: QApplication.clipboard().setText(fd["path"])
         elif action==a_name: QApplication.clipboard().setText(fd["name"])
@@ -977,6 +1768,7 @@ class SidebarWidget(QWidget):
         self.lbl_total.setText(f"{tf:,} files"); self.lbl_size.setText(fmt_size(ts))
         for btn in self._cat_btns: btn.setParent(None); btn.deleteLater()
         self._cat_btns.clear()
+        while self._cat_layout.count(): self._cat_layout.takeAt(0)   # the old stretch; live updates call this often
         ab=QPushButton(f"All  ({tf})"); ab.setObjectName("catBtn"); ab.setCheckable(True); ab.setChecked(True)
         ab.clicked.connect(lambda: self._on_cat("All")); self._cat_layout.addWidget(ab); self._cat_btns.append(ab)
         for c in sorted(stats.get("by_category",[]),key=lambda x:x["count"],reverse=True):
@@ -986,9 +1778,139 @@ class SidebarWidget(QWidget):
         self._cat_layout.addStretch()
 
     def _on_cat(self, name):
+        self.set_current(name); self.category_selected.emit(name)
+
+    def set_current(self, name):
         for btn in self._cat_btns:
             btn.setChecked(btn.text().startswith(name+" ") or (name=="All" and btn.text().startswith("All")))
-        self.category_selected.emit(name)
+
+
+# ═══════════════════════════════════════════════════════════════
+# DIALOGS
+# ═══════════════════════════════════════════════════════════════
+
+class IgnoreRulesDialog(QDialog):
+    def __init__(self, rules, parent=None):
+        super().__init__(parent); self.setWindowTitle("Ignore Rules"); self.resize(460,420); self._root=rules.root
+        lay=QVBoxLayout(self); lay.setSpacing(8)
+        lay.addWidget(QLabel(f"<b>{rules.root.rstrip(os.sep)}</b>"))
+        hint=QLabel("One pattern per line · <code>name/</code> skips a folder · <code>*.ext</code> skips files · # comments"); hint.setObjectName("statSmall")
+        lay.addWidget(hint)
+        self.ed_patterns=QPlainTextEdit("\n".join(rules.patterns)); lay.addWidget(self.ed_patterns,1)
+        self.chk_hidden=QCheckBox("Skip hidden files and folders"); self.chk_hidden.setChecked(not rules.hidden); lay.addWidget(self.chk_hidden)
+        self.chk_archives=QCheckBox("Catalog the files inside zip and tar archives (nothing is extracted)")
+        self.chk_archives.setChecked(rules.archives); lay.addWidget(self.chk_archives)
+        row=QHBoxLayout(); self.ed_min=QLineEdit(); self.ed_max=QLineEdit()
+        for lbl,ed,v in (("Min size",self.ed_min,rules.min_size),("Max size",self.ed_max,rules.max_size)):
+            ed.setPlaceholderText("no limit  (e.g. 4K, 2GB)"); ed.setText(self._size_text(v))
+            row.addWidget(QLabel(lbl)); row.addWidget(ed,1)
+        lay.addLayout(row)
+        btns=QDialogButtonBox(QDialogButtonBox.Ok|QDialogButtonBox.Cancel|QDialogButtonBox.RestoreDefaults)
+        btns.accepted.connect(self.accept); btns.rejected.connect(self.reject)
+        btns.button(QDialogButtonBox.RestoreDefaults).clicked.connect(lambda: self.ed_patterns.setPlainText("\n".join(core.DEFAULT_IGNORE)))
+        lay.addWidget(btns)
+
+    @staticmethod
+    def _size_text(v):
+        # exact, so reopening and saving the dialog never shifts a limit by rounding
+        if not v: return ""
+        return next((f"{v//1024**k} {u}" for k,u in ((3,"GB"),(2,"MB"),(1,"KB")) if v%1024**k==0),str(v))
+
+    def accept(self):
+        try: self.rules=core.IgnoreRules(self._root,self.ed_patterns.toPlainText().splitlines(),not self.chk_hidden.isChecked(),
+                                         core.parse_size(self.ed_min.text()),core.parse_size(self.ed_max.text()),self.chk_archives.isChecked())
+        except ValueError as e: QMessageBox.warning(self,"Ignore Rules",str(e).capitalize()); return
+        super().accept()
+
+
+def fmt_ms(ms):
+    return f"{ms/1000:.2f} s" if ms>=1000 else f"{ms:.1f} ms" if ms>=10 else f"{ms:.2f} ms"
+
+class DiagnosticsDialog(QDialog):
+    # live view of core.perf: one row per operation (db.*, scan.*, thumb.*, model.*, paint.*), refreshed while open
+    COLS=("Operation","Count","Mean","p50","p95","p99","Max","Total","Latency")
+    BARS="▁▂▃▄▅▆▇█"
+    def __init__(self, parent=None):
+        super().__init__(parent); self.setWindowTitle("Diagnostics"); self.resize(900,520)
+        lay=QVBoxLayout(self); lay.setSpacing(8); perf=core.perf
+        row=QHBoxLayout()
+        self.chk_on=QCheckBox("Record timings"); self.chk_on.setChecked(perf.enabled)
+        self.chk_trace=QCheckBox("Keep every span for a trace"); self.chk_trace.setChecked(perf.tracing)
+        self.chk_on.toggled.connect(self._set_enabled); self.chk_trace.toggled.connect(self._set_enabled)
+        row.addWidget(self.chk_on); row.addWidget(self.chk_trace); row.addStretch()
+        self.lbl_since=QLabel(); self.lbl_since.setObjectName("statSmall"); row.addWidget(self.lbl_since)
+        lay.addLayout(row)
+        self.table=QTreeWidget(); self.table.setHeaderLabels(list(self.COLS)); self.table.setRootIsDecorated(False)
+        self.table.setUniformRowHeights(True); self.table.setSortingEnabled(True); self.table.sortByColumn(7,Qt.DescendingOrder)
+        self.table.setColumnWidth(0,200)
+        for c in range(1,8): self.table.setColumnWidth(c,72)
+        lay.addWidget(self.table,1)
+        hint=QLabel("Latency buckets run from under 0.05 ms to over 10 s; hover a histogram for the counts. "
+                    "p50/p95/p99 are bucket bounds. A trace opens in chrome://tracing or ui.perfetto.dev.")
+        hint.setObjectName("statSmall"); hint.setWordWrap(True); lay.addWidget(hint)
+        btns=QDialogButtonBox(QDialogButtonBox.Close)
+        self.btn_reset=btns.addButton("Reset",QDialogButtonBox.ResetRole); self.btn_reset.clicked.connect(self._reset)
+        self.btn_save=btns.addButton("Save trace…",QDialogButtonBox.ActionRole); self.btn_save.clicked.connect(self._save_trace)
+        btns.rejected.connect(self.reject); lay.addWidget(btns)
+        self._items={}; self._timer=QTimer(self); self._timer.timeout.connect(self.refresh); self._timer.start(1000)
+        self.refresh()
+
+    def _set_enabled(self, _=None):
+        on=self.chk_on.isChecked(); core.perf.enable(on,trace=self.chk_trace.isChecked())
+        cfg=load_config(); cfg["diagnostics"]=on; cfg["diagnostics_trace"]=core.perf.tracing; save_config(cfg)
+        self.refresh()
+
+    def _reset(self): core.perf.reset(); self.refresh()
+
+    def _save_trace(self):
+        path,_=QFileDialog.getSaveFileName(self,"Save Trace",str(Path.home()/f"eam-trace-{datetime.now():%Y%m%d-%H%M%S}.json"),"Trace (*.json)")
+        if not path: return
+        try: n=core.perf.write_trace(path)
+        except OSError as e: QMessageBox.warning(self,"Save Trace",str(e)); return
+        note="" if n else "\n\nNo spans were kept: tick “Keep every span for a trace”, then reproduce the slow part."
+        QMessageBox.information(self,"Save Trace",f"{n:,} spans and the per-operation summary saved to\n{path}{note}")
+
+    def _histogram(self, buckets):
+        top=max(buckets) or 1
+        return "".join(self.BARS[(c*len(self.BARS)-1)//top] if c else " " for c in buckets)
+
+    def _bucket_tip(self, buckets):
+        bounds=core.PERF_BUCKETS; lines=[]
+        for i,c in enumerate(buckets):
+            if not c: continue
+            lo=bounds[i-1] if i else 0
+            rng=f"≤ {fmt_ms(bounds[i])}" if i==0 else f"{fmt_ms(lo)} – {fmt_ms(bounds[i])}" if i<len(bounds) else f"> {fmt_ms(lo)}"
+            lines.append(f"{rng}:  {c:,}")
+        return "\n".join(lines)
+
+    def refresh(self):
+        perf=core.perf; snap=perf.snapshot(); kept,dropped=perf.spans()
+        state="recording" if perf.enabled else "off — tick Record timings, then reproduce the slow part"
+        trace=f" · {kept:,} spans kept" + (f" ({dropped:,} oldest dropped)" if dropped else "") if perf.tracing else ""
+        self.lbl_since.setText(f"Since {datetime.fromtimestamp(perf.since):%H:%M:%S} · {state}{trace}")
+        self.btn_save.setEnabled(bool(snap))
+        # rows are updated in place so selection and scroll survive the refresh
+        self.table.setSortingEnabled(False)
+        if len(snap)<len(self._items): self.table.clear(); self._items={}
+        for name,op in snap.items():
+            it=self._items.get(name)
+            if it is None:
+                it=self._items[name]=_SortItem([name]); self.table.addTopLevelItem(it)
+                for c in range(1,8): it.setTextAlignment(c,Qt.AlignRight|Qt.AlignVCenter)
+            cells=[f"{op['count']:,}"]+[fmt_ms(op[k]) for k in ("mean_ms","p50_ms","p95_ms","p99_ms","max_ms","total_ms")]+[self._histogram(op["buckets"])]
+            for c,text in enumerate(cells,1): it.setText(c,text)
+            it.keys=[name,op["count"],op["mean_ms"],op["p50_ms"],op["p95_ms"],op["p99_ms"],op["max_ms"],op["total_ms"],op["p50_ms"]]
+            it.setToolTip(8,self._bucket_tip(op["buckets"]))
+        self.table.setSortingEnabled(True)
+
+
+class _SortItem(QTreeWidgetItem):
+    # sorts on the numbers behind the formatted cells
+    keys=()
+    def __lt__(self, other):
+        c=self.treeWidget().sortColumn() if self.treeWidget() else 0
+        try: return self.keys[c]<other.keys[c]
+        except (IndexError,TypeError): return super().__lt__(other)
 
 
 # ═══════════════════════════════════════════════════════════════
@@ -999,9 +1921,18 @@ class MainWindow(QMainWindow):
     def __init__(self, theme_mgr):
         super().__init__(); self._tm=theme_mgr
         self.setWindowTitle(f"{APP_NAME}  v{APP_VERSION}"); self.resize(1340,820)
-        self._dbs={}; self._active_db=None; self._scan_worker=None; self._thumb_worker=None
+        self._dbs={}; self._active_db=None; self._thumb_worker=None; self._wave_worker=None
         self._current_cat="All"; self._current_ext=""; self._current_query=""
         self._offset=0; self._total=0; self._sort="name"; self._view_mode="grid"
+        self._unverified=set(); self._painted=False; self._stats={}; self._tab_cache=OrderedDict()
+        self._watchers={}; self._live=bool(load_config().get("live",False)); self._federated=False; self._fed=None; self._parsed=None
+        self._export_worker=None; self._similar_worker=None
+        self._enrich_worker=None; self._enrich_queue=[]   # catalogs whose new files still need probing, in scan order
+        self._merge_worker=None; self._diagnostics=None
+        cfg=load_config(); self._trace_path=os.environ.get("EAM_TRACE")   # record from launch, trace written there on exit
+        core.perf.enable(bool(self._trace_path) or cfg.get("diagnostics",False), trace=bool(self._trace_path) or cfg.get("diagnostics_trace",False))
+        self._scheduler=ScanScheduler(cfg.get("scan_concurrency",2),cfg.get("scan_busy_rate",500),self)
+        self._scheduler.changed.connect(self._update_scan_footer); self._scheduler.done.connect(self._on_scan_done)
         self._build_ui(); self._restore_state(); self._start_thumb_worker()
 
     def _build_ui(self):
@@ -1019,9 +1950,15 @@ class MainWindow(QMainWindow):
         btn_new.setToolTip("Open or create a database"); btn_new.clicked.connect(self._open_or_create_db)
         tbl.addWidget(btn_new); tbl.addSpacing(10)
 
-        self.search_input=QLineEdit(); self.search_input.setPlaceholderText("🔍  Search files…  (Ctrl+F)")
+        self.search_input=QLineEdit(); self.search_input.setPlaceholderText("🔍  Search files…  ext:mov size:>2GB modified:>2026-01-01 path:…  (Ctrl+F)")
+        self.search_input.setToolTip("Free text matches names. Narrow with ext:mov,mp4  cat:video  size:>2GB  size:10MB..1GB\n"
+                                     "modified:>=2026-01-01  modified:2025-06  modified:>30d  path:/projects/clientX  name:logo\n"
+                                     "res:>=1920x1080  res:4k  duration:>2m  fps:>=50  codec:prores  font:roboto  machine:ws-03 (merged catalogs)")
         self.search_input.setObjectName("searchBox"); self.search_input.setMinimumWidth(200)
         self.search_input.setClearButtonEnabled(True); tbl.addWidget(self.search_input,1)
+        self.btn_all=QPushButton("🗂 All"); self.btn_all.setObjectName("secondaryBtn"); self.btn_all.setCheckable(True)
+        self.btn_all.setToolTip("Search every open catalog at once"); self.btn_all.toggled.connect(self._set_federated)
+        tbl.addWidget(self.btn_all)
 
         self.ext_combo=QComboBox(); self.ext_combo.setMinimumWidth(130)
         self.ext_combo.addItem("All Extensions"); tbl.addWidget(self.ext_combo)
@@ -1039,10 +1976,15 @@ class MainWindow(QMainWindow):
         self.theme_combo.setMinimumWidth(130); self.theme_combo.setToolTip("Theme")
         self.theme_combo.currentIndexChanged.connect(self._on_theme_changed); tbl.addWidget(self.theme_combo)
 
-        btn_scan=QPushButton("📁 Scan"); btn_scan.setObjectName("accentBtn")
-        btn_scan.clicked.connect(self._start_scan_dialog); tbl.addWidget(btn_scan)
-        btn_export=QPushButton("💾 Export"); btn_export.setObjectName("secondaryBtn")
-        btn_export.clicked.connect(self._export_csv); tbl.addWidget(btn_export)
+        self.btn_scan=QPushButton("📁 Scan"); self.btn_scan.setObjectName("accentBtn")
+        self.btn_scan.setToolTip("Add a folder to this catalog, rescan one, or resume an interrupted scan")
+        self.btn_scan.clicked.connect(self._start_scan_dialog); tbl.addWidget(self.btn_scan)
+        self.btn_export=QPushButton("💾 Export"); self.btn_export.setObjectName("secondaryBtn")
+        self.btn_export.setToolTip("Export the current results to CSV, JSON Lines or a new catalog")
+        self.btn_export.clicked.connect(self._export); tbl.addWidget(self.btn_export)
+        self.btn_live=QPushButton("👁 Live"); self.btn_live.setObjectName("secondaryBtn"); self.btn_live.setCheckable(True)
+        self.btn_live.setToolTip("Watch scanned folders and update the catalog as files change")
+        self.btn_live.setChecked(self._live); self.btn_live.toggled.connect(self._set_live); tbl.addWidget(self.btn_live)
         main_lay.addWidget(tb)
 
         self.progress=QProgressBar(); self.progress.setFixedHeight(3)
@@ -1066,7 +2008,7 @@ class MainWindow(QMainWindow):
         self.grid_view.setWrapping(True); self.grid_view.setSelectionMode(QAbstractItemView.SingleSelection)
         self.grid_view.setModel(self.file_model); self.grid_view.setItemDelegate(self.file_delegate)
         self.grid_view.setMouseTracking(True); self.grid_view.viewport().installEventFilter(self)
-        self.grid_view.clicked.connect(self._on_file_clicked)
+        self.grid_view.selectionModel().currentChanged.connect(self._on_file_clicked)
         self.grid_view.setContextMenuPolicy(Qt.CustomContextMenu)
         self.grid_view.customContextMenuRequested.connect(self._on_context_menu)
         gpl.addWidget(self.grid_view,1)
@@ -1075,6 +2017,8 @@ class MainWindow(QMainWindow):
         fl=QHBoxLayout(footer); fl.setContentsMargins(14,0,14,0)
         self.lbl_footer=QLabel("Ready"); self.lbl_footer.setStyleSheet("color:#64748b; font-size:11px")
         fl.addWidget(self.lbl_footer); fl.addStretch()
+        self.lbl_scans=QLabel(); self.lbl_scans.setStyleSheet("color:#64748b; font-size:11px"); self.lbl_scans.setVisible(False)
+        fl.addWidget(self.lbl_scans)
         self.btn_load_more=QPushButton("Load more ↓"); self.btn_load_more.setObjectName("secondaryBtn")
         self.btn_load_more.setVisible(False); self.btn_load_more.clicked.connect(self._load_more)
         fl.addWidget(self.btn_load_more); gpl.addWidget(footer)
@@ -1101,7 +2045,8 @@ class MainWindow(QMainWindow):
         QShortcut(QKeySequence("Ctrl+F"),self,self.search_input.setFocus)
         QShortcut(QKeySequence("Escape"),self,self._escape_pressed)
         QShortcut(QKeySequence("Ctrl+O"),self,self._open_or_create_db)
-        QShortcut(QKeySequence("Ctrl+E"),self,self._export_csv)
+        QShortcut(QKeySequence("Ctrl+E"),self,self._export)
+        QShortcut(QKeySequence("Ctrl+Shift+D"),self,self._show_diagnostics)
 
     def eventFilter(self, obj, event):
         if obj==self.grid_view.viewport():
@@ -1128,31 +2073,110 @@ class MainWindow(QMainWindow):
         elif self._view_mode=="folder":
             self._center_stack.setCurrentIndex(1); self.organizer.populate_by_folder(self._db())
 
-    def _on_tree_file(self, fd): self.preview.show_file(fd)
+    def _on_tree_file(self, fd): self._show_preview(fd)
+
+    def _show_preview(self, fd):
+        db=self._dbs.get(fd.get("catalog")) or self._db()
+        self.preview.show_file(fd,db.media(fd.get("file_id",fd["id"])) if db else None)
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if not self._painted: self._painted=True; QTimer.singleShot(0,self._after_first_paint)
+
+    def _after_first_paint(self):
+        # the restored catalog is only opened once the window is on screen
+        if STARTUP_PROBE: print(f"first_window_ms={(time.perf_counter()-_T0)*1000:.1f}",flush=True)
+        if self.tab_bar.count()>0: self._on_tab_changed(self.tab_bar.currentIndex())
+        if self._live and not STARTUP_PROBE: QTimer.singleShot(0,self._start_watchers)
+        if STARTUP_PROBE:
+            print(f"first_catalog_ms={(time.perf_counter()-_T0)*1000:.1f}",flush=True); self.close()
 
     def _open_or_create_db(self):
-        path,_=QFileDialog.getOpenFileName(self,"Open or Create Database",str(DB_DIR),"SQLite Databases (*.db);;All Files (*)")
+        path,_=QFileDialog.getOpenFileName(self,"Open or Create Database",str(ensure_dir(DB_DIR)),"SQLite Databases (*.db);;All Files (*)")
         if not path:
             path,_=QFileDialog.getSaveFileName(self,"Create New Database",str(DB_DIR/"my_assets.db"),"SQLite Databases (*.db)")
         if not path: return
         self._add_db(path)
 
+    def _add_tab(self, db_id):
+        # tab data must be set before currentChanged fires, or the first tab activates with no catalog
+        self.tab_bar.blockSignals(True); idx=self.tab_bar.addTab(db_id); self.tab_bar.setTabData(idx,db_id)
+        self.tab_bar.blockSignals(False); return idx
+
     def _add_db(self, path):
         p=Path(path); db_id=p.stem
         if db_id in self._dbs:
             for i in range(self.tab_bar.count()):
                 if self.tab_bar.tabData(i)==db_id: self.tab_bar.setCurrentIndex(i); return
-        self._dbs[db_id]=AssetDatabase(p)
-        idx=self.tab_bar.addTab(db_id); self.tab_bar.setTabData(idx,db_id)
-        self.tab_bar.setCurrentIndex(idx); self._save_state()
+        self._dbs[db_id]=AssetDatabase(p); idx=self._add_tab(db_id)
+        if self.tab_bar.currentIndex()==idx: self._on_tab_changed(idx)
+        else: self.tab_bar.setCurrentIndex(idx)
+        self._save_state()
 
     def _on_tab_changed(self, idx):
-        if idx<0: self._active_db=None; self.preview.clear_preview(); self.file_model.set_files([]); return
-        self._active_db=self.tab_bar.tabData(idx); self._refresh_all(); self._save_state()
+        if idx<0:
+            self._stash_tab(); self._active_db=None; self._stats={}
+            self.preview.clear_preview(); self.file_model.set_files([]); return
+        db_id=self.tab_bar.tabData(idx)
+        if db_id in self._unverified:
+            self._unverified.discard(db_id)
+            if not self._dbs[db_id].path.exists():
+                self.status.showMessage(f"Catalog not found: {self._dbs[db_id].path}",8000)
+                QTimer.singleShot(0,lambda: self._close_tab_id(db_id)); return
+        self._stash_tab(); self._active_db=db_id
+        if self._live: self._start_watcher(db_id)
+        if self._thumb_worker: self._thumb_worker.clear_queue(); self._wave_worker.clear_queue()
+        cached=self._tab_cache.pop(db_id,None) if not self._federated else None   # the grid spans every tab
+        if cached: self._apply_filters(cached)
+        if cached and cached["gen"]==self._dbs[db_id].generation(): self._restore_tab(cached)
+        else: self._refresh_all()
+        self._save_state()
+
+    # ── per-tab view cache: switching back restores the last window without re-querying SQLite ──
+    def _stash_tab(self):
+        db=self._db()
+        if not db or not self._stats or self._federated: return
+        files,thumbs=self.file_model.snapshot()
+        self._tab_cache[self._active_db]={"gen":db.generation(),"files":files,"thumbs":thumbs,"stats":self._stats,
+            "query":self._current_query,"cat":self._current_cat,"ext":self._current_ext,"sort":self._sort,
+            "offset":self._offset,"total":self._total,"scroll":self.grid_view.verticalScrollBar().value(),
+            "rows_bytes":sum(sys.getsizeof(f)+sum(map(sys.getsizeof,f.values())) for f in files)}
+        # keep the budget: pixmaps of the least recently used tabs go first, then whole tabs (rows and all)
+        px=lambda c: sum(p.width()*p.height()*p.depth()//8 for p in c["thumbs"].values())
+        used=sum(px(c)+c["rows_bytes"] for c in self._tab_cache.values())
+        for c in self._tab_cache.values():
+            if used<=TAB_CACHE_BYTES: break
+            used-=px(c); c["thumbs"]={}
+        while used>TAB_CACHE_BYTES and self._tab_cache:
+            used-=self._tab_cache.popitem(last=False)[1]["rows_bytes"]
+
+    def _apply_filters(self, c):
+        self._current_query=c["query"]; self._current_cat=c["cat"]; self._current_ext=c["ext"]; self._sort=c["sort"]
+        self.search_input.blockSignals(True); self.search_input.setText(c["query"]); self.search_input.blockSignals(False)
+        self.sort_combo.blockSignals(True); self.sort_combo.setCurrentIndex(["name","size","date"].index(c["sort"]))
+        self.sort_combo.blockSignals(False)
+
+    def _restore_tab(self, c):
+        self._stats=c["stats"]; self.sidebar.update_stats(c["stats"]); self.sidebar.set_current(c["cat"])
+        self._fill_ext_combo(c["stats"])
+        self.file_model.restore(c["files"],c["thumbs"]); self.preview.clear_preview()
+        self._offset=c["offset"]; self._total=c["total"]
+        self.lbl_footer.setText(f"{self._offset:,} / {self._total:,} files"); self.btn_load_more.setVisible(self._offset<self._total)
+        self._queue_thumbnails([f for f in c["files"] if f["id"] not in c["thumbs"]])
+        QTimer.singleShot(0,lambda v=c["scroll"]: self.grid_view.verticalScrollBar().setValue(v))
+        if self._view_mode=="type": self.organizer.populate_by_type(self._db(),c["stats"]["by_category"])
+        elif self._view_mode=="folder": self.organizer.populate_by_folder(self._db())
+
+    def _close_tab_id(self, db_id):
+        for i in range(self.tab_bar.count()):
+            if self.tab_bar.tabData(i)==db_id: self._on_tab_close(i); return
 
     def _on_tab_close(self, idx):
-        db_id=self.tab_bar.tabData(idx); self.tab_bar.removeTab(idx)
+        db_id=self.tab_bar.tabData(idx); self._tab_cache.pop(db_id,None)
+        if self._active_db==db_id: self._stats={}   # nothing to stash for a closed tab
+        self.tab_bar.removeTab(idx)
         if db_id in self._dbs: del self._dbs[db_id]
+        self._stop_watcher(db_id)
         if self._active_db==db_id:
             self._active_db=None
             if self.tab_bar.count()>0: self.tab_bar.setCurrentIndex(0)
@@ -1162,25 +2186,249 @@ class MainWindow(QMainWindow):
         return self._dbs.get(self._active_db) if self._active_db else None
 
     def _start_scan_dialog(self):
-        if not self._db():
+        db=self._db()
+        if not db:
             QMessageBox.information(self,"No Database","Open or create a database first (click the + tab)."); return
+        jobs=self._scheduler.jobs_for(db.path); busy={j["root"] for j in jobs}
+        pending=[st for st in db.pending_scans() if st["root"] not in busy]; roots=db.roots()
+        if not pending and not roots and not jobs: self._scan_new_folder(); return
+        # each catalog can hold several folders; rescanning one leaves the others' rows alone
+        menu=QMenu(self); menu.setStyleSheet(build_ctx_qss(self._tm.t))
+        for j in jobs:
+            a=menu.addAction(f"■  Stop  {j['root']}" if j["worker"] else f"✕  Unqueue  {j['root']}")
+            a.triggered.connect(lambda _=False,j=j: self._scheduler.cancel(j))
+        if jobs: menu.addSeparator()
+        for st in pending:
+            a=menu.addAction(f"▶  Resume  {st['root']}   ({st['done']:,} files so far)")
+            a.triggered.connect(lambda _=False,r=st["root"]: self._run_scan(r,resume=True))
+        menu.addAction("➕  Add folder…").triggered.connect(self._scan_new_folder)
+        if self._merge_worker: menu.addAction("■  Stop merging").triggered.connect(self._merge_worker.stop)
+        else: menu.addAction("⤵  Merge catalogs into this one…").triggered.connect(self._merge_catalogs)
+        if roots:
+            menu.addSeparator()
+            for r in roots:
+                when=r["scanned"][:16].replace("T"," ") if r["scanned"] else "not finished"
+                a=menu.addAction(f"↻  {r['path']}   ({r['file_count']:,} files · {when})")
+                a.triggered.connect(lambda _=False,p=r["path"]: self._run_scan(p))
+                if not os.path.isdir(r["path"]): a.setEnabled(False); a.setText(a.text()+"  — not on this machine")
+            ig=menu.addMenu("⚙  Ignore rules"); ig.setStyleSheet(build_ctx_qss(self._tm.t))
+            for r in roots: ig.addAction(r["path"]).triggered.connect(lambda _=False,r=r: self._edit_ignore_rules(r))
+            rm=menu.addMenu("✕  Remove folder"); rm.setStyleSheet(build_ctx_qss(self._tm.t))
+            for r in roots: rm.addAction(r["path"]).triggered.connect(lambda _=False,p=r["path"]: self._remove_root(p))
+        menu.exec(self.btn_scan.mapToGlobal(self.btn_scan.rect().bottomLeft()))
+
+    # ── merge: catalogs scanned on other machines, labelled with their file names ──
+    def _merge_catalogs(self):
+        db=self._db()
+        if self._scheduler.jobs_for(db.path):
+            self.status.showMessage("Wait for the scans of this catalog to finish, then merge",5000); return
+        paths,_=QFileDialog.getOpenFileNames(self,"Merge Catalogs",str(Path.home()),"EAM catalogs (*.db)")
+        paths=[p for p in paths if Path(p).resolve()!=Path(db.path).resolve()]
+        if not paths: return
+        if self._enrich_worker and self._enrich_worker.db_path==str(db.path):
+            # one writer at a time: the probing picks up again, where it left off, once the merge is done
+            self._enrich_worker.stop()
+            if str(db.path) not in self._enrich_queue: self._enrich_queue.insert(0,str(db.path))
+        self._merge_worker=w=MergeWorker(str(db.path),[(p,None) for p in paths])
+        w.progress.connect(self._on_merge_progress); w.done.connect(self._on_merge_done); w.start()
+
+    def _on_merge_progress(self, i, n, label):
+        self.status.showMessage(f"Merging {label} ({i+1} of {n})…" if i<n else "Merging: writing the combined catalog…")
+
+    def _on_merge_done(self, r, err):
+        w=self._merge_worker; w.wait(); self._merge_worker=None; self._next_enrich()
+        if err: QMessageBox.warning(self,"Merge Error",err); return
+        if r is None: self.status.showMessage("Merge cancelled, nothing changed",5000); return
+        self.status.showMessage(f"Merged {r['sources']} catalog{'s' if r['sources']!=1 else ''}: {r['added']:,} files added, {r['updated']:,} updated, "
+                                f"{r['removed']:,} removed ✓",8000)
+        for db_id,db in self._dbs.items():
+            if str(db.path)==w.db_path:
+                db.bump_generation()
+                if db_id==self._active_db or self._federated: self._refresh_all()
+
+    def _scan_new_folder(self):
         d=QFileDialog.getExistingDirectory(self,"Select Directory to Scan")
-        if not d: return
-        if self._scan_worker and self._scan_worker.isRunning():
-            QMessageBox.warning(self,"Busy","A scan is already running."); return
-        self._scan_worker=ScanWorker(self._db().path,d)
-        self._scan_worker.progress.connect(self._on_scan_progress)
-        self._scan_worker.finished_ok.connect(self._on_scan_done)
-        self.progress.setVisible(True); self.progress.setValue(0)
-        self.status.showMessage(f"Scanning {d} …"); self._scan_worker.start()
-
-    def _on_scan_progress(self, current, total, status):
-        if total>0: self.progress.setValue(int(current/total*100))
-        self.lbl_footer.setText(f"Scanning: {current:,} / {total:,}  ({status})")
-
-    def _on_scan_done(self):
-        self.progress.setVisible(False); self.status.showMessage("Scan complete ✓",5000)
-        self._refresh_all(); self._scan_worker=None
+        if d: self._run_scan(d)
+
+    def _run_scan(self, d, resume=False):
+        if self._merge_worker and self._merge_worker.db_path==str(self._db().path):
+            self.status.showMessage("This catalog is being merged into; scan it when that is done",5000); return
+        if not self._scheduler.submit(self._db().path,d,resume):
+            self.status.showMessage(f"{d} is already being scanned",5000); return
+        queued=not any(j["worker"] and j["root"]==os.path.abspath(d) for j in self._scheduler.jobs_for(self._db().path))
+        self.status.showMessage(f"Queued {d} — it starts when a running scan finishes" if queued else f"Scanning {d} …",5000)
+
+    def _edit_ignore_rules(self, root):
+        dlg=IgnoreRulesDialog(root["rules"],self)
+        if dlg.exec()!=QDialog.Accepted or dlg.rules.to_json()==root["rules"].to_json(): return
+        self._db().set_root_rules(root["path"],dlg.rules)
+        # rows the new rules exclude only go away on a rescan
+        if QMessageBox.question(self,"Ignore Rules",f"Rules saved. Rescan {root['path']} now to apply them?")==QMessageBox.Yes:
+            self._run_scan(root["path"])
+
+    def _remove_root(self, path):
+        db=self._db()
+        if QMessageBox.question(self,"Remove Folder",f"Remove {path} and all its files from this catalog?\n\nNothing is deleted on disk.")!=QMessageBox.Yes: return
+        db.remove_root(path); db.bump_generation(); self._refresh_all()
+        if self._active_db in self._watchers: self._stop_watcher(self._active_db); self._start_watcher(self._active_db)
+        self.status.showMessage(f"Removed {path}",5000)
+
+    def _update_scan_footer(self):
+        sch=self._scheduler; run=sch.running(); queued=len(sch.jobs)-len(run)
+        if not sch.jobs:
+            self.lbl_scans.setVisible(False); self.progress.setRange(0,100); self.progress.setVisible(False); return
+        parts=[]
+        for j in run:
+            txt=f"↻ {os.path.basename(j['root']) or j['root']}  {j['done']:,}"+(f" / ~{j['total']:,}" if j["total"] else " files")
+            if j["status"]!="scanning": txt+=f"  ({j['status']})"
+            elif j["rate"]: txt+=f"  · {j['rate']:,.0f}/s"
+            eta=sch.eta(j)
+            if eta is not None: txt+=f"  · ETA {fmt_eta(eta)}"
+            parts.append(txt)
+        if queued: parts.append(f"{queued} queued")
+        if sch.throttled(): parts.append("throttled while you work")
+        self.lbl_scans.setText("   │   ".join(parts)); self.lbl_scans.setVisible(True); self.progress.setVisible(True)
+        # totals are the catalogs' previous sizes, only a guess; a first scan has none and shows a busy bar
+        if run and all(j["total"] for j in run):
+            done=sum(j["done"] for j in run); total=sum(max(j["total"],j["done"]) for j in run)
+            self.progress.setRange(0,100); self.progress.setValue(min(99,int(done/total*100)))
+        else: self.progress.setRange(0,0)
+
+    def _on_scan_done(self, job, completed):
+        if completed:
+            self.status.showMessage(f"Scan of {job['root']} complete ✓",5000)
+            if job["db"] not in self._enrich_queue: self._enrich_queue.append(job["db"])
+        elif job["error"]:
+            # a half-written checkpoint of a failed scan is not worth resuming; a locked catalog may refuse even this
+            try: AssetDatabase(job["db"]).discard_scan(job["root"])
+            except Exception: pass
+            self.status.showMessage(f"Scan of {job['root']} failed: {job['error']}",10000)
+        else: self.status.showMessage(f"Scan of {job['root']} stopped — resume it from 📁 Scan",8000)
+        for db_id,db in self._dbs.items():
+            if str(db.path)==job["db"]:
+                db.bump_generation()
+                if db_id in self._watchers: self._stop_watcher(db_id); self._start_watcher(db_id)   # pick up the new roots
+                if db_id==self._active_db or self._federated: self._refresh_all()
+        self._next_enrich()
+
+    # ── metadata: probed after each completed scan, one catalog at a time, never alongside a scan or merge of it ──
+    def _next_enrich(self):
+        if self._enrich_worker: return
+        busy={j["db"] for j in self._scheduler.running()}|({self._merge_worker.db_path} if self._merge_worker else set())
+        path=next((p for p in self._enrich_queue if p not in busy),None)
+        if path is None: return
+        self._enrich_queue.remove(path)
+        self._enrich_worker=w=EnrichWorker(path,load_config().get("enrich_workers"))
+        w.progress.connect(self._on_enrich_progress); w.done.connect(self._on_enrich_done); w.start()
+
+    def _on_enrich_progress(self, n, total):
+        self.status.showMessage(f"Reading media metadata: {n:,} / {total:,} files  ({Path(self._enrich_worker.db_path).stem})")
+
+    def _on_enrich_done(self, n, err):
+        w=self._enrich_worker; w.wait(); self._enrich_worker=None
+        if err: self.status.showMessage(f"Reading media metadata failed: {err}",8000)
+        elif n: self.status.showMessage(f"Media metadata read for {n:,} files ✓",5000)
+        q=core.Query(self._current_query)   # a view filtered on metadata now has more to show
+        for db_id,db in self._dbs.items():
+            if str(db.path)==w.db_path:
+                db.bump_generation()
+                if (db_id==self._active_db or self._federated) and (q.media or q.media_text): self._refresh_all()
+        self._next_enrich()
+
+    def _set_federated(self, on):
+        self._federated=on; self._tab_cache.clear(); self._offset=0; self._load_files(True)
+
+    # ── live updates: watcher batches are folded into the grid and sidebar without re-querying ──
+    def _set_live(self, on):
+        self._live=on; cfg=load_config(); cfg["live"]=on; save_config(cfg)
+        if not on:
+            for db_id in list(self._watchers): self._stop_watcher(db_id)
+        else: self._start_watchers()
+
+    def _start_watchers(self):
+        # every open catalog, not only the tabs visited so far: a background tab's catalog stays current too
+        for db_id in list(self._dbs): self._start_watcher(db_id)
+
+    def _start_watcher(self, db_id):
+        if db_id in self._watchers or db_id not in self._dbs or not self._dbs[db_id].path.exists(): return
+        w=WatchWorker(db_id,self._dbs[db_id].path); w.changed.connect(self._on_watch_changes)
+        self._watchers[db_id]=w; w.start()
+
+    def _stop_watcher(self, db_id):
+        w=self._watchers.pop(db_id,None)
+        if w: w.changed.disconnect(); w.stop(); w.wait(3000)
+
+    def _on_watch_changes(self, db_id, changes):
+        if self._federated: self._on_fed_changes(db_id,changes); return
+        if db_id!=self._active_db or not self._stats: return   # other tabs see a new generation and refresh on switch
+        m=self.file_model; fresh=[]
+        for old,new in changes:
+            for f,sign in ((old,-1),(new,1)):
+                if f: self._count_file(f,sign)
+            row=m.row_of(old["id"]) if old else -1; keep=new is not None and self._matches(new)
+            if row>=0 and keep and self._fits(row,new): m.replace_at(row,new); fresh.append(new); continue
+            if row>=0: m.remove_at(row); self._offset-=1
+            if old and self._matches(old): self._total-=1
+            if keep:
+                complete=self._offset>=self._total; self._total+=1
+                pos=next((i for i in range(m.rowCount()) if self._before(new,m.file_at(i))),m.rowCount())
+                if pos<m.rowCount() or complete: m.insert_at(pos,new); self._offset+=1; fresh.append(new)
+            if old and new: thumb_cache_path(new["path"]).unlink(missing_ok=True)
+        self.sidebar.update_stats(self._stats); self.sidebar.set_current(self._current_cat); self._fill_ext_combo(self._stats)
+        self.lbl_footer.setText(f"{self._offset:,} / {self._total:,} files"); self.btn_load_more.setVisible(self._offset<self._total)
+        self._queue_thumbnails(fresh)
+        self.status.showMessage(f"Live: {len(changes):,} change{'s'*(len(changes)!=1)} applied",4000)
+
+    def _on_fed_changes(self, db_id, changes):
+        # merged rows: edits that keep their place are patched in, changes past the loaded rows only move the
+        # catalog's cursor; anything that would add, drop or reorder a loaded row runs the search again
+        fed=self._fed
+        if not fed: return
+        m=self.file_model; key=fed.key; fresh=[]; moved=False; last=m.file_at(m.rowCount()-1)
+        loaded={f["file_id"]:i for i,f in enumerate(m.snapshot()[0]) if f["catalog"]==db_id}   # rows only change in place here
+        for old,new in changes:
+            row=loaded.get(old["id"],-1) if old else -1
+            keep=new is not None and self._matches(new)
+            if row>=0 and keep:
+                f={**new,"file_id":new["id"],"id":m.file_at(row)["id"],"catalog":db_id}
+                prev,nxt=m.file_at(row-1),m.file_at(row+1)
+                if not (prev and key(f)<key(prev)) and not (nxt and key(nxt)<key(f)):
+                    m.replace_at(row,f); fresh.append(f); thumb_cache_path(f["path"]).unlink(missing_ok=True); continue
+            if row>=0 or (keep and (self._offset>=self._total or not last or not key(last)<key(new))): moved=True; break
+            d=(1 if keep else 0)-(1 if old and self._matches(old) else 0); self._total+=d; fed.total+=d
+        if moved: self._search_timer.start(SEARCH_DEBOUNCE_MS); return
+        fed.reload(db_id)
+        self.lbl_footer.setText(f"{self._offset:,} / {self._total:,} files in {fed.catalogs} catalogs")
+        self.btn_load_more.setVisible(self._offset<self._total); self._queue_thumbnails(fresh)
+        self.status.showMessage(f"Live: {len(changes):,} change{'s'*(len(changes)!=1)} applied",4000)
+
+    def _matches(self, f):
+        if self._current_cat!="All" and f["category"]!=self._current_cat: return False
+        if self._current_ext and f["extension"]!=self._current_ext: return False
+        if not self._current_query: return True
+        if not self._parsed or self._parsed[0]!=self._current_query:
+            self._parsed=(self._current_query,core.Query(self._current_query,self._db().get_categories()))
+        return self._parsed[1].matches(f)
+
+    def _before(self, a, b):
+        # mirrors the ORDER BY in AssetDatabase.search
+        if self._sort=="size": return (a["size"] or 0)>(b["size"] or 0)
+        if self._sort=="date": return (a["modified_date"] or "")>(b["modified_date"] or "")
+        return (a["name"].translate(core.ASCII_LOWER),a["id"])<(b["name"].translate(core.ASCII_LOWER),b["id"])   # NOCASE folds ASCII only
+
+    def _fits(self, row, f):
+        prev,nxt=self.file_model.file_at(row-1),self.file_model.file_at(row+1)
+        return not (prev and self._before(f,prev)) and not (nxt and self._before(nxt,f))
+
+    def _count_file(self, f, sign):
+        st=self._stats; st["total_files"]+=sign; st["total_size"]+=sign*(f["size"] or 0)
+        for key,name,extra in (("by_category","category",True),("by_extension","extension",False)):
+            e=next((e for e in st[key] if e[name]==f[name]),None)
+            if e is None: e={name:f[name],"count":0,**({"size":0} if extra else {})}; st[key].append(e)
+            e["count"]+=sign
+            if extra: e["size"]+=sign*(f["size"] or 0)
+            if e["count"]<=0: st[key].remove(e)
+        st["by_extension"].sort(key=lambda e:e["count"],reverse=True)
 
     def _do_search(self):
         self._current_query=self.search_input.text().strip(); self._offset=0; self._load_files(True)
@@ -1199,14 +2447,19 @@ class MainWindow(QMainWindow):
     def _load_files(self, reset=False):
         db=self._db()
         if not db: self.file_model.set_files([]); self.lbl_footer.setText("No database loaded"); return
-        files,total=db.search(query=self._current_query,
-            category=self._current_cat if self._current_cat!="All" else None,
-            extension=self._current_ext or None,limit=PAGE_SIZE,offset=self._offset,sort=self._sort)
+        args=dict(query=self._current_query,category=self._current_cat if self._current_cat!="All" else None,
+                  extension=self._current_ext or None,sort=self._sort)
+        if not self._federated: self._fed=None; files,total=db.search(limit=PAGE_SIZE,offset=self._offset,**args)
+        else:
+            if reset or not self._fed:
+                # catalogs whose file has gone missing are left out rather than recreated empty
+                self._fed=FederatedSearch([(i,d) for i,d in self._dbs.items() if d.path.exists()],**args)
+            files=self._fed.next_page(PAGE_SIZE); total=self._fed.total
         self._total=total
         if reset: self.file_model.set_files(files); self.preview.clear_preview()
         else: self.file_model.append_files(files)
         self._offset+=len(files)
-        self.lbl_footer.setText(f"{self._offset:,} / {total:,} files")
+        self.lbl_footer.setText(f"{self._offset:,} / {total:,} files"+(f" in {self._fed.catalogs} catalogs" if self._fed else ""))
         self.btn_load_more.setVisible(self._offset<total)
         self._queue_thumbnails(files)
 
@@ -1215,28 +2468,47 @@ class MainWindow(QMainWindow):
     def _refresh_all(self):
         db=self._db()
         if not db: return
-        st=db.stats(); self.sidebar.update_stats(st)
-        self.ext_combo.blockSignals(True); self.ext_combo.clear(); self.ext_combo.addItem("All Extensions")
-        for e in st.get("by_extension",[]): self.ext_combo.addItem(f"{e['extension']}  ({e['count']})")
-        self.ext_combo.blockSignals(False)
+        st=db.stats(); self._stats=st; self.sidebar.update_stats(st); self.sidebar.set_current(self._current_cat)
+        self._fill_ext_combo(st)
         self._offset=0; self._load_files(True)
-        if self._view_mode=="type": self.organizer.populate_by_type(db)
+        if self._view_mode=="type": self.organizer.populate_by_type(db,st["by_category"])
         elif self._view_mode=="folder": self.organizer.populate_by_folder(db)
+        if not self._scheduler.jobs_for(db.path) and db.pending_scans():
+            self.status.showMessage("An interrupted scan of this catalog can be resumed from 📁 Scan",8000)
+
+    def _fill_ext_combo(self, st):
+        self.ext_combo.blockSignals(True); self.ext_combo.clear(); self.ext_combo.addItem("All Extensions")
+        for e in st.get("by_extension",[]):
+            self.ext_combo.addItem(f"{e['extension']}  ({e['count']})")
+            if e["extension"]==self._current_ext: self.ext_combo.setCurrentIndex(self.ext_combo.count()-1)
+        self.ext_combo.blockSignals(False)
 
     def _start_thumb_worker(self):
         self._thumb_worker=ThumbWorker(); self._thumb_worker.ready.connect(self._on_thumb_ready)
         self._thumb_worker.start()
+        self._wave_worker=WaveformWorker(); self._wave_worker.ready.connect(self._on_thumb_ready)
+        self.preview.set_waveform_worker(self._wave_worker); self._wave_worker.start()
 
     def _queue_thumbnails(self, files):
         if not self._thumb_worker: return
-        items=[(f["id"],f["path"],f.get("extension","").lower()) for f in files if f.get("extension","").lower() in IMAGE_EXTS]
-        if items: self._thumb_worker.enqueue(items)
+        items=[(f["id"],f["path"],f.get("extension","").lower()) for f in files]; db=self._db()
+        imgs=[(*it,self._dbs.get(f["catalog"]) if "catalog" in f else db,f.get("file_id",f["id"]))
+              for it,f in zip(items,files) if it[2] in IMAGE_EXTS]
+        auds=[it for it in items if it[2] in AUDIO_EXTS]
+        if imgs: self._thumb_worker.enqueue(imgs)
+        if auds: self._wave_worker.enqueue(auds)
 
     def _on_thumb_ready(self, fid, qimg): self.file_model.set_thumbnail(fid,QPixmap.fromImage(qimg))
 
     def _on_file_clicked(self, index):
-        fd=index.data(ROLE_FILEDATA)
-        if fd: self.preview.show_file(fd)
+        fd=index.data(ROLE_FILEDATA) if index.isValid() else None
+        if not fd: return
+        self._show_preview(fd); row=index.row(); near=[]
+        for d in range(1,PREFETCH_NEIGHBORS+1):
+            for r in (row+d,row-d):
+                f=self.file_model.file_at(r)
+                if f and f.get("extension","").lower() in IMAGE_EXTS-{".gif"}: near.append(f["path"])
+        self.preview.prefetch(near)
 
     def _on_context_menu(self, pos):
         idx=self.grid_view.indexAt(pos); fd=idx.data(ROLE_FILEDATA) if idx.isValid() else None
@@ -1244,26 +2516,61 @@ class MainWindow(QMainWindow):
         menu=QMenu(self); menu.setStyleSheet(build_ctx_qss(self._tm.t))
         a_open=menu.addAction("📂  Open File Location")
         a_copy=menu.addAction("📋  Copy Path"); a_name=menu.addAction("📝  Copy Name")
+        a_sim=None
+        if self._similar_worker: menu.addSeparator(); a_sim=menu.addAction("■  Stop indexing images")
+        elif fd.get("extension","").lower() in IMAGE_EXTS: menu.addSeparator(); a_sim=menu.addAction("🔍  Find similar images")
         action=menu.exec(self.grid_view.viewport().mapToGlobal(pos))
-        if action==a_open: open_file_location(fd["path"])
+        if action is None: return
+        if action==a_sim: self._find_similar(fd)
+        elif action==a_open: open_file_location(fd["path"])
         elif action==a_copy: QApplication.clipboard().setText(fd["path"])
         elif action==a_name: QApplication.clipboard().setText(fd["name"])
 
-    def _export_csv(self):
+    def _find_similar(self, fd):
+        # the first run hashes every image in the catalog once (progress in the status bar); later runs only the new ones
+        if self._similar_worker: self._similar_worker.stop(); return
+        db=self._dbs.get(fd.get("catalog")) or self._db()
+        if not db: return
+        self._similar_worker=w=SimilarWorker(db,fd.get("file_id",fd["id"]),fd["path"],fd.get("extension","").lower())
+        w.progress.connect(self._on_similar_progress); w.done.connect(self._on_similar_done); w.start()
+        self._similar_name=fd["name"]; self.status.showMessage(f"Finding images similar to {fd['name']} …")
+
+    def _on_similar_progress(self, n, total):
+        self.status.showMessage(f"Indexing images for similarity: {n:,} / {total:,}  (right-click ▸ Stop to search what is indexed so far)")
+
+    def _on_similar_done(self, hits, left):
+        self._similar_worker.wait(); self._similar_worker=None
+        if len(hits)<2:
+            self.status.showMessage(f"No images similar to {self._similar_name}"+(f" ({left:,} not indexed yet)" if left else ""),8000); return
+        files=[f for _,f in hits]; self._fed=None; self._offset=self._total=len(files)
+        self.file_model.set_files(files); self.preview.clear_preview(); self.btn_load_more.setVisible(False)
+        self.lbl_footer.setText(f"{len(files)-1:,} images similar to {self._similar_name}"+(f" · {left:,} not indexed yet" if left else ""))
+        self.status.showMessage("Closest first; search or pick a category to go back",8000); self._queue_thumbnails(files)
+
+    def _export(self):
+        # streams on a worker from the catalog's own cursor; the button turns into Cancel while it runs
+        if self._export_worker: self._export_worker.stop(); return
         db=self._db()
         if not db: return
-        path,_=QFileDialog.getSaveFileName(self,"Export CSV",
-            str(Path.home()/f"asset_export_{datetime.now():%Y%m%d_%H%M}.csv"),"CSV Files (*.csv)")
+        filters=";;".join(f"{name} (*{ext})" for ext,name in core.EXPORT_FORMATS.items())
+        path,flt=QFileDialog.getSaveFileName(self,"Export",str(Path.home()/f"asset_export_{datetime.now():%Y%m%d_%H%M}.csv"),filters)
         if not path: return
-        files,_=db.search(query=self._current_query,
-            category=self._current_cat if self._current_cat!="All" else None,
-            extension=self._current_ext or None,limit=999_999,offset=0,sort=self._sort)
-        try:
-            with open(path,"w",newline="",encoding="utf-8") as f:
-                w=csv.writer(f); w.writerow(["Name","Path","Extension","Category","Size","Modified","Created"])
-                for fd in files: w.writerow([fd["name"],fd["path"],fd["extension"],fd["category"],fd["size"],fd.get("modified_date",""),fd.get("created_date","")])
-            self.status.showMessage(f"Exported {len(files)} files → {path}",5000)
-        except Exception as e: QMessageBox.warning(self,"Export Error",str(e))
+        if os.path.splitext(path)[1].lower() not in core.EXPORT_FORMATS: path+=flt[flt.index("*")+1:-1]
+        if self._federated: self.status.showMessage(f"Exporting from {self._active_db} only",5000)
+        search=dict(query=self._current_query,category=self._current_cat if self._current_cat!="All" else None,
+                    extension=self._current_ext or None,sort=self._sort)
+        self._export_worker=w=ExportWorker(db.path,path,search)
+        w.progress.connect(self._on_export_progress); w.done.connect(self._on_export_done); w.start()
+        self.btn_export.setText("■ Cancel export")
+
+    def _on_export_progress(self, n, total):
+        self.status.showMessage(f"Exporting {n:,} / {total:,} files → {self._export_worker.out_path}")
+
+    def _on_export_done(self, n, err):
+        path=self._export_worker.out_path; self._export_worker.wait(); self._export_worker=None; self.btn_export.setText("💾 Export")
+        if err: QMessageBox.warning(self,"Export Error",err)
+        elif n is None: self.status.showMessage("Export cancelled",5000)
+        else: self.status.showMessage(f"Exported {n:,} files → {path}",8000)
 
     def _escape_pressed(self):
         if self.search_input.hasFocus(): self.search_input.clear(); self.grid_view.setFocus()
@@ -1284,21 +2591,36 @@ class MainWindow(QMainWindow):
             idx=names.index(theme)
             self.theme_combo.blockSignals(True); self.theme_combo.setCurrentIndex(idx); self.theme_combo.blockSignals(False)
             self._tm.apply(theme); self.file_delegate.set_theme(self._tm.t)
+        # no stat or open per catalog here (network drives); each is checked when its tab is first shown
         dbs=cfg.get("databases",{})
         for did,dpath in dbs.items():
-            if Path(dpath).exists():
-                self._dbs[did]=AssetDatabase(Path(dpath))
-                idx=self.tab_bar.addTab(did); self.tab_bar.setTabData(idx,did)
+            self._dbs[did]=AssetDatabase(Path(dpath)); self._unverified.add(did); self._add_tab(did)
         active=cfg.get("active","")
         if active:
             for i in range(self.tab_bar.count()):
-                if self.tab_bar.tabData(i)==active: self.tab_bar.setCurrentIndex(i); break
+                if self.tab_bar.tabData(i)==active:
+                    self.tab_bar.blockSignals(True); self.tab_bar.setCurrentIndex(i); self.tab_bar.blockSignals(False); break
+
+    def _show_diagnostics(self):
+        if not self._diagnostics: self._diagnostics=DiagnosticsDialog(self)
+        self._diagnostics.show(); self._diagnostics.raise_(); self._diagnostics.activateWindow()
 
     def closeEvent(self, event):
         self._save_state()
         if self._thumb_worker: self._thumb_worker.stop(); self._thumb_worker.quit(); self._thumb_worker.wait(2000)
-        if self._scan_worker and self._scan_worker.isRunning(): self._scan_worker.stop(); self._scan_worker.quit(); self._scan_worker.wait(3000)
-        self.preview.clear_preview(); super().closeEvent(event)
+        if self._wave_worker: self._wave_worker.stop(); self._wave_worker.wait(2000)
+        self._scheduler.stop_all()
+        if self._export_worker: self._export_worker.stop(); self._export_worker.wait(3000)
+        if self._similar_worker: self._similar_worker.stop(); self._similar_worker.wait(3000)
+        self._enrich_queue.clear()
+        if self._enrich_worker: self._enrich_worker.stop(); self._enrich_worker.wait(5000)
+        if self._merge_worker: self._merge_worker.stop(); self._merge_worker.wait(5000)
+        for db_id in list(self._watchers): self._stop_watcher(db_id)
+        self.preview.shutdown()
+        if self._trace_path:
+            try: core.perf.write_trace(self._trace_path)
+            except OSError as e: print(f"  ✗ trace not written: {e}", file=sys.stderr)
+        super().closeEvent(event)
 
 
 # ═══════════════════════════════════════════════════════════════
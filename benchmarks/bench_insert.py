@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+EAM — catalog insert benchmark
+
+Feeds the same synthetic rows through the old scanner write path (INSERT OR
+REPLACE into an indexed table, a commit every 800 rows) and through the
+eam_core paths: a bulk load into an index-free shadow table with the indexes
+built afterwards, and in-place upserts over an existing catalog. Only SQLite
+work is timed; the filesystem walk is not part of it.
+
+Usage:
+    python benchmarks/bench_insert.py
+    python benchmarks/bench_insert.py --rows 1000000 --changed 0.05
+"""
+
+import sys, time, random, sqlite3, tempfile, argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import eam_core as core
+
+LEGACY_SQL = "INSERT OR REPLACE INTO files (name,path,extension,category,size,modified_date,created_date,file_hash) VALUES (?,?,?,?,?,?,?,?)"
+LEGACY_SCHEMA = """CREATE TABLE files (id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, path TEXT UNIQUE,
+    extension TEXT, category TEXT, size INTEGER, modified_date TEXT, created_date TEXT, file_hash TEXT)"""
+
+
+def make_rows(n, seed=1):
+    rnd = random.Random(seed)
+    exts = [(".png", "Images - PNG"), (".jpg", "Images - JPG"), (".mp4", "Videos - MP4"), (".wav", "Audio"),
+            (".psd", "Photoshop"), (".ttf", "Fonts"), (".txt", "Documents"), (".zip", "Archives")]
+    rows = []
+    for i in range(n):
+        e, cat = exts[i % len(exts)]; name = f"{rnd.getrandbits(40):010x}_{i}{e}"
+        rows.append((name, f"/lib/{i % 211}/{(i * 7919) % 4099}/{name}", e, cat, rnd.randint(1, 1 << 30),
+                     "2026-01-01T00:00:00", "2026-01-01T00:00:00", None, 1, 2049, i + 1))
+    return rows
+
+
+def legacy(path, rows):
+    conn = core.connect(path); conn.execute(LEGACY_SCHEMA)
+    conn.execute("CREATE INDEX idx_files_name ON files(name COLLATE NOCASE)")   # the one index the old scanner had
+    conn.commit()
+    for i in range(0, len(rows), 800):
+        conn.executemany(LEGACY_SQL, [r[:8] for r in rows[i:i + 800]]); conn.commit()
+    conn.close()
+
+
+def bulk(path, rows):
+    conn = core.connect(path); core.init_schema(conn); core.bulk_load(conn, iter(rows)); conn.close()
+
+
+def upsert(path, rows):
+    conn = core.connect(path); core.upsert_rows(conn, iter(rows)); conn.close()
+
+
+def timed(label, fn, *args):
+    t0 = time.perf_counter(); fn(*args); dt = time.perf_counter() - t0
+    n = len(args[-1])
+    print(f"  {label:<34} {dt:8.2f} s   {n / dt:>12,.0f} rows/s")
+    return dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--changed", type=float, default=0.05, help="fraction of rows modified for the update run")
+    args = ap.parse_args()
+
+    print(f"  generating {args.rows:,} rows …")
+    rows = make_rows(args.rows)
+    rnd = random.Random(2); changed = list(rows)
+    for i in rnd.sample(range(len(rows)), int(len(rows) * args.changed)):
+        r = changed[i]; changed[i] = r[:4] + (r[4] + 1, "2026-02-01T00:00:00") + r[6:]
+
+    with tempfile.TemporaryDirectory(prefix="eam_bench_") as tmp:
+        old = timed("INSERT OR REPLACE, 800/commit", legacy, Path(tmp) / "legacy.db", rows)
+        new = timed("bulk load + deferred indexes", bulk, Path(tmp) / "bulk.db", rows)
+        timed("upsert, nothing changed", upsert, Path(tmp) / "bulk.db", rows)
+        timed(f"upsert, {args.changed:.0%} changed", upsert, Path(tmp) / "bulk.db", changed)
+        conn = sqlite3.connect(str(Path(tmp) / "bulk.db"))
+        assert conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] == len(rows)
+        conn.close()
+    print(f"  ✓ bulk load is {old / new:.1f}x the old full-scan write path")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+EAM — startup benchmark
+
+Launches the desktop app with --startup-probe against a throwaway home
+directory holding N restored catalog tabs, and fails (exit 1) when the median
+time-to-first-window is over the target.
+
+Usage:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --catalogs 12 --rows 200000 --runs 7 --target-ms 1000
+
+Set QT_QPA_PLATFORM=offscreen to run it on a headless machine.
+"""
+
+import os, sys, json, time, tempfile, argparse, statistics, subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+APP = ROOT / "asset_catalog_desktop.py"
+
+
+def make_home(home, catalogs, rows):
+    # realistic catalogs written through the core's public loader, then opened the way the app opens them
+    sys.path.insert(0, str(ROOT)); sys.path.insert(0, str(ROOT / "benchmarks"))
+    from asset_catalog_desktop import AssetDatabase
+    from gen_catalog import build_catalog
+    db_dir = home / ".asset_catalog" / "databases"
+    db_dir.mkdir(parents=True)
+    dbs = {}
+    for n in range(catalogs):
+        path = db_dir / f"catalog_{n:02d}.db"
+        build_catalog(str(path), rows, seed=n + 1, root=f"/lib/{n}")
+        found = AssetDatabase(path).search("", limit=1)[1]
+        if found != rows: print(f"  ✗ {path.name} holds {found:,} rows, expected {rows:,}"); sys.exit(2)
+        dbs[path.stem] = str(path)
+    cfg = {"databases": dbs, "active": next(iter(dbs), ""), "theme": "Dark"}
+    (home / ".asset_catalog" / "config.json").write_text(json.dumps(cfg), "utf-8")
+
+
+def probe(home):
+    env = dict(os.environ, HOME=str(home), USERPROFILE=str(home))
+    t0 = time.perf_counter()
+    out = subprocess.run([sys.executable, str(APP), "--startup-probe"], env=env,
+                         capture_output=True, text=True, timeout=120).stdout
+    wall = (time.perf_counter() - t0) * 1000
+    marks = dict(line.split("=", 1) for line in out.splitlines() if "_ms=" in line)
+    return {"wall_ms": wall, **{k: float(v) for k, v in marks.items()}}
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--catalogs", type=int, default=12)
+    ap.add_argument("--rows", type=int, default=50_000, help="rows per catalog")
+    ap.add_argument("--runs", type=int, default=5)
+    ap.add_argument("--target-ms", type=float, default=1000.0, help="median first_window_ms must stay under this")
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="eam_bench_") as tmp:
+        home = Path(tmp)
+        print(f"  building {args.catalogs} catalogs x {args.rows:,} rows …")
+        make_home(home, args.catalogs, args.rows)
+        runs = [probe(home) for _ in range(args.runs)]
+
+    if any("first_window_ms" not in r for r in runs):
+        print("  ✗ the app did not report first_window_ms (did it start?)"); sys.exit(2)
+    for key in ("first_window_ms", "first_catalog_ms", "wall_ms"):
+        vals = [r[key] for r in runs if key in r]
+        print(f"  {key:<18} median {statistics.median(vals):8.1f}   min {min(vals):8.1f}   max {max(vals):8.1f}")
+    med = statistics.median(r["first_window_ms"] for r in runs)
+    ok = med <= args.target_ms
+    print(f"  {'✓' if ok else '✗'} time-to-first-window {med:.0f} ms (target {args.target_ms:.0f} ms)")
+    sys.exit(0 if ok else 1)
+
+
+if __name__ == "__main__":
+    main()
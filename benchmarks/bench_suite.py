@@ -0,0 +1,229 @@
+#!/usr/bin/env python3
+"""
+EAM — end-to-end benchmark suite
+
+Times what users wait on against a synthetic library from gen_catalog.py, and saves the run as JSON:
+
+  queries    AssetDatabase.search (first and deep pages, each sort, names, field terms, metadata),
+             stats, category_totals, category_page, get_folder_tree, find_duplicates
+  scan       core.scan of a generated tree on disk: full scan, update with nothing changed, update after
+             1% of the files changed (reported as files/s too)
+  thumbs     make_thumbnail on generated 1080p images, cold (decode + cache write) and warm (cache hit)
+  organizer  OrganizerTree.populate_by_type (plus opening the largest category) and populate_by_folder
+
+Each timing is run --runs times: the first run is kept as "cold", the median of the rest as the result.
+With --compare, every timing that got more than --threshold slower than an earlier run is listed and the
+exit code is 1.
+
+Usage:
+    python benchmarks/bench_suite.py                                   # 1m-row catalog, everything
+    python benchmarks/bench_suite.py --rows 10m --only queries --out 10m.json
+    python benchmarks/bench_suite.py --rows 10k --compare before.json --threshold 0.2
+    python benchmarks/bench_suite.py --catalog ~/.asset_catalog/databases/studio.db --only queries
+
+Generated catalogs are kept in the temp directory per size and seed and reused (--fresh rebuilds them);
+10m rows take a few minutes to generate. Set QT_QPA_PLATFORM=offscreen to run it on a headless machine.
+"""
+
+import os, sys, json, time, shutil, random, platform, tempfile, argparse, statistics, subprocess
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT)); sys.path.insert(0, str(ROOT / "benchmarks"))
+import eam_core as core
+import gen_catalog
+
+GROUPS = ("queries", "scan", "thumbs", "organizer")
+NOISE_MS = 1.0                            # differences below this are never reported as regressions
+
+
+def measure(fn, runs):
+    times = []; out = None
+    for _ in range(max(1, runs)):
+        t0 = time.perf_counter(); out = fn(); times.append((time.perf_counter() - t0) * 1000)
+    warm = times[1:] or times
+    return {"median_ms": round(statistics.median(warm), 3), "min_ms": round(min(warm), 3),
+            "max_ms": round(max(warm), 3), "cold_ms": round(times[0], 3), "runs": len(times)}, out
+
+
+def report(results, name, r, extra=""):
+    results[name] = r
+    print(f"  {name:<46} {r['median_ms']:>10.1f} ms   (cold {r['cold_ms']:.1f}, min {r['min_ms']:.1f}){extra}", flush=True)
+
+
+def bench_queries(m, db_path, results, runs):
+    db = m.AssetDatabase(Path(db_path)); roots = db.roots(); root = roots[0]["path"] if roots else ""
+    deep = 50 * m.PAGE_SIZE
+    cases = [("search · first page, by name", lambda: db.search("")),
+             ("search · first page, by size", lambda: db.search("", sort="size")),
+             ("search · first page, by date", lambda: db.search("", sort="date")),
+             (f"search · page {deep // m.PAGE_SIZE + 1}, by name", lambda: db.search("", offset=deep)),
+             ("search · name word", lambda: db.search("whoosh")),
+             ("search · two name words", lambda: db.search("logo final")),
+             ("search · rare name word", lambda: db.search("budget")),
+             ("search · ext:mov size:>1GB", lambda: db.search("ext:mov size:>1GB")),
+             ("search · cat:video modified:>90d", lambda: db.search("cat:video modified:>90d", sort="date")),
+             ("search · path: one client", lambda: db.search(f"path:{root}/Projects/Acme")),
+             ("search · res:>=4k duration:>1m", lambda: db.search("res:>=4k duration:>1m")),
+             ("search · font:roboto", lambda: db.search("font:roboto")),
+             ("search · category filter, no count", lambda: db.search("", category="Audio", count=False)),
+             ("stats", db.stats),
+             ("category_totals", db.category_totals),
+             ("category_page · Images - PNG", lambda: db.category_page("Images - PNG")),
+             ("get_folder_tree", db.get_folder_tree),
+             ("find_duplicates", db.find_duplicates)]
+    for name, fn in cases:
+        r, _ = measure(fn, runs); report(results, f"queries/{name}", r)
+
+
+def bench_scan(workdir, results, runs, files, seed):
+    tree = workdir / "tree"; db_path = workdir / "scan.db"
+    if not tree.exists():
+        t0 = time.perf_counter(); gen_catalog.build_tree(str(tree), files, seed)
+        print(f"  · wrote {files:,} files to {tree} in {time.perf_counter() - t0:.1f}s", flush=True)
+    all_files = [os.path.join(d, f) for d, _, fs in os.walk(tree) for f in fs]; n = len(all_files)
+
+    def full():
+        for p in (db_path, Path(f"{db_path}-wal"), Path(f"{db_path}-shm")):
+            if p.exists(): p.unlink()
+        return core.scan(db_path, tree)
+
+    def rate(r): return f"   {n / (r['median_ms'] / 1000):,.0f} files/s"
+    r, _ = measure(full, runs); report(results, "scan/full", dict(r, files=n), rate(r))
+    r, _ = measure(lambda: core.scan(db_path, tree, update=True), runs)
+    report(results, "scan/update, nothing changed", dict(r, files=n), rate(r))
+    rnd = random.Random(seed)
+
+    def changed():
+        # a fresh 1% each run: grown by a byte and touched, so size and mtime both differ from the catalog
+        now = time.time()
+        for p in rnd.sample(all_files, max(1, n // 100)):
+            with open(p, "ab") as f: f.write(b"\0")
+            os.utime(p, (now, now))
+        return core.scan(db_path, tree, update=True)
+    r, _ = measure(changed, runs); report(results, "scan/update, 1% changed", dict(r, files=n), rate(r))
+
+
+def bench_thumbs(m, workdir, results, runs, count):
+    from PIL import Image, ImageDraw
+    src = workdir / f"images_{count}"
+    if not src.exists():
+        src.mkdir(); rnd = random.Random(7)
+        for i in range(count):
+            im = Image.new("RGB", (1920, 1080), tuple(rnd.randrange(256) for _ in range(3))); d = ImageDraw.Draw(im)
+            for _ in range(40):
+                x, y = rnd.randrange(1920), rnd.randrange(1080)
+                d.ellipse((x, y, x + rnd.randrange(40, 600), y + rnd.randrange(40, 400)), fill=tuple(rnd.randrange(256) for _ in range(3)))
+            im.save(src / f"still_{i:04d}{'.png' if i % 4 == 0 else '.jpg'}", quality=90)
+    images = sorted(str(p) for p in src.iterdir())
+
+    def cold():
+        shutil.rmtree(m.THUMB_DIR, ignore_errors=True); m.THUMB_DIR.mkdir(parents=True, exist_ok=True)
+        for p in images: m.make_thumbnail(p, os.path.splitext(p)[1])
+
+    def warm():
+        for p in images: m.make_thumbnail(p, os.path.splitext(p)[1])
+    per = lambda r: dict(r, images=len(images), per_image_ms=round(r["median_ms"] / len(images), 3))
+    r, _ = measure(cold, runs); r = per(r); report(results, "thumbs/cold (decode + cache write)", r, f"   {r['per_image_ms']:.2f} ms/image")
+    r, _ = measure(warm, runs); r = per(r); report(results, "thumbs/warm (cache hit)", r, f"   {r['per_image_ms']:.2f} ms/image")
+
+
+def bench_organizer(m, app, db_path, results, runs):
+    db = m.AssetDatabase(Path(db_path)); org = m.OrganizerTree()
+
+    def by_type():
+        org.populate_by_type(db); model = org.type_model
+        # open the largest category the way expanding it does: the first page of its files
+        big = max(range(model.rowCount()), key=lambda i: model._cats[i]["count"], default=None)
+        if big is not None:
+            idx = model.index(big, 0)
+            if model.canFetchMore(idx): model.fetchMore(idx)
+        app.processEvents()
+
+    def by_folder():
+        org.populate_by_folder(db); app.processEvents()
+    r, _ = measure(by_type, runs); report(results, "organizer/populate_by_type + open largest", r)
+    r, _ = measure(by_folder, runs); report(results, "organizer/populate_by_folder", r)
+
+
+def git_commit():
+    try: return subprocess.run(["git", "-C", str(ROOT), "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError): return None
+
+
+def compare(results, old_path, threshold):
+    old = json.loads(Path(old_path).read_text()).get("results", {})
+    common = [k for k in results if k in old]; slower = []
+    print(f"\n  vs {old_path}:")
+    for k in common:
+        a, b = old[k]["median_ms"], results[k]["median_ms"]; ratio = b / a if a else 1.0
+        bad = ratio > 1 + threshold and b - a > NOISE_MS
+        if bad: slower.append(k)
+        print(f"  {'✗' if bad else '✓'} {k:<46} {a:>10.1f} → {b:>10.1f} ms   {(ratio - 1) * 100:+6.1f}%")
+    if not common: print("  · no timings in common")
+    return slower
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", default="1m", help="synthetic catalog size, e.g. 10k, 1m, 10m")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--catalog", help="benchmark queries / organizer on this catalog instead of a generated one")
+    ap.add_argument("--fresh", action="store_true", help="regenerate the synthetic catalog and tree")
+    ap.add_argument("--only", action="append", choices=GROUPS, help="run only these groups (repeatable)")
+    ap.add_argument("--runs", type=int, default=5, help="runs per timing; the first is reported as cold")
+    ap.add_argument("--tree-files", default="20k", help="files in the on-disk tree the scan group walks")
+    ap.add_argument("--thumbs", type=int, default=60, help="images the thumbs group generates")
+    ap.add_argument("--out", help="JSON file to write (default: bench-<rows>-<date>.json here)")
+    ap.add_argument("--compare", metavar="OLD_JSON", help="earlier results to compare against")
+    ap.add_argument("--threshold", type=float, default=0.15, help="slowdown that counts as a regression (0.15 = 15%%)")
+    args = ap.parse_args()
+    groups = args.only or list(GROUPS); rows = gen_catalog.parse_count(args.rows)
+
+    work = Path(tempfile.gettempdir()) / "eam_bench"; work.mkdir(exist_ok=True)
+    # the app derives its data and thumbnail folders from the home directory at import: keep them out of the real one
+    home = Path(tempfile.mkdtemp(prefix="home-", dir=work))
+    os.environ["HOME"] = os.environ["USERPROFILE"] = str(home)
+    import asset_catalog_desktop as m
+    from PySide6.QtWidgets import QApplication
+    app = QApplication.instance() or QApplication(sys.argv[:1])
+
+    db_path = Path(args.catalog).expanduser() if args.catalog else work / f"synthetic_{rows}_{args.seed}.db"
+    if not args.catalog and (args.fresh or not db_path.exists()) and {"queries", "organizer"} & set(groups):
+        t0 = time.perf_counter(); gen_catalog.build_catalog(str(db_path), rows, args.seed)
+        print(f"  · generated {rows:,} rows → {db_path} in {time.perf_counter() - t0:.1f}s", flush=True)
+    tree_files = gen_catalog.parse_count(args.tree_files)
+    scan_dir = work / f"tree_{tree_files}_{args.seed}"
+    if args.fresh: shutil.rmtree(scan_dir, ignore_errors=True)
+    scan_dir.mkdir(exist_ok=True)
+
+    meta = {"date": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": git_commit(), "python": platform.python_version(),
+            "sqlite": core.sqlite3.sqlite_version, "platform": platform.platform(), "cpus": os.cpu_count(),
+            "catalog": str(db_path), "rows": rows if not args.catalog else None, "seed": args.seed,
+            "tree_files": tree_files, "runs": args.runs, "groups": groups}
+    if args.catalog and db_path.exists():
+        meta["rows"] = m.AssetDatabase(db_path).search("", limit=1)[1]
+    print(f"  EAM benchmarks · {meta['rows']:,} rows · {', '.join(groups)} · {args.runs} runs · commit {meta['commit'] or '?'}", flush=True)
+
+    results = {}; t0 = time.perf_counter()
+    try:
+        if "queries" in groups: bench_queries(m, db_path, results, args.runs)
+        if "scan" in groups: bench_scan(scan_dir, results, args.runs, tree_files, args.seed)
+        if "thumbs" in groups: bench_thumbs(m, work, results, args.runs, args.thumbs)
+        if "organizer" in groups: bench_organizer(m, app, db_path, results, args.runs)
+    finally:
+        shutil.rmtree(home, ignore_errors=True)
+    meta["seconds"] = round(time.perf_counter() - t0, 1)
+
+    out = Path(args.out or f"bench-{args.rows if not args.catalog else db_path.stem}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    out.write_text(json.dumps({"meta": meta, "results": results}, indent=2))
+    print(f"  ✓ {len(results)} timings in {meta['seconds']}s → {out}")
+    if args.compare:
+        slower = compare(results, args.compare, args.threshold)
+        if slower:
+            print(f"  ✗ {len(slower)} slower than {args.threshold:.0%} over {args.compare}"); sys.exit(1)
+        print("  ✓ no regressions")
+
+
+if __name__ == "__main__":
+    main()
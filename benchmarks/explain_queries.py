@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""
+EAM — search plan check
+
+Builds a synthetic catalog, compiles a set of everyday search-box queries
+with eam_core.Query and asks SQLite (EXPLAIN QUERY PLAN) how it would run
+each one under every sort order, exactly as AssetDatabase.search issues them.
+Any plan that walks the whole table or a whole index is reported and the
+script exits 1. Free text on its own ("logo") has no index to use and is
+listed separately as expected.
+
+Usage:
+    python benchmarks/explain_queries.py
+    python benchmarks/explain_queries.py --rows 500000
+"""
+
+import sys, time, tempfile, argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import eam_core as core
+from bench_insert import make_rows
+
+QUERIES = [
+    "ext:mov", "ext:mov,mp4", "cat:video", "cat:images", "size:>512MB", "size:10MB..20MB",
+    "modified:>=2026-01-01", "modified:2025-06", "modified:>30d", "path:/lib/3", "ext:mov size:>512MB",
+    "ext:mp4 modified:>2025-12-31 path:/lib/7", "cat:audio size:<1MB", "logo ext:png", "logo path:/lib/12",
+    "logo size:>100MB", "res:>=3840x2160", "res:1080p ext:mp4", "duration:>10m", "fps:>=50 cat:video",
+    "codec:prores", "font:roboto", "machine:ws-03", "machine:ws-03 ext:mov",
+]
+FREE_TEXT = ["logo", "logo final", "path:lib"]
+
+
+def plan(conn, text, sort, cats):
+    where, params = core.Query(text, cats).sql()
+    w = " AND ".join(where) or "1=1"; order = core.SORT_ORDER[sort]
+    sql = [f"SELECT id,name,path,extension,category,size,modified_date,created_date FROM files WHERE {w} "
+           f"ORDER BY {order} LIMIT 120 OFFSET 0", f"SELECT COUNT(*) FROM files WHERE {w}"]
+    steps = [r[3] for s in sql for r in conn.execute("EXPLAIN QUERY PLAN " + s, params)]
+    t0 = time.perf_counter(); conn.execute(sql[0], params).fetchall(); dt = time.perf_counter() - t0
+    return steps, dt
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("--rows", type=int, default=200_000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="eam_plan_") as tmp:
+        conn = core.connect(Path(tmp) / "plan.db"); core.init_schema(conn)
+        core.bulk_load(conn, iter(make_rows(args.rows))); cats = core.load_categories(conn)
+        # probed metadata as enrich() would leave it: pictures and clips get dimensions, clips a duration and codec
+        conn.execute("""INSERT INTO media (file_id, size, mtime, width, height, duration, fps, codec, family)
+            SELECT id, size, modified_date, 640 * (1 + id % 6), 360 * (1 + id % 6),
+                   CASE WHEN extension = '.mp4' THEN id % 1800 END, CASE WHEN extension = '.mp4' THEN 24 + id % 3 * 18 END,
+                   CASE WHEN extension = '.mp4' THEN CASE id % 3 WHEN 0 THEN 'h264' WHEN 1 THEN 'hevc' ELSE 'prores' END END,
+                   CASE WHEN extension = '.ttf' THEN 'Family ' || (id % 500) END
+            FROM files WHERE extension IN ('.png', '.jpg', '.mp4', '.ttf')"""); conn.commit()
+        bad = 0
+        for group, queries in (("indexed", QUERIES), ("free text (scan expected)", FREE_TEXT)):
+            print(f"\n  {group}")
+            for text in queries:
+                for sort in core.SORT_ORDER:
+                    steps, dt = plan(conn, text, sort, cats)
+                    scan = [s for s in steps if s.startswith("SCAN")]
+                    if scan and group == "indexed": bad += 1
+                    mark = "✗" if scan and group == "indexed" else "·" if scan else "✓"
+                    print(f"  {mark} {text:<44} {sort:<5} {dt * 1000:7.1f} ms   {' | '.join(steps)}")
+        conn.close()
+    print(f"\n  {'✓ every indexed query avoids a full scan' if not bad else f'✗ {bad} plans fall back to a full scan'}")
+    sys.exit(1 if bad else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,220 @@
+#!/usr/bin/env python3
+"""
+EAM — synthetic catalog generator
+
+Builds the kind of library EAM gets pointed at: client projects (footage,
+audio, graphics, project files with their auto-saves, renders, exports),
+SFX and music packs, fonts, stock and templates. It comes out either as a
+catalog (.db) ready to open, or as a directory tree on disk to scan. The same
+seed always gives the same library. About 3% of files are copies of another
+one, so duplicate searches find something, and media files get the metadata
+enrich() would have read.
+
+Usage:
+    python benchmarks/gen_catalog.py synthetic.db --rows 1m
+    python benchmarks/gen_catalog.py big.db --rows 10m --seed 7
+    python benchmarks/gen_catalog.py --tree /tmp/library --rows 20k
+
+Row counts take k / m suffixes (10k, 1m, 10m). Files in a tree are empty
+unless --max-bytes is given; their modification times are set.
+"""
+
+import os, sys, time, random, argparse
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+import eam_core as core
+
+CLIENTS = ["Acme", "Blue Harbor", "Cyberdyne", "Globex", "Hooli", "Initech", "Northwind", "Oscorp", "Soylent",
+           "Stark Industries", "Tyrell", "Umbrella", "Vandelay", "Wayne Enterprises", "Wonka", "Zenith Films"]
+PROJECTS = ["Spring Launch", "Brand Film", "Product Teaser", "Holiday Spot", "Social Cutdowns", "Event Recap",
+            "Founder Interview", "Trailer", "Explainer", "Documentary", "Music Video", "Training Series"]
+WORDS = ["logo", "intro", "outro", "title", "lower_third", "overlay", "texture", "light_leak", "grain", "flare",
+         "smoke", "dust", "city", "ocean", "forest", "crowd", "broll", "drone", "sunset", "studio", "hero", "detail",
+         "wide", "closeup", "product", "team", "office", "night", "rain", "snow", "glitch", "paper", "ink", "bokeh"]
+SFX = ["Whooshes", "Impacts", "Risers", "Foley", "Ambience", "UI", "Transitions", "Hits", "Glitches", "Drones"]
+MUSIC = ["Corporate", "Cinematic", "Lo-Fi", "Upbeat Pop", "Ambient", "Hip Hop", "Orchestral", "Electronic"]
+FONTS = ["Roboto", "Montserrat", "Bebas Neue", "Playfair Display", "Inter", "Oswald", "Lato", "Raleway", "Archivo"]
+TEMPLATES = ["Titles", "Transitions", "Lower Thirds", "Logo Reveals", "Slideshows", "Overlays"]
+STOCK = ["Artlist", "Envato", "Pexels", "Shutterstock", "Storyblocks"]
+
+# (extension, weight, median size in bytes) per kind of folder; sizes are log-normal around the median
+KINDS = {
+    "footage":  [(".mov", 5, 900e6), (".mp4", 4, 600e6), (".mxf", 1, 1.2e9)],
+    "audio":    [(".wav", 6, 40e6), (".mp3", 2, 6e6), (".aiff", 1, 30e6)],
+    "graphics": [(".psd", 3, 80e6), (".png", 5, 2e6), (".jpg", 3, 1.5e6), (".svg", 1, 40e3), (".ai", 1, 5e6)],
+    "project":  [(".prproj", 4, 25e6), (".aep", 3, 15e6), (".blend", 1, 60e6)],
+    "renders":  [(".mov", 3, 2e9), (".mp4", 3, 300e6), (".png", 4, 3e6)],
+    "exports":  [(".mp4", 6, 150e6), (".mov", 1, 800e6), (".jpg", 1, 500e3)],
+    "docs":     [(".pdf", 4, 1e6), (".docx", 2, 200e3), (".xlsx", 1, 80e3), (".txt", 1, 4e3), (".srt", 1, 20e3)],
+    "sfx":      [(".wav", 9, 2e6), (".mp3", 1, 300e3)],
+    "music":    [(".wav", 4, 60e6), (".mp3", 5, 8e6), (".flac", 1, 35e6)],
+    "fonts":    [(".ttf", 5, 250e3), (".otf", 4, 180e3), (".woff2", 1, 60e3)],
+    "stock":    [(".mp4", 5, 250e6), (".jpg", 4, 6e6), (".mov", 1, 700e6)],
+    "templates": [(".aep", 3, 40e6), (".mogrt", 3, 20e6), (".png", 2, 1e6), (".mp4", 2, 30e6), (".zip", 1, 200e6)],
+}
+COPY_RATE = 0.03                          # share of files that duplicate an earlier one
+YEARS = 4                                 # modification times spread over this many years back
+
+
+class Library:
+    """Deterministic stream of (relative path, size, mtime, content key) for a synthetic library, libraries first
+    and then projects, each folder's files together (roughly the order a scan meets them). Copies repeat an
+    earlier file's name, size and content key."""
+
+    def __init__(self, seed=1):
+        self.rnd = random.Random(seed); self.now = time.time(); self._recent = []; self._folders = {}
+        self._kinds = {k: ([e for e, *_ in v], [w for _, w, _ in v], {e: m for e, _, m in v}) for k, v in KINDS.items()}
+
+    def _files(self, folder, kind, n, name, year=None):
+        rnd = self.rnd; exts, weights, median = self._kinds[kind]
+        t_hi = self.now if year is None else min(self.now, time.mktime((year + 1, 1, 1, 0, 0, 0, 0, 0, -1)))
+        t_lo = t_hi - YEARS * 365 * 86400 if year is None else time.mktime((year, 1, 1, 0, 0, 0, 0, 0, -1))
+        k = self._folders[folder] = self._folders.get(folder, 0) + 1
+        if k > 1: folder = f"{folder} ({k})"   # a random folder name that comes up again is a new folder
+        seen = set()   # names already used in this folder; a random name that comes up twice gets a counter
+        for i in range(n):
+            if self._recent and rnd.random() < COPY_RATE:
+                fname, size, mtime, key = rnd.choice(self._recent)
+            else:
+                ext = rnd.choices(exts, weights)[0]
+                fname = name(i, ext); size = int(rnd.lognormvariate(0, 1.1) * median[ext]) + 1
+                mtime = rnd.uniform(t_lo, t_hi); key = rnd.getrandbits(64)
+                if rnd.random() < 0.02: self._recent.append((fname, size, mtime, key)); del self._recent[:-500]
+            if fname in seen:
+                stem, ext = os.path.splitext(fname); k = i
+                while fname in seen: fname = f"{stem} ({k}){ext}"; k += 1
+            seen.add(fname)
+            yield f"{folder}/{fname}", size, mtime, key
+
+    def libraries(self):
+        rnd = self.rnd
+        for v in range(1, 1 << 30):
+            for cat in SFX:
+                pack = f"Libraries/SFX/{rnd.choice(SFX)} Vol {v}/{cat}"
+                yield from self._files(pack, "sfx", rnd.randint(20, 120), lambda i, e, c=cat: f"{c.lower()}_{i + 1:02d}{e}")
+            for g in MUSIC[v % len(MUSIC)::3]:
+                yield from self._files(f"Libraries/Music/{g}/Pack {v:02d}", "music", rnd.randint(10, 40),
+                                       lambda i, e: f"{rnd.choice(WORDS).title()} {rnd.choice(WORDS).title()} ({i % 3 and 'Short' or 'Full'}){e}")
+            fam = f"{FONTS[v % len(FONTS)]}{'' if v <= len(FONTS) else f' {v // len(FONTS) + 1}'}"
+            yield from self._files(f"Libraries/Fonts/{fam}", "fonts", rnd.randint(4, 18),
+                                   lambda i, e, f=fam: f"{f.replace(' ', '')}-{['Regular', 'Bold', 'Italic', 'Light', 'Black', 'Medium'][i % 6]}{i // 6 or ''}{e}")
+            for vendor in STOCK:
+                yield from self._files(f"Libraries/Stock/{vendor}/{rnd.choice(WORDS).title()}", "stock", rnd.randint(10, 60),
+                                       lambda i, e: f"{rnd.choice(WORDS)}_{rnd.choice(WORDS)}_{rnd.randint(100000, 999999)}{e}")
+            t = TEMPLATES[v % len(TEMPLATES)]
+            yield from self._files(f"Libraries/Templates/{t}/{t} Pack {v}", "templates", rnd.randint(8, 40),
+                                   lambda i, e: f"{rnd.choice(WORDS).title()}_{i + 1:02d}{e}")
+
+    def projects(self):
+        rnd = self.rnd; year0 = time.localtime(self.now).tm_year - YEARS + 1
+        for n in range(1, 1 << 30):
+            client = CLIENTS[n % len(CLIENTS)]; year = year0 + (n // len(CLIENTS)) % YEARS
+            base = f"Projects/{client}/{year}/{n:04d}_{rnd.choice(PROJECTS)}"
+            for day in range(1, rnd.randint(2, 5)):
+                for cam in "AB"[:rnd.randint(1, 2)]:
+                    yield from self._files(f"{base}/01_Footage/Day_{day:02d}/Cam_{cam}", "footage", rnd.randint(20, 90),
+                                           lambda i, e, d=day, c=cam: f"{c}{d:03d}_C{i + 1:03d}_{rnd.randint(1, 12):02d}{rnd.randint(1, 28):02d}{e}", year)
+            yield from self._files(f"{base}/02_Audio", "audio", rnd.randint(5, 40), lambda i, e: f"{rnd.choice(WORDS)}_{i + 1:02d}{e}", year)
+            yield from self._files(f"{base}/03_Graphics", "graphics", rnd.randint(10, 80),
+                                   lambda i, e: f"{rnd.choice(WORDS)}_{rnd.choice(WORDS)}_v{i % 9 + 1}{e}", year)
+            yield from self._files(f"{base}/04_Project Files", "project", rnd.randint(3, 15), lambda i, e: f"{client}_edit_v{i + 1:02d}{e}", year)
+            yield from self._files(f"{base}/04_Project Files/Adobe Premiere Pro Auto-Save", "project", rnd.randint(5, 30),
+                                   lambda i, e: f"{client}_edit-{i + 1}{e}", year)
+            # an image sequence: thousands of frames in one folder, the shape that stresses listing and the folder tree
+            if rnd.random() < 0.15:
+                yield from self._files(f"{base}/05_Renders/shot_{rnd.randint(10, 99)}0", "renders", rnd.randint(200, 1500),
+                                       lambda i, e: f"frame_{i:05d}.png", year)
+            yield from self._files(f"{base}/05_Renders", "renders", rnd.randint(3, 20), lambda i, e: f"render_{i + 1:03d}{e}", year)
+            yield from self._files(f"{base}/06_Exports", "exports", rnd.randint(2, 15),
+                                   lambda i, e: f"{client}_{rnd.choice(['16x9', '9x16', '1x1', '4x5'])}_v{i + 1}{e}", year)
+            yield from self._files(f"{base}/Docs", "docs", rnd.randint(1, 10), lambda i, e: f"{rnd.choice(['brief', 'script', 'notes', 'budget', 'captions'])}_{i + 1}{e}", year)
+
+    def __call__(self, rows):
+        from itertools import islice, chain
+        libs = rows // 5   # a fifth shared libraries, the rest projects
+        return chain(islice(self.libraries(), libs), islice(self.projects(), rows - libs))
+
+
+def parse_count(s):
+    s = str(s).strip().lower(); mult = {"k": 1_000, "m": 1_000_000}.get(s[-1:], 1)
+    return int(float(s[:-1] if mult > 1 else s) * mult)
+
+
+def catalog_rows(rows, root, seed=1, lookup=None, hashes=True, root_id=1):
+    # core row tuples (ROW_FIELDS) for a catalog whose single root is `root`; small files are hashed like --hash does
+    lookup = lookup or core.ext_lookup(core.DEFAULT_CATEGORIES); ts = time.localtime
+    for rel, size, mtime, key in Library(seed)(rows):
+        path = f"{root}/{rel}"; name = rel[rel.rfind("/") + 1:]; ext = os.path.splitext(name)[1].lower()
+        when = "%04d-%02d-%02dT%02d:%02d:%02d" % ts(mtime)[:6]
+        yield (name, path, ext, lookup.get(ext, "Other"), size, when, when,
+               f"{key:032x}" if hashes and size < core.HASH_MAX_BYTES else None, root_id, None, None)
+
+
+def build_catalog(db_path, rows, seed=1, root="/synthetic/library", media=True, hashes=True):
+    """A catalog of `rows` files under one root, bulk-loaded the way a full scan writes it. -> rows written"""
+    for p in (db_path, f"{db_path}-wal", f"{db_path}-shm"):
+        if os.path.exists(p): os.remove(p)
+    conn = core.connect(db_path); core.init_schema(conn)
+    conn.execute("INSERT INTO roots (id, path, scanned) VALUES (1, ?, ?)", (root, time.strftime("%Y-%m-%dT%H:%M:%S")))
+    conn.commit()
+    n = core.bulk_load(conn, catalog_rows(rows, root, seed, core.ext_lookup(core.load_categories(conn)), hashes))
+    conn.execute("UPDATE roots SET file_count = ?, total_size = (SELECT SUM(size) FROM files) WHERE id = 1", (n,))
+    if media:
+        # what enrich() would have read: dimensions for pictures and clips, duration / fps / codec for clips and
+        # audio, family names for fonts (spread deterministically over each file's id)
+        conn.execute("""INSERT INTO media (file_id, size, mtime, width, height, duration, fps, codec, sample_rate, channels, family)
+            SELECT id, size, modified_date,
+                CASE WHEN extension IN ('.mov','.mp4','.mxf','.png','.jpg','.psd')
+                     THEN CASE id % 5 WHEN 0 THEN 1280 WHEN 1 THEN 3840 WHEN 2 THEN 1080 ELSE 1920 END END,
+                CASE WHEN extension IN ('.mov','.mp4','.mxf','.png','.jpg','.psd')
+                     THEN CASE id % 5 WHEN 0 THEN 720 WHEN 1 THEN 2160 WHEN 2 THEN 1920 ELSE 1080 END END,
+                CASE WHEN extension IN ('.mov','.mp4','.mxf') THEN 2 + id % 900
+                     WHEN extension IN ('.wav','.mp3','.aiff','.flac') THEN 0.5 + id % 240 END,
+                CASE WHEN extension IN ('.mov','.mp4','.mxf') THEN (CASE id % 4 WHEN 0 THEN 23.976 WHEN 1 THEN 25 WHEN 2 THEN 29.97 ELSE 59.94 END) END,
+                CASE extension WHEN '.mov' THEN (CASE id % 3 WHEN 0 THEN 'prores' ELSE 'h264' END) WHEN '.mp4' THEN (CASE id % 3 WHEN 0 THEN 'hevc' ELSE 'h264' END)
+                     WHEN '.mxf' THEN 'dnxhd' WHEN '.wav' THEN 'pcm' WHEN '.mp3' THEN 'mp3' WHEN '.flac' THEN 'flac' END,
+                CASE WHEN extension IN ('.wav','.mp3','.aiff','.flac') THEN (CASE id % 2 WHEN 0 THEN 48000 ELSE 44100 END) END,
+                CASE WHEN extension IN ('.wav','.mp3','.aiff','.flac') THEN 2 END,
+                CASE WHEN extension IN ('.ttf','.otf','.woff2') THEN substr(name, 1, instr(name, '-') - 1) END
+            FROM files WHERE extension IN ('.mov','.mp4','.mxf','.png','.jpg','.psd','.wav','.mp3','.aiff','.flac','.ttf','.otf','.woff2')""")
+    conn.commit(); conn.close()
+    return n
+
+
+def build_tree(directory, rows, seed=1, max_bytes=0):
+    """The same library as files on disk under `directory`: empty (or up to max_bytes, sparse where the filesystem
+    allows), with their modification times. -> files written"""
+    n = 0; made = set()
+    for rel, size, mtime, _ in Library(seed)(rows):
+        p = os.path.join(directory, *rel.split("/")); d = os.path.dirname(p)
+        if d not in made: os.makedirs(d, exist_ok=True); made.add(d)
+        with open(p, "wb") as f:
+            if max_bytes: f.truncate(min(size, max_bytes))
+        os.utime(p, (mtime, mtime)); n += 1
+    return n
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    ap.add_argument("db", nargs="?", help="catalog to write (replaced if it exists)")
+    ap.add_argument("--rows", default="1m", help="number of files, e.g. 10k, 1m, 10m")
+    ap.add_argument("--seed", type=int, default=1)
+    ap.add_argument("--root", default="/synthetic/library", help="root path the catalog's files live under")
+    ap.add_argument("--tree", metavar="DIR", help="write the library to DIR as files instead")
+    ap.add_argument("--max-bytes", type=int, default=0, help="with --tree: files get their size up to this many bytes")
+    ap.add_argument("--no-media", action="store_true", help="leave the media metadata table empty")
+    args = ap.parse_args()
+    if not args.db and not args.tree: ap.error("give a catalog path or --tree DIR")
+    rows = parse_count(args.rows); t0 = time.perf_counter()
+    if args.tree:
+        n = build_tree(args.tree, rows, args.seed, args.max_bytes); what = args.tree
+    else:
+        n = build_catalog(args.db, rows, args.seed, args.root.rstrip("/"), media=not args.no_media); what = args.db
+    dt = time.perf_counter() - t0
+    print(f"  ✓ {n:,} files → {what} in {dt:.1f}s ({n / dt:,.0f} files/s)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1558 @@
+"""
+EAM core — catalog schema and scanner shared by the desktop app and the CLI.
+No Qt imports here; everything runs from a plain Python interpreter.
+"""
+
+import os, re, sys, csv, time, zlib, bisect, select, struct, shutil, fnmatch, sqlite3, json, hashlib, threading, operator, functools
+from contextlib import contextmanager, nullcontext
+from datetime import datetime, timedelta
+# tarfile / zipfile, subprocess, the process pool and numpy are imported where they are used: a CLI query needs none of them
+
+DEFAULT_CATEGORIES = {
+    "Archives":      [".zip",".rar",".7z",".tar",".gz",".bz2",".xz"],
+    "After Effects": [".aep",".aet",".ffx"],
+    "Videos - MP4":  [".mp4"], "Videos - MOV": [".mov"], "Videos - AVI": [".avi"],
+    "Videos - Other":[".mkv",".m4v",".wmv",".flv",".webm",".mpg",".mpeg"],
+    "Images - PNG":  [".png"], "Images - JPG": [".jpg",".jpeg"],
+    "Images - Other":[".webp",".tiff",".tif",".gif",".bmp",".heic",".svg"],
+    "Icons":         [".ico"],
+    "Audio":         [".mp3",".wav",".aac",".flac",".ogg",".m4a",".wma",".aiff",".opus",".alac"],
+    "Photoshop":     [".psd",".psb",".abr",".asl",".grd",".pat"],
+    "Blender":       [".blend",".blend1"], "Vegas": [".veg",".vf"],
+    "Premiere":      [".prproj",".prel"],
+    "Documents":     [".pdf",".doc",".docx",".txt",".rtf",".md",".odt"],
+    "Spreadsheets":  [".xlsx",".xls",".csv",".ods"],
+    "Fonts":         [".ttf",".otf",".woff",".woff2"],
+    "3D Models":     [".obj",".fbx",".dae",".stl",".3ds",".gltf",".glb"],
+    "Code":          [".py",".js",".html",".css",".cpp",".java",".c",
+                      ".h",".ts",".jsx",".tsx",".json",".xml",".yaml"],
+    "Other":         [],
+}
+
+HASH_MAX_BYTES = 10 * 1024 * 1024         # "hash small files" skips anything larger
+UPSERT_BATCH = 5000                       # rows per commit on incremental runs
+POLL_INTERVAL = 5.0                       # seconds between directory mtime sweeps when inotify is unavailable
+WATCH_SETTLE = 0.5                        # a burst of change events is applied once it has been quiet this long
+WATCH_MAX_DELAY = 3.0                     # ...or after this long, however busy the folder is
+CHECKPOINT_ROWS = 20000                   # a scan saves its progress after this many rows...
+CHECKPOINT_SECS = 5.0                     # ...or this many seconds, whichever comes first
+ENRICH_BATCH = 256                        # files handed to the probe pool per commit
+ENRICH_INLINE = 64                        # fewer files than this are probed in-process (a pool costs more to start)
+PHASH_DISTANCE = 8                        # differing bits (of 64) at which two images still count as similar
+
+# what a new root leaves out until its rules are edited: VCS/tool folders, editor caches and autosaves, OS litter
+DEFAULT_IGNORE = [".git/", ".svn/", ".hg/", "node_modules/", "__pycache__/", "$RECYCLE.BIN/",
+                  "System Volume Information/", "Adobe Premiere Pro Auto-Save/", "Adobe Premiere Pro Video Previews/",
+                  "Adobe Premiere Pro Audio Previews/", "Adobe After Effects Auto-Save/", "Media Cache/",
+                  "Media Cache Files/", "*.tmp", "~$*", "Thumbs.db", "desktop.ini", ".DS_Store", "__MACOSX/"]
+# archives whose member list a root can catalog (IgnoreRules.archives); compressed tars are read as a stream
+ARCHIVE_EXTS = {".zip", ".tar", ".tgz", ".gz", ".bz2", ".xz"}
+
+# path uniqueness lives in its own index (not inline UNIQUE) so bulk loads can build it after the rows are in
+FILES_COLUMNS = """id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT, path TEXT,
+            extension TEXT, category TEXT, size INTEGER,
+            modified_date TEXT, created_date TEXT, file_hash TEXT, root_id INTEGER, dev INTEGER, inode INTEGER, phash INTEGER,
+            machine TEXT COLLATE NOCASE"""
+# one per search predicate (see Query); ext and cat carry name too so the default sort needs no extra pass
+FILES_INDEXES = {"idx_files_name": "name COLLATE NOCASE", "idx_files_cat_name": "category, name COLLATE NOCASE",
+                 "idx_files_ext_name": "extension, name COLLATE NOCASE", "idx_files_size": "size",
+                 "idx_files_mtime": "modified_date", "idx_files_machine": "machine"}
+# probed metadata, one row per media file (see enrich); size and mtime are the file's when it was probed
+MEDIA_COLUMNS = ("width", "height", "duration", "fps", "codec", "sample_rate", "channels", "family")
+MEDIA_INDEXES = {"idx_media_width": "width", "idx_media_height": "height", "idx_media_duration": "duration",
+                 "idx_media_fps": "fps", "idx_media_codec": "codec", "idx_media_family": "family"}
+MEDIA_EXTS = {".png",".jpg",".jpeg",".gif",".bmp",".webp",".tiff",".tif",".ico",".psd",".psb",
+              ".mp4",".mov",".m4v",".mkv",".avi",".wmv",".flv",".webm",".mpg",".mpeg",
+              ".mp3",".wav",".aac",".flac",".ogg",".m4a",".wma",".aiff",".opus",".alac",
+              ".ttf",".otf",".woff"}
+ROW_FIELDS = "name,path,extension,category,size,modified_date,created_date,file_hash,root_id,dev,inode"
+ROW_KEYS = ("id","name","path","extension","category","size","modified_date","created_date")
+
+INSERT_SQL = f"INSERT INTO {{}} ({ROW_FIELDS}) VALUES (?,?,?,?,?,?,?,?,?,?,?)"
+UPSERT_SQL = (f"INSERT INTO files ({ROW_FIELDS}) VALUES (?,?,?,?,?,?,?,?,?,?,?) "
+              "ON CONFLICT(path) DO UPDATE SET name=excluded.name, extension=excluded.extension, "
+              "category=excluded.category, size=excluded.size, modified_date=excluded.modified_date, "
+              "created_date=excluded.created_date, root_id=excluded.root_id, dev=excluded.dev, inode=excluded.inode, machine=NULL, "
+              "file_hash=CASE WHEN files.size IS excluded.size AND files.modified_date IS excluded.modified_date THEN COALESCE(excluded.file_hash, files.file_hash) "
+              "ELSE excluded.file_hash END, "
+              "phash=CASE WHEN files.size IS excluded.size AND files.modified_date IS excluded.modified_date THEN files.phash END "
+              "WHERE files.size IS NOT excluded.size OR files.modified_date IS NOT excluded.modified_date "
+              "OR files.category IS NOT excluded.category OR files.root_id IS NOT excluded.root_id "
+              "OR files.inode IS NOT excluded.inode OR files.dev IS NOT excluded.dev OR files.machine IS NOT NULL "
+              "OR (excluded.file_hash IS NOT NULL AND files.file_hash IS NOT excluded.file_hash)")
+
+
+# ═══════════════════════════════════════════════════════════════
+#  INSTRUMENTATION
+# ═══════════════════════════════════════════════════════════════
+PERF_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 10000)   # ms, upper bounds
+PERF_TRACE_SPANS = 200000                 # spans kept for the JSON trace, oldest dropped first
+
+class Perf:
+    """Timing spans per operation: count, total, min/max and a latency histogram over PERF_BUCKETS, plus the
+    spans themselves when tracing. Off by default; then start() returns None and stop()/span()/timed wrappers
+    do nothing else, so instrumented code pays an attribute check. Safe to use from any thread.
+
+        t0 = perf.start(); ...; perf.stop("scan.write", t0)
+        with perf.span("merge.stage"): ...
+        @perf.timed("db.search")"""
+
+    def __init__(self):
+        self.enabled = False; self.tracing = False; self._lock = threading.Lock(); self.reset()
+
+    def enable(self, on=True, trace=False):
+        self.enabled = bool(on); self.tracing = bool(on and trace)
+
+    def reset(self):
+        with self._lock: self._ops = {}; self._trace = []; self._dropped = 0; self.since = time.time(); self._t0 = time.perf_counter()
+
+    def start(self):
+        return time.perf_counter() if self.enabled else None
+
+    def stop(self, name, t0):
+        if t0 is None or not self.enabled: return
+        t1 = time.perf_counter(); ms = (t1 - t0) * 1000; b = bisect.bisect_left(PERF_BUCKETS, ms)
+        with self._lock:
+            op = self._ops.get(name)
+            if op is None: op = self._ops[name] = [0, 0.0, ms, ms, [0] * (len(PERF_BUCKETS) + 1)]
+            op[0] += 1; op[1] += ms; op[4][b] += 1
+            if ms < op[2]: op[2] = ms
+            if ms > op[3]: op[3] = ms
+            if self.tracing:
+                if len(self._trace) >= PERF_TRACE_SPANS: del self._trace[:PERF_TRACE_SPANS // 10]; self._dropped += PERF_TRACE_SPANS // 10
+                self._trace.append((name, t0, t1, threading.get_ident()))
+
+    @contextmanager
+    def _span(self, name):
+        t0 = time.perf_counter()
+        try: yield
+        finally: self.stop(name, t0)
+
+    def span(self, name):
+        return self._span(name) if self.enabled else nullcontext()
+
+    def timed(self, name=None):
+        def wrap(fn):
+            label = name or fn.__name__
+            @functools.wraps(fn)
+            def timed_fn(*a, **kw):
+                if not self.enabled: return fn(*a, **kw)
+                t0 = time.perf_counter()
+                try: return fn(*a, **kw)
+                finally: self.stop(label, t0)
+            return timed_fn
+        return wrap
+
+    def snapshot(self):
+        """-> {name: {"count", "total_ms", "mean_ms", "min_ms", "max_ms", "p50_ms", "p95_ms", "p99_ms", "buckets"}};
+        percentiles are the upper bound of the bucket they fall in (never above max_ms)."""
+        with self._lock: ops = {k: (v[0], v[1], v[2], v[3], list(v[4])) for k, v in self._ops.items()}
+        out = {}
+        for name, (n, total, lo, hi, buckets) in sorted(ops.items()):
+            def pct(q):
+                need, seen = q * n, 0
+                for i, c in enumerate(buckets):
+                    seen += c
+                    if seen >= need: return min(hi, PERF_BUCKETS[i]) if i < len(PERF_BUCKETS) else hi
+                return hi
+            out[name] = {"count": n, "total_ms": round(total, 3), "mean_ms": round(total / n, 3), "min_ms": round(lo, 3),
+                         "max_ms": round(hi, 3), "p50_ms": round(pct(.5), 3), "p95_ms": round(pct(.95), 3),
+                         "p99_ms": round(pct(.99), 3), "buckets": buckets}
+        return out
+
+    def spans(self):
+        with self._lock: return len(self._trace), self._dropped
+
+    def write_trace(self, path):
+        """Chrome trace-event JSON (chrome://tracing, ui.perfetto.dev): one complete event per span, with the
+        per-operation summary alongside. -> spans written"""
+        with self._lock: trace, dropped, t0 = list(self._trace), self._dropped, self._t0
+        threads = {t: i for i, t in enumerate(dict.fromkeys(tid for *_, tid in trace))}
+        events = [{"name": n, "cat": n.split(".")[0], "ph": "X", "pid": os.getpid(), "tid": threads[tid],
+                   "ts": round((a - t0) * 1e6, 1), "dur": round((b - a) * 1e6, 1)} for n, a, b, tid in trace]
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"traceEvents": events, "displayTimeUnit": "ms",
+                       "otherData": {"since": datetime.fromtimestamp(self.since).isoformat(timespec="seconds"),
+                                     "dropped_spans": dropped, "buckets_ms": PERF_BUCKETS, "summary": self.snapshot()}}, f)
+        return len(events)
+
+perf = Perf()
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SCHEMA
+# ═══════════════════════════════════════════════════════════════
+BUSY_TIMEOUT = 60.0   # seconds a writer waits on another's transaction (a merge's runs for tens of seconds) before "database is locked"
+
+def connect(db_path):
+    c = sqlite3.connect(str(db_path), timeout=BUSY_TIMEOUT, check_same_thread=False)
+    c.execute("PRAGMA journal_mode=WAL"); c.execute("PRAGMA synchronous=NORMAL")
+    return c
+
+def _has_unique_path(conn, table):
+    for _, name, unique, *_ in conn.execute(f"PRAGMA index_list({table})"):
+        if unique and [r[2] for r in conn.execute(f"PRAGMA index_info('{name}')")] == ["path"]: return True
+    return False
+
+def create_indexes(conn, table="files"):
+    # catalogs from older builds carry an inline UNIQUE(path); only add ours when that is missing
+    if not _has_unique_path(conn, table): conn.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS idx_files_path ON {table}(path)")
+    for name, cols in FILES_INDEXES.items(): conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table}({cols})")
+
+def init_schema(conn):
+    c = conn.cursor()
+    c.execute(f"CREATE TABLE IF NOT EXISTS files ({FILES_COLUMNS})")
+    c.execute("""CREATE TABLE IF NOT EXISTS categories (
+        id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT UNIQUE, extensions TEXT)""")
+    # scanned roots (every file row points at one) and the mtime of every directory under them
+    cols = [r[1] for r in c.execute("PRAGMA table_info(roots)")]
+    if cols and "id" not in cols:   # catalogs from before root ids
+        c.execute("ALTER TABLE roots RENAME TO roots_old")
+    c.execute("""CREATE TABLE IF NOT EXISTS roots (id INTEGER PRIMARY KEY AUTOINCREMENT, path TEXT UNIQUE,
+        scanned TEXT, file_count INTEGER DEFAULT 0, total_size INTEGER DEFAULT 0)""")
+    if cols and "id" not in cols:
+        c.execute("INSERT INTO roots (path, scanned) SELECT path, scanned FROM roots_old"); c.execute("DROP TABLE roots_old")
+    if "rules" not in [r[1] for r in c.execute("PRAGMA table_info(roots)")]:
+        c.execute("ALTER TABLE roots ADD COLUMN rules TEXT")   # JSON, see IgnoreRules; NULL means the defaults
+    if "root_id" not in [r[1] for r in c.execute("PRAGMA table_info(files)")]:
+        c.execute("ALTER TABLE files ADD COLUMN root_id INTEGER")
+        for rid, path in c.execute("SELECT id, path FROM roots").fetchall():
+            c.execute("UPDATE files SET root_id = ? WHERE path >= ? AND path < ?", (rid, *_under(path)))
+    if "inode" not in [r[1] for r in c.execute("PRAGMA table_info(files)")]:
+        # filled in by the next scan of each root
+        c.execute("ALTER TABLE files ADD COLUMN dev INTEGER"); c.execute("ALTER TABLE files ADD COLUMN inode INTEGER")
+    if "phash" not in [r[1] for r in c.execute("PRAGMA table_info(files)")]:
+        c.execute("ALTER TABLE files ADD COLUMN phash INTEGER")   # filled in on demand, see SimilarityIndex
+    if "machine" not in [r[1] for r in c.execute("PRAGMA table_info(files)")]:
+        c.execute("ALTER TABLE files ADD COLUMN machine TEXT COLLATE NOCASE")   # set by merge(); NULL: scanned here
+    c.execute("CREATE TABLE IF NOT EXISTS dirs (path TEXT PRIMARY KEY, mtime_ns INTEGER) WITHOUT ROWID")
+    c.execute("""CREATE TABLE IF NOT EXISTS media (file_id INTEGER PRIMARY KEY, size INTEGER, mtime TEXT, width INTEGER,
+        height INTEGER, duration REAL, fps REAL, codec TEXT COLLATE NOCASE, sample_rate INTEGER, channels INTEGER,
+        family TEXT COLLATE NOCASE)""")
+    for name, cols in MEDIA_INDEXES.items(): c.execute(f"CREATE INDEX IF NOT EXISTS {name} ON media({cols})")
+    # checkpoint of an unfinished scan: pending is the JSON stack of directories not yet listed
+    c.execute("""CREATE TABLE IF NOT EXISTS scan_state (root TEXT PRIMARY KEY, mode TEXT, hash_small INTEGER,
+        pending TEXT, done INTEGER, errors INTEGER, started TEXT)""")
+    c.execute("SELECT COUNT(*) FROM categories")
+    if c.fetchone()[0] == 0:
+        for name, exts in DEFAULT_CATEGORIES.items():
+            c.execute("INSERT INTO categories (name,extensions) VALUES (?,?)", (name, json.dumps(exts)))
+    c.execute("DROP INDEX IF EXISTS idx_files_cat")
+    create_indexes(conn)
+    conn.commit()
+
+def load_categories(conn):
+    return {r[0]: json.loads(r[1]) for r in conn.execute("SELECT name, extensions FROM categories")}
+
+def category_for_ext(ext, cats):
+    el = ext.lower()
+    for name, exts in cats.items():
+        if el in (e.lower() for e in exts): return name
+    return "Other"
+
+def ext_lookup(cats):
+    # flattened {ext: category}; first category listing an extension wins, same as category_for_ext
+    m = {}
+    for name, exts in cats.items():
+        for e in exts: m.setdefault(e.lower(), name)
+    return m
+
+
+# ── shadow table: full scans fill files_new, readers keep the old snapshot until finish_scan swaps it in ──
+def begin_shadow(conn, keep_outside=None):
+    # keep_outside: rebuilding one root; every row outside it is carried over unchanged (ids included)
+    # a stopped rebuild whose files_new goes away has to start over rather than resume from rows no longer there
+    conn.execute("DELETE FROM scan_state WHERE mode = 'rebuild'")
+    conn.execute("DROP TABLE IF EXISTS files_new"); conn.execute(f"CREATE TABLE files_new ({FILES_COLUMNS})")
+    conn.execute("DROP TABLE IF EXISTS dirs_new"); conn.execute("CREATE TABLE dirs_new (path TEXT PRIMARY KEY, mtime_ns INTEGER) WITHOUT ROWID")
+    if keep_outside:
+        lo, hi = _under(keep_outside)
+        conn.execute(f"INSERT INTO files_new (id,{ROW_FIELDS},phash,machine) SELECT id,{ROW_FIELDS},phash,machine FROM files WHERE path < ? OR path >= ?", (lo, hi))
+        conn.execute("INSERT INTO dirs_new SELECT * FROM dirs WHERE path != ? AND (path < ? OR path >= ?)", (keep_outside, lo, hi))
+    conn.commit()
+
+def drop_shadow(conn):
+    conn.execute("DROP TABLE IF EXISTS files_new"); conn.execute("DROP TABLE IF EXISTS dirs_new"); conn.commit()
+
+def _swap_tables(conn):
+    # runs inside the caller's transaction
+    if conn.execute("SELECT 1 FROM files WHERE phash IS NOT NULL LIMIT 1").fetchone():
+        # a rescanned file that has not changed keeps its perceptual hash
+        conn.execute("UPDATE files_new SET phash = (SELECT f.phash FROM files f WHERE f.path = files_new.path "
+                     "AND f.size IS files_new.size AND f.modified_date IS files_new.modified_date) WHERE phash IS NULL")
+    if conn.execute("SELECT 1 FROM media LIMIT 1").fetchone():
+        # probed metadata follows each unchanged file to its new id
+        conn.execute("CREATE TEMP TABLE media_keep AS SELECT n.id AS file_id, m.size, m.mtime, "
+                     f"{','.join('m.' + c for c in MEDIA_COLUMNS)} FROM files_new n JOIN files f ON f.path = n.path "
+                     "AND f.size IS n.size AND f.modified_date IS n.modified_date JOIN media m ON m.file_id = f.id")
+        conn.execute("DELETE FROM media"); conn.execute("INSERT INTO media SELECT * FROM temp.media_keep")
+        conn.execute("DROP TABLE temp.media_keep")
+    conn.execute("DROP TABLE files"); conn.execute("ALTER TABLE files_new RENAME TO files")
+    try: conn.execute("CREATE UNIQUE INDEX idx_files_path ON files(path)")
+    except sqlite3.IntegrityError:
+        # the same path came in twice (rare: file replaced mid-scan); keep the newest row
+        conn.execute("DELETE FROM files WHERE id NOT IN (SELECT MAX(id) FROM files GROUP BY path)")
+        conn.execute("CREATE UNIQUE INDEX idx_files_path ON files(path)")
+    for name, cols in FILES_INDEXES.items(): conn.execute(f"CREATE INDEX {name} ON files({cols})")
+    conn.execute("DELETE FROM dirs"); conn.execute("INSERT INTO dirs SELECT * FROM dirs_new"); conn.execute("DROP TABLE dirs_new")
+
+def swap_shadow(conn):
+    conn.execute("BEGIN IMMEDIATE")
+    try: _swap_tables(conn); conn.commit()
+    except Exception: conn.rollback(); raise
+
+
+# ═══════════════════════════════════════════════════════════════
+#  LOADING
+# ═══════════════════════════════════════════════════════════════
+def bulk_load(conn, rows, should_stop=None):
+    # replace the catalog with rows: one transaction into the index-free shadow table, indexes built once at swap time
+    begin_shadow(conn); stopped = should_stop or (lambda: False)
+    conn.execute("PRAGMA cache_size=-131072")   # 128 MB page cache for the index sorts
+    conn.execute("BEGIN"); sql = INSERT_SQL.format("files_new"); n = 0
+    for chunk in _chunks(rows, UPSERT_BATCH):
+        if stopped(): break
+        conn.executemany(sql, chunk); n += len(chunk)
+    if stopped(): conn.rollback(); drop_shadow(conn); return None
+    conn.commit(); swap_shadow(conn)
+    return n
+
+def upsert_rows(conn, rows, should_stop=None):
+    # incremental: rows keep their ids, unchanged rows are not rewritten at all
+    stopped = should_stop or (lambda: False); n = 0
+    for chunk in _chunks(rows, UPSERT_BATCH):
+        if stopped(): return None
+        conn.executemany(UPSERT_SQL, chunk); conn.commit(); n += len(chunk)
+    return n
+
+def _under(d):
+    # [lo, hi) range covering every path below directory d, usable on the path index
+    lo = os.path.join(d, ""); return lo, lo[:-1] + chr(ord(lo[-1]) + 1)
+
+def _children(conn, d, table):
+    # direct children of d in files/dirs: an index range scan, with the nested paths filtered out in SQL
+    lo, hi = _under(d)
+    return {r[0] for r in conn.execute(f"SELECT path FROM {table} WHERE path >= ? AND path < ? "
+                                       "AND instr(substr(path, ?), ?) = 0", (lo, hi, len(lo) + 1, os.sep))}
+
+def _delete_tree(conn, p):
+    for t in ("files", "dirs"): conn.execute(f"DELETE FROM {t} WHERE path = ? OR (path >= ? AND path < ?)", (p, *_under(p)))
+
+def _chunks(it, n):
+    buf = []
+    for x in it:
+        buf.append(x)
+        if len(buf) >= n: yield buf; buf = []
+    if buf: yield buf
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SCANNER
+# ═══════════════════════════════════════════════════════════════
+class RateLimiter:
+    """Token bucket that any number of scans can share: wait(n) blocks until n more files fit under the
+    rate (files per second; None means unlimited). The rate may be changed from another thread at any time,
+    and a sleeping scan notices within a tenth of a second."""
+    def __init__(self, rate=None):
+        self.rate = rate; self._lock = threading.Lock(); self._tokens = 0.0; self._t = time.monotonic()
+
+    def wait(self, n=1):
+        with self._lock:
+            rate, now = self.rate, time.monotonic()
+            if not rate: self._tokens, self._t = 0.0, now; return
+            # at most a second's worth of burst; a deficit is slept off below
+            self._tokens = min(rate, self._tokens + (now - self._t) * rate) - n; self._t = now
+            debt = -self._tokens / rate
+        while debt > 0 and self.rate:
+            time.sleep(min(debt, 0.1)); debt -= 0.1
+
+def file_row(fp, lookup, hash_small=False, st=None, root_id=None, links=None):
+    # links: {(dev, inode): hash} shared across a scan, so every hardlink after the first is hashed for free
+    st = st or os.stat(fp); ext = os.path.splitext(fp)[1].lower(); fh = None
+    ino = st.st_ino or None; dev = st.st_dev if ino else None   # 0 from a Windows DirEntry: unknown
+    if hash_small and st.st_size < HASH_MAX_BYTES:
+        key = (dev, ino) if links is not None and ino and st.st_nlink > 1 else None
+        fh = links.get(key) if key else None
+        if fh is None:
+            try:
+                with open(fp, "rb") as f: fh = hashlib.md5(f.read()).hexdigest()
+            except OSError: pass
+            if key and fh: links[key] = fh
+    return (os.path.basename(fp), fp, ext, lookup.get(ext, "Other"), st.st_size,
+            datetime.fromtimestamp(st.st_mtime).isoformat(), datetime.fromtimestamp(st.st_ctime).isoformat(), fh, root_id,
+            dev, ino)
+
+def list_archive(path):
+    # -> [(member path with / separators, size, mtime ISO)] of the files in a zip (its central directory) or a tar
+    # (its headers, streamed); nothing is extracted. [] for anything unreadable or not an archive
+    import tarfile, zipfile
+    out = []
+    try:
+        if path.lower().endswith(".zip"):
+            with zipfile.ZipFile(path) as z:
+                for zi in z.infolist():
+                    if zi.is_dir(): continue
+                    try: t = datetime(*zi.date_time).isoformat()
+                    except ValueError: t = None
+                    out.append((zi.filename, zi.file_size, t))
+        else:
+            with tarfile.open(path, "r|*") as t:
+                out = [(m.name, m.size, datetime.fromtimestamp(m.mtime).isoformat()) for m in t if m.isfile()]
+    except (OSError, EOFError, ValueError, zipfile.BadZipFile, tarfile.TarError, zlib.error): return out
+    return out
+
+def archive_rows(path, lookup, root_id=None, rules=None):
+    # catalog rows for the members of an archive: their paths continue the archive's own, so anything keyed on a
+    # path range (deletes, root rescans, path: searches) treats them as the archive's children
+    for name, size, mtime in list_archive(path):
+        parts = [p for p in name.replace("\\", "/").split("/") if p not in ("", ".", "..")]
+        if not parts: continue
+        fp = os.path.join(path, *parts); ext = os.path.splitext(fp)[1].lower()
+        if rules and (rules.skip_size(size) or _ignored(rules, fp)): continue
+        yield (parts[-1], fp, ext, lookup.get(ext, "Other"), size, mtime, mtime, None, root_id, None, None)
+
+def archive_of(path):
+    # the archive a cataloged path lies inside, or None for a path on disk
+    d = path
+    while not os.path.lexists(d):
+        parent = os.path.dirname(d)
+        if parent == d: return None
+        d = parent
+    return d if d != path and os.path.isfile(d) and os.path.splitext(d)[1].lower() in ARCHIVE_EXTS else None
+
+def _archive_members(conn, row, update, rules, lookup):
+    # rows to write for the members of the archive in row; one whose size and mtime are unchanged is not reopened
+    p = row[1]; lo, hi = _under(p)
+    listed = conn.execute("SELECT 1 FROM files WHERE path >= ? AND path < ? LIMIT 1", (lo, hi)).fetchone()
+    if listed and rules.archives and conn.execute("SELECT size, modified_date FROM files WHERE path = ?", (p,)).fetchone() == (row[4], row[5]):
+        return [] if update else conn.execute(f"SELECT {ROW_FIELDS} FROM files WHERE path >= ? AND path < ?", (lo, hi)).fetchall()
+    if update and listed: conn.execute("DELETE FROM files WHERE path >= ? AND path < ?", (lo, hi))
+    return list(archive_rows(p, lookup, row[8], rules)) if rules.archives else []
+
+class IgnoreRules:
+    """Per-root filter, applied while listing so pruned folders are never opened and skipped files never
+    stat'ed. Patterns follow .eamignore (gitignore-like) syntax: one glob per line, # comments, a trailing
+    / matches folders only, a pattern with any other / is matched against the path relative to the root,
+    anything else against the bare name. Sizes are only known after the stat, so they are checked last.
+    hidden: catalog dot-files and hidden folders (the default; a .* pattern or hidden=False skips them).
+    archives: also catalog the files inside zip and tar archives (the same rules apply to them)."""
+    def __init__(self, root, patterns=None, hidden=True, min_size=None, max_size=None, archives=False):
+        self.root = os.path.join(root, ""); self.hidden = hidden; self.min_size = min_size; self.max_size = max_size
+        self.archives = archives
+        self.patterns = [p.strip() for p in (DEFAULT_IGNORE if patterns is None else patterns)
+                         if p.strip() and not p.strip().startswith("#")]
+        parts = {(d, rel): [] for d in (False, True) for rel in (False, True)}
+        for p in self.patterns:
+            d = p.endswith("/"); p = p.rstrip("/"); rel = "/" in p
+            rx = fnmatch.translate(os.path.normcase(p.lstrip("/").replace("/", os.sep)))
+            parts[(d, rel)].append(rx)
+            if not d: parts[(True, rel)].append(rx)   # plain patterns cover folders too, as in gitignore
+        self._rx = {k: re.compile("|".join(v)) if v else None for k, v in parts.items()}
+
+    @classmethod
+    def from_json(cls, root, text):
+        d = json.loads(text) if text else {}
+        return cls(root, d.get("patterns"), d.get("hidden", True), d.get("min_size"), d.get("max_size"), d.get("archives", False))
+
+    def to_json(self):
+        return json.dumps({"patterns": self.patterns, "hidden": self.hidden,
+                           "min_size": self.min_size, "max_size": self.max_size, "archives": self.archives})
+
+    def skip(self, path, is_dir, entry=None):
+        name = os.path.basename(path)
+        if not self.hidden and (name.startswith(".") or _win_hidden(entry)): return True
+        rel = os.path.normcase(path[len(self.root):]) if path.startswith(self.root) else None
+        by_name, by_path = self._rx[(is_dir, False)], self._rx[(is_dir, True)]
+        return bool(by_name and by_name.match(os.path.normcase(name)) or by_path and rel and by_path.match(rel))
+
+    def skip_size(self, size):
+        return (self.min_size is not None and size < self.min_size) or (self.max_size is not None and size > self.max_size)
+
+def _win_hidden(entry):
+    # the attribute comes with the directory listing on Windows, so this costs no extra stat
+    if entry is None or os.name != "nt": return False
+    try: return bool(entry.stat(follow_symlinks=False).st_file_attributes & 2)
+    except OSError: return False
+
+def parse_size(text):
+    # "500", "64K", "10MB", "2 GB" -> bytes; "" or "0" -> None (no limit)
+    m = re.fullmatch(r"\s*(\d+(?:\.\d+)?)\s*([kmgt]?)b?\s*", str(text or "0"), re.I)
+    if not m: raise ValueError(f"not a size: {text!r}")
+    n = int(float(m.group(1)) * 1024 ** " kmgt".index(m.group(2).lower() or " "))
+    return n or None
+
+def list_dir(d, rules=None):
+    # -> (file entries, subdirectory paths); symlinked directories are neither, as with os.walk.
+    # Entries the rules reject are dropped here, before anyone stats them.
+    files, subdirs = [], []
+    with os.scandir(d) as it:
+        for e in it:
+            try: isdir = e.is_dir()
+            except OSError: isdir = False
+            if rules and rules.skip(e.path, isdir and not e.is_symlink(), e): continue
+            if not isdir: files.append(e)
+            elif not e.is_symlink(): subdirs.append(e.path)
+    return files, subdirs
+
+def _mtime_ns(p):
+    try: return os.stat(p).st_mtime_ns
+    except OSError: return None
+
+def get_scan_state(conn, root=None):
+    # unfinished scans: one row per root, holding the directories still to visit
+    q = "SELECT root, mode, hash_small, pending, done, errors, started FROM scan_state"
+    rows = conn.execute(q + " WHERE root = ?", (root,)) if root else conn.execute(q)
+    out = [{"root": r[0], "update": r[1] == "update", "hash_small": bool(r[2]), "pending": json.loads(r[3]),
+            "done": r[4], "errors": r[5], "started": r[6]} for r in rows]
+    if root is None: return out
+    return out[0] if out else None
+
+def _save_state(conn, root, update, hash_small, pending, done, errors, started=None):
+    conn.execute("INSERT INTO scan_state VALUES (?,?,?,?,?,?,?) ON CONFLICT(root) DO UPDATE SET "
+                 "pending=excluded.pending, done=excluded.done, errors=excluded.errors",
+                 (root, "update" if update else "rebuild", int(hash_small), json.dumps(pending), done, errors,
+                  started or datetime.now().isoformat()))
+
+def discard_scan(conn, root):
+    # forget an unfinished scan of root: its checkpoint, and the shadow table unless another rebuild still needs it
+    conn.execute("DELETE FROM scan_state WHERE root = ?", (root,)); conn.commit()
+    if not conn.execute("SELECT 1 FROM scan_state WHERE mode = 'rebuild'").fetchone(): drop_shadow(conn)
+
+def finish_scan(conn, root, root_id, rebuild):
+    # one transaction: the shadow swap (rebuilds), the root's bookkeeping and the end of its checkpoint
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if rebuild: _swap_tables(conn)
+        # roots inside this one were just rescanned as part of it
+        conn.execute("DELETE FROM roots WHERE path >= ? AND path < ?", _under(root))
+        n, size = conn.execute("SELECT COUNT(*), COALESCE(SUM(size),0) FROM files WHERE root_id = ?", (root_id,)).fetchone()
+        scanned = datetime.now().isoformat() if conn.execute("SELECT path FROM roots WHERE id = ?", (root_id,)).fetchone()[0] == root else None
+        conn.execute("UPDATE roots SET scanned = COALESCE(?, scanned), file_count = ?, total_size = ? WHERE id = ?",
+                     (scanned, n, size, root_id))
+        conn.execute("DELETE FROM scan_state WHERE root = ?", (root,))
+        conn.commit()
+    except Exception: conn.rollback(); raise
+
+def get_roots(conn):
+    out = [dict(zip(("id","path","scanned","file_count","total_size","rules"), r)) for r in
+           conn.execute("SELECT id, path, scanned, file_count, total_size, rules FROM roots ORDER BY path")]
+    for r in out: r["rules"] = IgnoreRules.from_json(r["path"], r["rules"])
+    return out
+
+def set_root_rules(conn, root, rules):
+    # rules for a folder that has not been scanned yet register it as a root already
+    conn.execute("INSERT INTO roots (path, rules) VALUES (?,?) ON CONFLICT(path) DO UPDATE SET rules = excluded.rules",
+                 (os.path.abspath(root), rules.to_json()))
+    conn.commit()
+
+def root_for(roots, path):
+    # the root a path belongs to (the innermost, should roots ever nest)
+    for r in sorted(roots, key=lambda r: -len(r["path"])):
+        if path == r["path"] or path.startswith(os.path.join(r["path"], "")): return r
+    return None
+
+def _claim_root(conn, root):
+    # -> (root_id, nested, rules): a folder inside an existing root is rescanned as part of that root, with its rules
+    r = root_for(get_roots(conn), root)
+    if r: return r["id"], r["path"] != root, r["rules"]
+    conn.execute("INSERT INTO roots (path) VALUES (?)", (root,)); conn.commit()
+    return conn.execute("SELECT id FROM roots WHERE path = ?", (root,)).fetchone()[0], False, IgnoreRules(root)
+
+def remove_root(conn, root):
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        _delete_tree(conn, root)
+        conn.execute("DELETE FROM files WHERE root_id = (SELECT id FROM roots WHERE path = ?)", (root,))
+        conn.execute("DELETE FROM roots WHERE path = ?", (root,)); conn.execute("DELETE FROM scan_state WHERE root = ?", (root,))
+        conn.commit()
+    except Exception: conn.rollback(); raise
+
+@perf.timed("scan")
+def scan(db_path, root, hash_small=False, update=False, resume=False, progress=None, should_stop=None, throttle=None):
+    """Index every file under root, one directory at a time, touching no rows outside it; the root is added
+    to the catalog's roots if it is new. update=True upserts in place and drops rows for files and folders
+    that are gone. update=False asks for a rebuild, done in a shadow table when this root holds at least
+    half the catalog and in place otherwise (rows outside the root would have to be copied). There is one
+    shadow table: a rebuild that starts while another root's rebuild is stopped takes it over, and that
+    root's checkpoint is dropped with it (its next scan starts over).
+    Work is checkpointed in scan_state every CHECKPOINT_ROWS rows / CHECKPOINT_SECS; a stopped or killed
+    scan picks up from there with resume=True (the saved mode and hashing win over the arguments).
+    progress(done, total, status) is called with "scanning", "indexing", "complete"; total is an estimate
+    (the rows the catalog has under root now), 0 when unknown. throttle is a RateLimiter the walk waits on.
+    Returns {"total", "indexed", "errors"}, or None when stopped."""
+    progress = progress or (lambda *a: None); stopped = should_stop or (lambda: False); root = os.path.abspath(root)
+    # a root that is not here (unmounted, or merged in from another machine) keeps its rows rather than losing them all
+    if not os.path.isdir(root): return {"total": 0, "indexed": 0, "errors": 1}
+    conn = connect(db_path); init_schema(conn); lookup = ext_lookup(load_categories(conn))
+    try:
+        state = get_scan_state(conn, root) if resume else None
+        if state and not state["update"] and not conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE name = 'files_new'").fetchone(): state = None
+        root_id, nested, rules = _claim_root(conn, root)
+        total = conn.execute("SELECT COUNT(*) FROM files WHERE path >= ? AND path < ?", _under(root)).fetchone()[0]
+        if state:
+            update, hash_small, stack = state["update"], state["hash_small"], state["pending"]
+            done, errors, started = state["done"], state["errors"], state["started"]
+        else:
+            # the bulk path pays for copying every row outside the root, so it only wins for the bigger share
+            if not update: update = nested or total * 2 < conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+            stack, done, errors, started = [root], 0, 0, datetime.now().isoformat()
+            if not update: begin_shadow(conn, keep_outside=root)
+            _save_state(conn, root, update, hash_small, stack, done, errors, started); conn.commit()
+        sql = UPSERT_SQL if update else INSERT_SQL.format("files_new"); dirs_table = "dirs" if update else "dirs_new"
+        if not update: conn.execute("PRAGMA cache_size=-131072")   # 128 MB page cache for the index sorts
+        rows, dirs, last, shown = [], [], time.monotonic(), done
+        visited, links = set(), {}   # (dev, inode) of directories walked and of hardlinked files hashed
+
+        def checkpoint():
+            nonlocal rows, dirs, last
+            t0 = perf.start()
+            conn.executemany(sql, rows); conn.executemany(f"INSERT OR REPLACE INTO {dirs_table} VALUES (?,?)", dirs)
+            _save_state(conn, root, update, hash_small, stack, done, errors); conn.commit()
+            rows, dirs, last = [], [], time.monotonic(); perf.stop("scan.write", t0)
+
+        progress(done, total, "scanning")
+        while stack and not stopped():
+            d = stack.pop(); t0 = perf.start()
+            if throttle: throttle.wait(1)   # the listing itself; files are charged in blocks below
+            try:
+                dst = os.stat(d)
+                # a folder reached a second time (bind mount, junction, loop through a mount) is walked once
+                if dst.st_ino and (dst.st_dev, dst.st_ino) in visited:
+                    if update: _delete_tree(conn, d)
+                    continue
+                visited.add((dst.st_dev, dst.st_ino)); entries, subdirs = list_dir(d, rules)
+            except OSError: errors += 1; continue
+            here, dropped = [], set()
+            for i, e in enumerate(entries):
+                if i % 500 == 499 and stopped(): break
+                if throttle and i % 64 == 0: throttle.wait(min(64, len(entries) - i))
+                try:
+                    st = e.stat()
+                    if rules.skip_size(st.st_size): dropped.add(e.path); continue
+                    here.append(file_row(e.path, lookup, hash_small, st, root_id, links))
+                except Exception: errors += 1
+            else:
+                for r in [r for r in here if r[2] in ARCHIVE_EXTS]: here += _archive_members(conn, r, update, rules, lookup)
+                perf.stop("scan.dir", t0)
+                if update:
+                    # whatever the catalog still has directly under d but the directory no longer (or may no longer) has
+                    t0 = perf.start(); seen = {e.path for e in entries} - dropped; seen.update(subdirs)
+                    for p in (_children(conn, d, "files") | _children(conn, d, "dirs")) - seen: _delete_tree(conn, p)
+                    perf.stop("scan.prune", t0)
+                rows.extend(here); dirs.append((d, dst.st_mtime_ns)); stack.extend(sorted(subdirs, reverse=True))
+                done += len(here)
+                if done - shown >= 500: shown = done; progress(done, total and max(total, done), "scanning")
+                if len(rows) >= CHECKPOINT_ROWS or time.monotonic() - last >= CHECKPOINT_SECS: checkpoint()
+                continue
+            stack.append(d); break   # stopped inside a directory: it is revisited whole on resume
+        checkpoint()
+        if stack: return None
+        progress(done, done, "indexing")
+        with perf.span("scan.finish"): finish_scan(conn, root, root_id, rebuild=not update)
+        progress(done, done, "complete")
+        return {"total": done + errors, "indexed": done, "errors": errors}
+    except BaseException: conn.rollback(); raise
+    finally: conn.close()
+
+
+
+# ═══════════════════════════════════════════════════════════════
+#  QUERIES
+# ═══════════════════════════════════════════════════════════════
+SORT_ORDER = {"name": "name COLLATE NOCASE", "size": "size DESC", "date": "modified_date DESC"}
+ASCII_LOWER = str.maketrans("ABCDEFGHIJKLMNOPQRSTUVWXYZ", "abcdefghijklmnopqrstuvwxyz")
+_TERM = re.compile(r'(?:([A-Za-z]+):)?("[^"]*"?|\S+)')
+_OPS = {">": operator.gt, ">=": operator.ge, "<": operator.lt, "<=": operator.le, "=": operator.eq}
+
+def like_matches(query, text):
+    # same test as SQL "text LIKE %query%": _ is one character, % any run, ASCII-only case folding
+    q = query.translate(ASCII_LOWER)
+    rx = ".*".join(".".join(re.escape(p) for p in part.split("_")) for part in q.split("%"))
+    return re.search(rx, text.translate(ASCII_LOWER), re.S) is not None
+
+def _period(s):
+    # "2026-03-14" / "2026-03" / "2026" / "today" / "30d", "6w", "3m", "1y" (that long ago) -> [start, end) as ISO text
+    s = s.strip().lower(); now = datetime.now()
+    m = re.fullmatch(r"(\d+)([dwmy])", s)
+    if m:
+        t = (now - timedelta(days=int(m.group(1)) * {"d": 1, "w": 7, "m": 30, "y": 365}[m.group(2)])).isoformat()
+        return t, t
+    if s in ("today", "yesterday"):
+        d = datetime.combine(now.date(), datetime.min.time()) - timedelta(days=s == "yesterday")
+        return d.isoformat(), (d + timedelta(days=1)).isoformat()
+    for fmt in ("%Y-%m-%d", "%Y-%m", "%Y"):
+        try: d = datetime.strptime(s, fmt)
+        except ValueError: continue
+        if fmt == "%Y-%m-%d": end = d + timedelta(days=1)
+        elif fmt == "%Y-%m": end = d.replace(year=d.year + d.month // 12, month=d.month % 12 + 1)
+        else: end = d.replace(year=d.year + 1)
+        return d.isoformat(), end.isoformat()
+    raise ValueError(f"not a date: {s!r}")
+
+def _range(val, point):
+    # ">2GB", "<=2026-01", "10MB..1GB", "2026" -> [(op, value)]; point(text) gives the value's [start, end)
+    if ".." in val:
+        a, b = val.split("..", 1)
+        return ([(">=", point(a)[0])] if a else []) + ([("<", point(b)[1])] if b else [])
+    op = re.match(r"(>=|<=|>|<|=)?", val).group(1) or "="; lo, hi = point(val[len(op) if val[:1] in "<>=" else 0:])
+    return {">": [(">=", hi)], ">=": [(">=", lo)], "<": [("<", lo)], "<=": [("<", hi)]}.get(op, [(">=", lo), ("<", hi)])
+
+RESOLUTIONS = {"720p": (1280, 720), "1080p": (1920, 1080), "1440p": (2560, 1440), "2160p": (3840, 2160),
+               "4k": (3840, 2160), "8k": (7680, 4320)}
+
+def _resolution(s):
+    # "1920x1080" / "4k" -> (width, height)
+    s = s.strip().lower()
+    if s in RESOLUTIONS: return RESOLUTIONS[s]
+    m = re.fullmatch(r"(\d+)[x×](\d+)", s)
+    if not m: raise ValueError(f"not a resolution: {s!r}")
+    return int(m.group(1)), int(m.group(2))
+
+def _seconds(s):
+    # "90", "90s", "1.5m", "2h", "1:30", "1:02:03" -> seconds
+    s = s.strip().lower()
+    if ":" in s:
+        t = 0.0
+        for part in s.split(":"): t = t * 60 + float(part)
+        return t
+    m = re.fullmatch(r"(\d+(?:\.\d+)?)\s*(s|sec|m|min|h|hr)?", s)
+    if not m: raise ValueError(f"not a duration: {s!r}")
+    return float(m.group(1)) * {"m": 60, "min": 60, "h": 3600, "hr": 3600}.get(m.group(2), 1)
+
+class Query:
+    """The search box syntax. Free text matches file names (SQL LIKE, so _ and % are wildcards); field:value terms
+    narrow the result and everything is ANDed:
+        ext:mov,mp4   cat:video   size:>2GB   size:10MB..1GB   modified:>=2026-01-01   modified:2025-06
+        modified:>30d   path:/projects/clientX (everything under it; path:word matches anywhere)   name:word
+    and, once enrich() has probed the files: width:>=1920  height:<720  res:>=1920x1080  duration:>2m
+        duration:10s..1:30  fps:>=50  codec:prores,hevc  font:roboto
+        res:4k  res:1920x1080 (at least that wide or that high; res:=1920x1080 is that exact frame)
+    and, in a merged catalog: machine:ws-03,ws-04 (the label merge() gave the rows; any ASCII case, like NOCASE)
+    Every predicate compiles to parameterised SQL one of FILES_INDEXES can serve; matches() is the same test
+    in Python, for rows that arrive without a query. A term with an unknown field or a bad value is plain text."""
+    FIELDS = {"ext": "ext", "extension": "ext", "cat": "cat", "category": "cat", "size": "size", "modified": "mtime",
+              "mtime": "mtime", "date": "mtime", "path": "path", "in": "path", "name": "name", "width": "width",
+              "height": "height", "res": "res", "resolution": "res", "duration": "duration", "length": "duration",
+              "fps": "fps", "codec": "codec", "font": "family", "family": "family", "machine": "machine", "from": "machine"}
+
+    def __init__(self, text, categories=()):
+        self.text, self.path_text, self.sets, self.ranges = [], [], [], []
+        self.media, self.media_text = [], []   # ranges over media columns; (column, prefixes)
+        for m in _TERM.finditer(text or ""):
+            field, val = self.FIELDS.get((m.group(1) or "").lower()), m.group(2).strip('"')
+            try:
+                if not field or not val: self.text.append(m.group(0).strip('"'))
+                elif field == "name": self.text.append(val)
+                elif field == "ext": self.sets.append(("extension", {"." + e.strip().lstrip(".").lower() for e in val.split(",") if e.strip()}))
+                elif field == "cat":
+                    # a prefix of a category name, any case: cat:video is every "Videos - …" category
+                    want = [v.strip().lower() for v in val.split(",") if v.strip()]
+                    self.sets.append(("category", {c for c in categories if any(c.lower().startswith(w) for w in want)}
+                                      or set(val.split(","))))
+                elif field == "size":
+                    size = lambda v: ((parse_size(v) or 0), (parse_size(v) or 0) + 1)   # a size is a one-byte "period"
+                    self.ranges += [("size", op, v) for op, v in _range(val, size)]
+                elif field == "mtime": self.ranges += [("modified_date", op, v) for op, v in _range(val, _period)]
+                elif field in ("width", "height"): self.media += [(field, op, v) for op, v in _range(val, lambda t: (int(t), int(t) + 1))]
+                elif field == "res" and not re.match(r"[<>=]|.*\.\.", val):
+                    # a bare size is a class, not a frame: res:4k is anything reaching 3840 wide or 2160 high,
+                    # so DCI 4096x2160, 3996x2160 flat, 4096x1716 scope and portrait 2160x3840 all count
+                    self.media.append(("res", ">=", _resolution(val)))
+                elif field == "res":
+                    for i, col in enumerate(("width", "height")):
+                        self.media += [(col, op, v) for op, v in _range(val, lambda t: (_resolution(t)[i], _resolution(t)[i] + 1))]
+                elif field == "duration": self.media += [("duration", op, v) for op, v in _range(val, lambda t: (_seconds(t), _seconds(t) + 1))]
+                elif field == "fps": self.media += [("fps", op, v) for op, v in _range(val, lambda t: (float(t) - 0.5, float(t) + 0.5))]
+                elif field == "machine": self.sets.append(("machine", {v.strip().translate(ASCII_LOWER) for v in val.split(",") if v.strip()}))
+                elif field in ("codec", "family"): self.media_text.append((field, [v.strip() for v in val.split(",") if v.strip()]))
+                elif os.path.isabs(os.path.expanduser(val)):
+                    lo, hi = _under(os.path.abspath(os.path.expanduser(val)))
+                    self.ranges += [("path", ">=", lo), ("path", "<", hi)]
+                else: self.path_text.append(val)
+            except ValueError: self.text.append(m.group(0).strip('"'))
+
+    def __bool__(self): return bool(self.text or self.path_text or self.sets or self.ranges or self.media or self.media_text)
+
+    def sql(self):
+        # -> (list of WHERE terms, params)
+        where, params = [], []
+        for t in self.text: where.append("name LIKE ? COLLATE NOCASE"); params.append(f"%{t}%")
+        for col, vals in self.sets: where.append(f"{col} IN ({','.join('?' * len(vals))})"); params += sorted(vals)
+        for col, op, v in self.ranges:
+            # ranges are hinted as selective; the planner can't size them and would otherwise walk the sort's index
+            where.append(f"likelihood({col} {op} ?, 0.05)"); params.append(v)
+        for t in self.path_text: where.append("path LIKE ?"); params.append(f"%{t}%")
+        if self.media or self.media_text:
+            terms = [f"likelihood({col} {op} ?, 0.05)" if col != "res" else "(width >= ? OR height >= ?)" for col, op, _ in self.media]
+            params += [x for *_, v in self.media for x in (v if isinstance(v, tuple) else (v,))]
+            for col, vals in self.media_text:
+                terms.append("(" + " OR ".join(f"{col} LIKE ?" for _ in vals) + ")"); params += [f"{v}%" for v in vals]
+            where.append(f"id IN (SELECT file_id FROM media WHERE {' AND '.join(terms)})")
+        return where, params
+
+    def matches(self, f):
+        # files arriving from a scan or the watcher have not been probed yet, so no media term can match them
+        return (not (self.media or self.media_text) and all(like_matches(t, f["name"]) for t in self.text) and all(like_matches(t, f["path"]) for t in self.path_text)
+                and all((f.get(col) or "").translate(ASCII_LOWER) in vals if col == "machine" else f.get(col) in vals for col, vals in self.sets)
+                and all(f[col] is not None and _OPS[op](f[col], v) for col, op, v in self.ranges))
+
+def search_where(conn, query="", category=None, extension=None):
+    # -> (WHERE clause, params) for search box text plus the sidebar category and extension filters
+    where, params = Query(query, load_categories(conn)).sql()
+    if category and category != "All": where.append("category = ?"); params.append(category)
+    if extension: where.append("extension = ?"); params.append(extension)
+    return " AND ".join(where) or "1=1", params
+
+def search_cursor(conn, fields=",".join(ROW_KEYS), query="", category=None, extension=None, sort="name"):
+    # every match in sort order; iterating the cursor streams the rows, nothing is fetched up front
+    w, params = search_where(conn, query, category, extension)
+    return conn.execute(f"SELECT {fields} FROM files WHERE {w} ORDER BY {SORT_ORDER.get(sort, SORT_ORDER['name'])}", params)
+
+def search(conn, query="", category=None, extension=None, limit=120, offset=0, sort="name", count=True):
+    # -> (one page of rows as dicts, total matches; None with count=False)
+    w, params = search_where(conn, query, category, extension); order = SORT_ORDER.get(sort, SORT_ORDER["name"])
+    rows = conn.execute(f"SELECT {','.join(ROW_KEYS)} FROM files WHERE {w} ORDER BY {order} LIMIT ? OFFSET ?", params + [limit, offset]).fetchall()
+    total = conn.execute(f"SELECT COUNT(*) FROM files WHERE {w}", params).fetchone()[0] if count else None
+    return [dict(zip(ROW_KEYS, r)) for r in rows], total
+
+def category_totals(conn):
+    return [{"category": r[0], "count": r[1], "size": r[2]} for r in
+            conn.execute("SELECT category, COUNT(*), COALESCE(SUM(size),0) FROM files GROUP BY category")]
+
+def stats(conn, top_extensions=30):
+    tf, ts = conn.execute("SELECT COUNT(*), COALESCE(SUM(size),0) FROM files").fetchone()
+    by_ext = conn.execute("SELECT extension, COUNT(*) FROM files GROUP BY extension ORDER BY COUNT(*) DESC LIMIT ?", (top_extensions,))
+    by_machine = conn.execute("SELECT machine, COUNT(*), COALESCE(SUM(size),0) FROM files WHERE machine IS NOT NULL GROUP BY machine")
+    return {"total_files": tf or 0, "total_size": ts or 0, "by_category": category_totals(conn),
+            "by_extension": [{"extension": r[0], "count": r[1]} for r in by_ext],
+            "by_machine": [{"machine": r[0], "count": r[1], "size": r[2]} for r in by_machine]}
+
+def iter_duplicates(conn):
+    # groups of identical files, streamed: same content hash, or the same inode (hardlinks are duplicates whether or
+    # not anyone hashed them); copies counts distinct inodes, so hardlinks (every path one inode) free nothing
+    # (inode numbers only mean something on the machine that scanned them, so merged rows are keyed by machine too)
+    cur = conn.execute("""SELECT COALESCE(file_hash, 'inode:'||COALESCE(machine,'')||':'||dev||':'||inode) AS k, COUNT(*),
+        GROUP_CONCAT(path,'||'), COUNT(DISTINCT COALESCE(COALESCE(machine,'')||':'||dev||':'||inode, path)), MAX(size)
+        FROM files WHERE file_hash IS NOT NULL OR inode IS NOT NULL GROUP BY k HAVING COUNT(*)>1""")
+    for r in cur: yield {"hash": r[0], "count": r[1], "paths": r[2].split("||"), "hardlinks": r[3] == 1, "copies": r[3], "size": r[4] or 0}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  SIMILAR IMAGES
+# ═══════════════════════════════════════════════════════════════
+# files.phash holds a 64-bit perceptual hash (the desktop app computes a difference hash from the decoded
+# thumbnail); SQLite integers are signed, so it is stored as int64 and handed around unsigned
+_popcount = getattr(int, "bit_count", None) or (lambda x: bin(x).count("1"))
+
+@functools.lru_cache(maxsize=None)
+def _numpy():
+    # -> (numpy, per-byte popcount table), or None; optional, imported by the first SimilarityIndex
+    try: import numpy as np
+    except ImportError: return None
+    return np, np.array([bin(i).count("1") for i in range(256)], np.uint8)
+
+def _signed(h): return h - (1 << 64) if h >= 1 << 63 else h
+def _unsigned(h): return h & 0xFFFFFFFFFFFFFFFF
+
+# skip: ids of images that would not decode, left out of both (one JSON parameter, however many there are)
+_PHASH_TODO = "FROM files WHERE phash IS NULL AND extension IN ({}) AND id NOT IN (SELECT value FROM json_each(?))"
+
+def phash_todo(conn, exts, after=0, limit=256, skip=()):
+    # -> [(id, path, extension)] of images without a hash, in id order from after
+    return conn.execute(f"SELECT id, path, extension {_PHASH_TODO.format(','.join('?' * len(exts)))} AND id > ? ORDER BY id LIMIT ?",
+                        (*exts, json.dumps(sorted(skip)), after, limit)).fetchall()
+
+def phash_pending(conn, exts, skip=()):
+    return conn.execute(f"SELECT COUNT(*) {_PHASH_TODO.format(','.join('?' * len(exts)))}", (*exts, json.dumps(sorted(skip)))).fetchone()[0]
+
+def set_phashes(conn, pairs):
+    # -> the pairs written; a row that already has a hash keeps it, and with nothing to write nothing is
+    pairs = list(pairs); todo = set()
+    for i in range(0, len(pairs), 900):
+        ids = [fid for fid, _ in pairs[i:i+900]]
+        todo.update(r[0] for r in conn.execute(f"SELECT id FROM files WHERE phash IS NULL AND id IN ({','.join('?' * len(ids))})", ids))
+    pairs = [(fid, h) for fid, h in pairs if fid in todo]
+    if pairs: conn.executemany("UPDATE files SET phash = ? WHERE id = ? AND phash IS NULL", [(_signed(h), fid) for fid, h in pairs]); conn.commit()
+    return pairs
+
+def get_phash(conn, fid):
+    r = conn.execute("SELECT phash FROM files WHERE id = ?", (fid,)).fetchone()
+    return None if not r or r[0] is None else _unsigned(r[0])
+
+def load_phashes(conn):
+    return ((fid, _unsigned(h)) for fid, h in conn.execute("SELECT id, phash FROM files WHERE phash IS NOT NULL"))
+
+class SimilarityIndex:
+    """Hamming-distance lookup over (id, hash) pairs. With NumPy a query XORs every hash at once and counts bits
+    through a byte table (about 0.25 s to build and 40 ms a query over 500k hashes); without it the hashes go into
+    a BK-tree, which only descends into children whose edge distance is within reach of the query (about 5 s to
+    build and 0.3-0.5 s a query at distance 8 over 500k hashes). add() takes new hashes in without a rebuild."""
+    def __init__(self, items):
+        items = list(items); self.size = len(items); self._np = _numpy()
+        if self._np is not None:
+            np = self._np[0]
+            self._ids = np.fromiter((i for i, _ in items), np.int64, len(items))
+            self._hashes = np.fromiter((h for _, h in items), np.uint64, len(items))
+            return
+        self._root = None
+        for fid, h in items: self._add(h, fid)
+
+    def add(self, items):
+        items = list(items); self.size += len(items)
+        if self._np is not None:
+            np = self._np[0]
+            self._ids = np.concatenate((self._ids, np.fromiter((i for i, _ in items), np.int64, len(items))))
+            self._hashes = np.concatenate((self._hashes, np.fromiter((h for _, h in items), np.uint64, len(items))))
+            return
+        for fid, h in items: self._add(h, fid)
+
+    def _add(self, h, fid):
+        # node: [hash, [ids], {distance: child}]
+        if self._root is None: self._root = [h, [fid], {}]; return
+        node = self._root
+        while True:
+            d = _popcount(node[0] ^ h)
+            if d == 0: node[1].append(fid); return
+            child = node[2].get(d)
+            if child is None: node[2][d] = [h, [fid], {}]; return
+            node = child
+
+    def near(self, h, max_distance=PHASH_DISTANCE):
+        # -> [(distance, id)] nearest first
+        if self._np is not None:
+            if not self.size: return []
+            np, pop8 = self._np
+            dist = pop8[(self._hashes ^ np.uint64(h)).view(np.uint8)].reshape(-1, 8).sum(1)
+            hit = np.nonzero(dist <= max_distance)[0]
+            return sorted(zip(dist[hit].tolist(), self._ids[hit].tolist()))
+        out, stack = [], [self._root] if self._root else []
+        while stack:
+            node = stack.pop(); d = _popcount(node[0] ^ h)
+            if d <= max_distance: out.extend((d, fid) for fid in node[1])
+            stack.extend(c for k, c in node[2].items() if d - max_distance <= k <= d + max_distance)
+        return sorted(out)
+
+
+# ═══════════════════════════════════════════════════════════════
+#  MEDIA METADATA
+# ═══════════════════════════════════════════════════════════════
+# Common containers are read straight from their headers (a few small reads, no decoding); anything else goes to
+# ffprobe when it is on PATH. probe_media runs in enrich()'s process pool, so it must stay a plain module function.
+_FOURCC = {"avc1": "h264", "avc3": "h264", "hvc1": "hevc", "hev1": "hevc", "mp4v": "mpeg4", "av01": "av1", "vp09": "vp9",
+           "apch": "prores", "apcn": "prores", "apcs": "prores", "apco": "prores", "ap4h": "prores", "jpeg": "mjpeg",
+           "mp4a": "aac", "ac-3": "ac3", "ec-3": "eac3", "alac": "alac", "opus": "opus", "lpcm": "pcm", "sowt": "pcm",
+           "twos": "pcm", "in24": "pcm", "fl32": "pcm_float"}
+_WAV_CODECS = {1: "pcm", 2: "adpcm", 3: "pcm_float", 0x11: "adpcm", 0x55: "mp3", 0xFFFE: "pcm"}
+_MP3_RATES = {3: (44100, 48000, 32000), 2: (22050, 24000, 16000), 0: (11025, 12000, 8000)}   # by version bits
+_MP3_KBPS = {(3, 1): (0,32,64,96,128,160,192,224,256,288,320,352,384,416,448), (3, 2): (0,32,48,56,64,80,96,112,128,160,192,224,256,320,384),
+             (3, 3): (0,32,40,48,56,64,80,96,112,128,160,192,224,256,320), (2, 1): (0,32,48,56,64,80,96,112,128,144,160,176,192,224,256),
+             (2, 2): (0,8,16,24,32,40,48,56,64,80,96,112,128,144,160), (2, 3): (0,8,16,24,32,40,48,56,64,80,96,112,128,144,160)}   # (version, layer)
+_ffprobe_exe = False
+
+def probe_media(path, ext):
+    # -> dict of MEDIA_COLUMNS found; {} when the file is not readable or the format is not understood
+    ext = ext.lower()
+    try:
+        with open(path, "rb") as f:
+            head = f.read(64)
+            if ext in (".ttf", ".otf", ".woff"): return _font_info(f, head)
+            if head[:8] == b"\x89PNG\r\n\x1a\n": return dict(zip(("width", "height"), struct.unpack(">II", head[16:24])))
+            if head[:6] in (b"GIF87a", b"GIF89a"): return dict(zip(("width", "height"), struct.unpack("<HH", head[6:10])))
+            if head[:2] == b"BM": w, h = struct.unpack("<ii", head[18:26]); return {"width": w, "height": abs(h)}
+            if head[:4] == b"8BPS": h, w = struct.unpack(">II", head[14:22]); return {"width": w, "height": h}
+            if head[:4] == b"RIFF" and head[8:12] == b"WEBP": return _webp_info(head)
+            if head[:2] == b"\xff\xd8": return _jpeg_info(f)
+            if head[:4] == b"RIFF" and head[8:12] == b"WAVE": return _wav_info(f)
+            if head[:4] == b"fLaC": return _flac_info(head)
+            if head[4:8] in (b"ftyp", b"moov", b"mdat", b"free", b"wide", b"skip"): info = _mp4_info(f)
+            elif ext == ".mp3": info = _mp3_info(f, head)
+            else: info = {}
+    except (OSError, struct.error, ValueError, IndexError, zlib.error): return {}
+    if info: return info
+    if ext in (".tiff", ".tif", ".ico", ".psb"): return _pil_info(path)
+    return _ffprobe(path)
+
+def _pil_info(path):
+    try: from PIL import Image
+    except ImportError: return {}
+    try:
+        with Image.open(path) as im: return {"width": im.size[0], "height": im.size[1]}
+    except Exception: return {}
+
+def _webp_info(head):
+    kind = head[12:16]
+    if kind == b"VP8 ": w, h = struct.unpack("<HH", head[26:30]); return {"width": w & 0x3FFF, "height": h & 0x3FFF}
+    if kind == b"VP8L": b = int.from_bytes(head[21:25], "little"); return {"width": (b & 0x3FFF) + 1, "height": (b >> 14 & 0x3FFF) + 1}
+    if kind == b"VP8X": return {"width": int.from_bytes(head[24:27], "little") + 1, "height": int.from_bytes(head[27:30], "little") + 1}
+    return {}
+
+def _jpeg_info(f):
+    # walk the marker segments up to the first start-of-frame
+    f.seek(2)
+    while True:
+        b = f.read(1)
+        while b and b != b"\xff": b = f.read(1)
+        while b == b"\xff": b = f.read(1)
+        if not b or b in (b"\xd9", b"\xda"): return {}
+        n = struct.unpack(">H", f.read(2))[0]
+        if 0xC0 <= b[0] <= 0xCF and b[0] not in (0xC4, 0xC8, 0xCC):
+            h, w = struct.unpack(">xHH", f.read(5)); return {"width": w, "height": h}
+        f.seek(n - 2, 1)
+
+def _wav_info(f):
+    f.seek(12); info = {}; rate = 0
+    while True:
+        hdr = f.read(8)
+        if len(hdr) < 8: return info
+        kind, n = struct.unpack("<4sI", hdr)
+        if kind == b"fmt ":
+            tag, ch, sr, rate = struct.unpack("<HHII", f.read(12)); f.seek(n - 12 + (n & 1), 1)
+            info.update(codec=_WAV_CODECS.get(tag, "wav"), channels=ch, sample_rate=sr)
+        elif kind == b"data":
+            if rate: info["duration"] = n / rate
+            return info
+        else: f.seek(n + (n & 1), 1)
+
+def _flac_info(head):
+    # STREAMINFO: 20 bits rate, 3 bits channels-1, 5 bits bits-per-sample-1, 36 bits total samples
+    x = int.from_bytes(head[18:26], "big"); rate = x >> 44
+    return {"codec": "flac", "sample_rate": rate, "channels": (x >> 41 & 7) + 1,
+            "duration": (x & (1 << 36) - 1) / rate if rate else None}
+
+def _mp3_info(f, head):
+    start = 0
+    if head[:3] == b"ID3": start = 10 + sum((b & 0x7F) << (7 * (3 - i)) for i, b in enumerate(head[6:10]))
+    f.seek(start); buf = f.read(4096)
+    i = next((i for i in range(len(buf) - 4) if buf[i] == 0xFF and buf[i + 1] & 0xE0 == 0xE0), None)
+    if i is None: return {}
+    h = int.from_bytes(buf[i:i + 4], "big"); ver, layer = h >> 19 & 3, 4 - (h >> 17 & 3)
+    kbps = _MP3_KBPS.get((3 if ver == 3 else 2, layer), (0,) * 15)[h >> 12 & 15] if (h >> 12 & 15) < 15 else 0
+    rate = _MP3_RATES.get(ver, (0, 0, 0))[h >> 10 & 3] if (h >> 10 & 3) < 3 else 0
+    if not rate: return {}
+    ch = 1 if (h >> 6 & 3) == 3 else 2; info = {"codec": "mp3", "sample_rate": rate, "channels": ch}
+    per_frame = 1152 if layer == 3 and ver == 3 or layer == 2 else 576 if layer == 3 else 384
+    xing = max(buf.find(b"Xing", i), buf.find(b"Info", i))
+    if 0 < xing < i + 64 and int.from_bytes(buf[xing + 4:xing + 8], "big") & 1:   # VBR header with a frame count
+        info["duration"] = int.from_bytes(buf[xing + 8:xing + 12], "big") * per_frame / rate
+    elif kbps: info["duration"] = (os.fstat(f.fileno()).st_size - start - i) * 8 / (kbps * 1000)
+    return info
+
+def _boxes(f, end):
+    # ISO base media boxes between the current position and end -> (type, payload end); the reader is left at the payload
+    while f.tell() + 8 <= end:
+        start = f.tell(); size, kind = struct.unpack(">I4s", f.read(8))
+        if size == 1: size = struct.unpack(">Q", f.read(8))[0]
+        elif size == 0: size = end - start
+        if size < 8: return
+        yield kind, start + size
+        f.seek(start + size)
+
+def _mp4_info(f):
+    f.seek(0); end = os.fstat(f.fileno()).st_size; info = {}
+    for kind, b in _boxes(f, end):
+        if kind != b"moov": continue
+        tracks = []
+        for sub, sb in _boxes(f, b):
+            if sub == b"mvhd":
+                v = f.read(4)[0]; f.seek(16 if v else 8, 1)
+                scale, dur = struct.unpack(">IQ" if v else ">II", f.read(12 if v else 8))
+                if scale: info["duration"] = dur / scale
+            elif sub == b"trak": t = {}; _mp4_track(f, sb, t); tracks.append(t)
+        for t in tracks:
+            if t.get("type") == b"vide" and "width" not in info:
+                info.update(width=t.get("width"), height=t.get("height"), codec=t.get("codec"))
+                if t.get("scale") and t.get("dur"): info["fps"] = round(t.get("samples", 0) * t["scale"] / t["dur"], 3) or None
+            elif t.get("type") == b"soun" and "sample_rate" not in info:
+                info.update(sample_rate=t.get("rate"), channels=t.get("channels"))
+                info.setdefault("codec", t.get("codec"))
+        return info
+    return info
+
+def _mp4_track(f, end, t):
+    for kind, b in _boxes(f, end):
+        if kind in (b"mdia", b"minf", b"stbl"): _mp4_track(f, b, t)
+        elif kind == b"tkhd": f.seek(b - 8); w, h = struct.unpack(">II", f.read(8)); t.update(width=w >> 16, height=h >> 16)
+        elif kind == b"mdhd":
+            v = f.read(4)[0]; f.seek(16 if v else 8, 1)
+            t["scale"], t["dur"] = struct.unpack(">IQ" if v else ">II", f.read(12 if v else 8))
+        elif kind == b"hdlr": f.seek(8, 1); t["type"] = f.read(4)
+        elif kind == b"stsd":
+            e = f.read(8 + 36)[8:]   # first sample entry; audio entries carry channels and rate
+            if len(e) >= 8: fcc = e[4:8].decode("latin-1"); t["codec"] = _FOURCC.get(fcc.lower(), fcc.strip().lower())
+            if len(e) >= 36: t["channels"] = struct.unpack(">H", e[24:26])[0]; t["rate"] = struct.unpack(">I", e[32:36])[0] >> 16
+        elif kind == b"stts":
+            n = struct.unpack(">4xI", f.read(8))[0]
+            t["samples"] = sum(c for c, _ in struct.iter_unpack(">II", f.read(8 * n)))
+
+def _font_info(f, head):
+    # the 'name' table: typographic family (16) if present, else family (1); Windows (UTF-16) names preferred
+    if head[:4] == b"wOFF":
+        n = struct.unpack(">H", head[12:14])[0]; f.seek(44)
+        for _ in range(n):
+            tag, off, clen, olen = struct.unpack(">4sIII4x", f.read(20))
+            if tag == b"name":
+                f.seek(off); data = f.read(clen)
+                return _name_family(zlib.decompress(data) if clen < olen else data)
+        return {}
+    n = struct.unpack(">H", head[4:6])[0]; f.seek(12)
+    for _ in range(n):
+        tag, off, ln = struct.unpack(">4s4xII", f.read(16))
+        if tag == b"name": f.seek(off); return _name_family(f.read(ln))
+    return {}
+
+def _name_family(data):
+    count, strings = struct.unpack(">2xHH", data[:6]); best = None
+    for i in range(count):
+        plat, enc, lang, nid, ln, off = struct.unpack(">HHHHHH", data[6 + 12 * i:18 + 12 * i])
+        if nid not in (1, 16) or plat not in (1, 3): continue
+        raw = data[strings + off:strings + off + ln]
+        name = raw.decode("utf-16-be" if plat == 3 else "mac_roman", "replace").strip()
+        rank = (nid == 16, plat == 3, lang in (0, 0x409))
+        if name and (best is None or rank > best[0]): best = (rank, name)
+    return {"family": best[1]} if best else {}
+
+def _ffprobe(path):
+    global _ffprobe_exe
+    if _ffprobe_exe is False: _ffprobe_exe = shutil.which("ffprobe")
+    if not _ffprobe_exe: return {}
+    import subprocess
+    try:
+        out = subprocess.run([_ffprobe_exe, "-v", "error", "-print_format", "json", "-show_format", "-show_streams", path],
+                             capture_output=True, timeout=30).stdout
+        d = json.loads(out or b"{}")
+    except (OSError, ValueError, subprocess.SubprocessError): return {}
+    info = {}
+    try: info["duration"] = float(d.get("format", {}).get("duration"))
+    except (TypeError, ValueError): pass
+    for st in d.get("streams", []):
+        if st.get("codec_type") == "video" and "width" not in info and not st.get("disposition", {}).get("attached_pic"):
+            info.update(width=st.get("width"), height=st.get("height"), codec=st.get("codec_name"))
+            num, _, den = (st.get("avg_frame_rate") or "0/0").partition("/")
+            if num.isdigit() and den.isdigit() and int(den): info["fps"] = round(int(num) / int(den), 3)
+        elif st.get("codec_type") == "audio" and "sample_rate" not in info:
+            info.update(sample_rate=int(st.get("sample_rate") or 0) or None, channels=st.get("channels"))
+            info.setdefault("codec", st.get("codec_name"))
+    return info
+
+def _probe_job(job): return probe_media(*job)
+
+_MEDIA_TODO = ("FROM files f LEFT JOIN media m ON m.file_id = f.id WHERE f.extension IN ({}) "
+               "AND (m.file_id IS NULL OR m.size IS NOT f.size OR m.mtime IS NOT f.modified_date)")
+
+@perf.timed("enrich")
+def enrich(db_path, progress=None, should_stop=None, workers=None):
+    """Probes media files that are new or changed since they were last probed into the media table, in a process
+    pool. Files that yield nothing still get a row, so they are not probed again until they change. -> files probed"""
+    conn = connect(db_path); init_schema(conn); stopped = should_stop or (lambda: False)
+    conn.execute("DELETE FROM media WHERE file_id NOT IN (SELECT id FROM files)"); conn.commit()
+    exts = sorted(MEDIA_EXTS); todo = _MEDIA_TODO.format(",".join("?" * len(exts)))
+    total = conn.execute(f"SELECT COUNT(*) {todo}", exts).fetchone()[0]; done = last = 0; pool = None
+    if total > ENRICH_INLINE:
+        import multiprocessing; from concurrent.futures import ProcessPoolExecutor
+        # spawn, not fork: the desktop app calls this from a thread of a Qt process
+        pool = ProcessPoolExecutor(max_workers=workers or min(8, os.cpu_count() or 1), mp_context=multiprocessing.get_context("spawn"))
+    try:
+        while not stopped():
+            rows = conn.execute(f"SELECT f.id, f.path, f.extension, f.size, f.modified_date {todo} AND f.id > ? ORDER BY f.id LIMIT ?",
+                                (*exts, last, ENRICH_BATCH)).fetchall()
+            if not rows: break
+            jobs = [(r[1], r[2]) for r in rows]
+            infos = pool.map(_probe_job, jobs, chunksize=8) if pool else map(_probe_job, jobs)
+            conn.executemany(f"INSERT OR REPLACE INTO media (file_id,size,mtime,{','.join(MEDIA_COLUMNS)}) "
+                             f"VALUES (?,?,?,{','.join('?' * len(MEDIA_COLUMNS))})",
+                             [(r[0], r[3], r[4], *(info.get(c) for c in MEDIA_COLUMNS)) for r, info in zip(rows, infos)])
+            conn.commit(); done += len(rows); last = rows[-1][0]
+            if progress: progress(done, total)
+    finally:
+        if pool: pool.shutdown(cancel_futures=True)
+        conn.close()
+    return done
+
+def get_media(conn, fid):
+    r = conn.execute(f"SELECT {','.join(MEDIA_COLUMNS)} FROM media WHERE file_id = ?", (fid,)).fetchone()
+    return {k: v for k, v in zip(MEDIA_COLUMNS, r) if v is not None} if r else {}
+
+
+# ═══════════════════════════════════════════════════════════════
+#  EXPORT
+# ═══════════════════════════════════════════════════════════════
+EXPORT_FORMATS = {".csv": "CSV", ".jsonl": "JSON Lines", ".db": "EAM catalog"}
+CSV_HEADER = ["Name", "Path", "Extension", "Category", "Size", "Modified", "Created"]
+JSON_KEYS = ("name", "path", "extension", "category", "size", "modified_date", "created_date", "file_hash")
+
+@perf.timed("export")
+def export(db_path, out_path, query="", category=None, extension=None, sort="name", progress=None, should_stop=None):
+    """Write the files a search matches to out_path, as CSV, JSON Lines or a standalone catalog (.db) going by its
+    extension. Rows stream from the cursor a batch at a time, so memory stays flat whatever the size. The file is
+    written as <out_path>.part and renamed when complete; a stopped or failed export leaves nothing behind.
+    progress(done, total) is called after every batch. Returns the number of rows written, or None when stopped."""
+    ext = os.path.splitext(str(out_path))[1].lower()
+    if ext not in EXPORT_FORMATS: raise ValueError(f"can't export to {ext or 'a file without extension'}: use .csv, .jsonl or .db")
+    progress = progress or (lambda *a: None); stopped = should_stop or (lambda: False)
+    conn = connect(db_path); init_schema(conn); tmp = f"{out_path}.part"; n = 0
+    try:
+        w, params = search_where(conn, query, category, extension)
+        total = conn.execute(f"SELECT COUNT(*) FROM files WHERE {w}", params).fetchone()[0]
+        cur = search_cursor(conn, ROW_FIELDS, query, category, extension, sort)
+
+        def batches():
+            nonlocal n
+            while not stopped():
+                rows = cur.fetchmany(UPSERT_BATCH)
+                if not rows: return
+                yield rows
+                n += len(rows); progress(n, total)
+
+        progress(0, total)
+        if ext == ".db": _export_catalog(conn, tmp, batches(), stopped)
+        else:
+            with open(tmp, "w", newline="", encoding="utf-8") as f:
+                out = csv.writer(f) if ext == ".csv" else None
+                if out: out.writerow(CSV_HEADER)
+                for rows in batches():
+                    if out: out.writerows(r[:7] for r in rows)
+                    else: f.writelines(json.dumps(dict(zip(JSON_KEYS, r)), ensure_ascii=False) + "\n" for r in rows)
+        if stopped(): _remove_db_files(tmp); return None
+        os.replace(tmp, out_path)
+        return n
+    except BaseException: _remove_db_files(tmp); raise
+    finally: conn.close()
+
+def _export_catalog(src, path, batches, stopped):
+    # a catalog of its own: the rows (bulk-loaded under new ids), the categories, and the roots they came from
+    _remove_db_files(path); out = connect(path); init_schema(out)
+    try:
+        if bulk_load(out, (r for rows in batches for r in rows), stopped) is None: return
+        out.execute("DELETE FROM categories")
+        out.executemany("INSERT INTO categories (name, extensions) VALUES (?,?)", src.execute("SELECT name, extensions FROM categories"))
+        used = {r[0] for r in out.execute("SELECT DISTINCT root_id FROM files")}
+        out.executemany("INSERT INTO roots (id, path, scanned, rules) VALUES (?,?,?,?)",
+                        [r for r in src.execute("SELECT id, path, scanned, rules FROM roots") if r[0] in used])
+        out.execute("""UPDATE roots SET file_count = (SELECT COUNT(*) FROM files WHERE root_id = roots.id),
+            total_size = (SELECT COALESCE(SUM(size), 0) FROM files WHERE root_id = roots.id)""")
+        out.commit()
+    finally: out.close()
+
+def _remove_db_files(path):
+    for p in (path, f"{path}-wal", f"{path}-shm"):
+        try: os.remove(p)
+        except OSError: pass
+
+
+# ═══════════════════════════════════════════════════════════════
+#  MERGE
+# ═══════════════════════════════════════════════════════════════
+MERGE_FIELDS = "name,path,extension,category,size,modified_date,created_date,file_hash,dev,inode,phash"
+# a row for a path already there replaces it when newer, or when it is the same machine's own newer look at it
+_MERGE_SET = ", ".join(f"{c}=excluded.{c}" for c in MERGE_FIELDS.split(",") + ["root_id", "machine"] if c != "path")
+_MERGE_WINS = ("excluded.modified_date > files.modified_date OR (files.machine IS excluded.machine AND ("
+               + " OR ".join(f"files.{c} IS NOT excluded.{c}" for c in ("size", "modified_date", "file_hash", "phash", "category", "root_id")) + "))")
+
+@perf.timed("merge")
+def merge(db_path, sources, progress=None, should_stop=None):
+    """Fold other catalogs (each workstation's own scan) into db_path without touching a single file.
+    sources is a list of (catalog path, machine label); a None label is the catalog's file name. Rows keep the label
+    they arrive with (those of a catalog that was itself merged keep theirs) and a source replaces the rows its
+    labels brought in last time, so merging a fresh copy also drops what that machine no longer has.
+    Categories are combined by name, a category both sides have getting the union of their extensions, and every
+    row is recategorised against the result. Roots are combined by path. Two rows for one path: the newer
+    modification time wins, ties go to the row already there; a row from the same machine replaces its old self.
+    Each source is copied through ATTACH with one INSERT ... SELECT, in path order, into a temp table keyed on path
+    that keeps the winner; the winners then go into files in path order in one transaction, with the secondary
+    indexes of files (and of media) dropped and rebuilt when the merge brings in more rows than the table holds.
+    Probed metadata and perceptual hashes come along. progress(done, total, label) is called before each source and with "merging".
+    Returns {"sources", "rows", "added", "updated", "removed"}, or None when stopped (nothing is written)."""
+    progress = progress or (lambda *a: None); stopped = should_stop or (lambda: False)
+    conn = connect(db_path); init_schema(conn)
+    conn.execute("PRAGMA cache_size=-131072"); conn.execute("PRAGMA temp.cache_size=-131072")   # 128 MB each
+    try:
+        # temp tables: they go with the connection, whatever happens
+        conn.execute(f"CREATE TEMP TABLE merge_rows (root TEXT, machine TEXT, {MERGE_FIELDS.replace('path', 'path TEXT PRIMARY KEY')}) WITHOUT ROWID")
+        conn.execute("CREATE TEMP TABLE merge_roots (path TEXT, scanned TEXT, rules TEXT)")
+        conn.execute("CREATE TEMP TABLE merge_cats (src INTEGER, name TEXT, extensions TEXT)")
+        conn.execute(f"CREATE TEMP TABLE merge_media (path TEXT, size INTEGER, mtime TEXT, {','.join(MEDIA_COLUMNS)})")
+        rows, labels = 0, set()
+        for i, (path, label) in enumerate(sources):
+            if stopped(): return None
+            if os.path.abspath(path) == os.path.abspath(db_path): raise ValueError(f"can't merge {path} into itself")
+            if not os.path.isfile(path): raise FileNotFoundError(f"no catalog at {path}")
+            label = label or os.path.splitext(os.path.basename(path))[0]; progress(i, len(sources), label)
+            n, mine = _stage_catalog(conn, i, path, label); rows += n; labels |= mine
+        if stopped(): return None
+        progress(len(sources), len(sources), "merging")
+        return dict(sources=len(sources), rows=rows, **_apply_merge(conn, sorted(labels)))
+    finally: conn.close()
+
+@perf.timed("merge.stage")
+def _stage_catalog(conn, i, path, label):
+    # one source into the temp tables, straight from its own; columns an older catalog lacks come through as NULL.
+    # -> (rows read, machine labels they carry)
+    conn.commit(); conn.execute("ATTACH DATABASE ? AS src", (str(path),))
+    try:
+        have = lambda t: {r[1] for r in conn.execute(f"PRAGMA src.table_info({t})")}
+        cols, rcols = have("files"), have("roots")
+        if "path" not in cols: raise ValueError(f"{path} is not an EAM catalog")
+        col = lambda c: f"f.{c}" if c in cols else "NULL"
+        joined = "root_id" in cols and "id" in rcols
+        conn.execute("BEGIN")
+        # read in the source's path order, so the temp table is appended to rather than written all over
+        conn.execute(f"INSERT INTO temp.merge_rows SELECT {'r.path' if joined else 'NULL'}, COALESCE({col('machine')}, ?), "
+                     f"{','.join(col(c) for c in MERGE_FIELDS.split(','))} FROM src.files f"
+                     + (" LEFT JOIN src.roots r ON r.id = f.root_id" if joined else "")
+                     + " WHERE true ORDER BY f.path ON CONFLICT(path) DO UPDATE SET "
+                     + ", ".join(f"{c}=excluded.{c}" for c in ["root", "machine"] + MERGE_FIELDS.split(",") if c != "path")
+                     + " WHERE excluded.modified_date > merge_rows.modified_date", (label,))
+        if rcols:
+            conn.execute(f"INSERT INTO temp.merge_roots SELECT path, {'scanned' if 'scanned' in rcols else 'NULL'}, "
+                         f"{'rules' if 'rules' in rcols else 'NULL'} FROM src.roots")
+        if have("categories"): conn.execute("INSERT INTO temp.merge_cats SELECT ?, name, extensions FROM src.categories ORDER BY id", (i,))
+        if "file_id" in have("media"):
+            conn.execute(f"INSERT INTO temp.merge_media SELECT f.path, m.size, m.mtime, {','.join('m.' + c for c in MEDIA_COLUMNS)} "
+                         "FROM src.media m JOIN src.files f ON f.id = m.file_id")
+        n = conn.execute("SELECT COUNT(*) FROM src.files").fetchone()[0]
+        labels = {r[0] or label for r in conn.execute("SELECT DISTINCT machine FROM src.files")} if "machine" in cols else {label}
+        conn.commit()
+        return n, labels
+    except BaseException: conn.rollback(); raise
+    finally: conn.execute("DETACH DATABASE src")
+
+@perf.timed("merge.apply")
+def _apply_merge(conn, labels):
+    # the staged sources into the catalog, one transaction
+    cats = load_categories(conn); before = ext_lookup(cats)
+    for name, exts in conn.execute("SELECT name, extensions FROM temp.merge_cats ORDER BY src, rowid").fetchall():
+        # a new category goes last, so where two claim an extension the catalog's own keeps it
+        mine = cats.setdefault(name, []); known = {e.lower() for e in mine}
+        mine += [e for e in json.loads(exts or "[]") if e.lower() not in known]
+    after = ext_lookup(cats); moved = sorted(e for e in set(before) | set(after) if before.get(e) != after.get(e))
+    conn.execute("CREATE TEMP TABLE merge_ext (ext TEXT PRIMARY KEY, category TEXT)")
+    conn.executemany("INSERT INTO temp.merge_ext VALUES (?,?)", after.items()); conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        conn.executemany("INSERT INTO categories (name, extensions) VALUES (?,?) ON CONFLICT(name) DO UPDATE SET extensions = excluded.extensions",
+                         [(k, json.dumps(v)) for k, v in cats.items()])
+        if moved:
+            conn.execute(f"UPDATE files SET category = COALESCE((SELECT category FROM temp.merge_ext WHERE ext = files.extension), 'Other') "
+                         f"WHERE extension IN ({','.join('?' * len(moved))})", moved)
+        conn.execute("INSERT OR IGNORE INTO roots (path, scanned, rules) SELECT path, MAX(scanned), rules FROM temp.merge_roots "
+                     "WHERE path IS NOT NULL GROUP BY path")
+        removed = conn.execute(f"DELETE FROM files WHERE machine IN ({','.join('?' * len(labels))}) "
+                               "AND NOT EXISTS (SELECT 1 FROM temp.merge_rows m WHERE m.path = files.path)", labels).rowcount
+        n = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0]
+        bulk = conn.execute("SELECT COUNT(*) FROM temp.merge_rows").fetchone()[0] > n
+        mbulk = conn.execute("SELECT COUNT(*) FROM temp.merge_media").fetchone()[0] > conn.execute("SELECT COUNT(*) FROM media").fetchone()[0]
+        for name in [*(FILES_INDEXES if bulk else ()), *(MEDIA_INDEXES if mbulk else ())]: conn.execute(f"DROP INDEX IF EXISTS {name}")
+        changes = conn.total_changes
+        conn.execute(f"""INSERT INTO files ({MERGE_FIELDS},root_id,machine)
+            SELECT m.name, m.path, m.extension, COALESCE(x.category, 'Other'), m.size, m.modified_date, m.created_date,
+                   m.file_hash, m.dev, m.inode, m.phash, r.id, m.machine
+            FROM temp.merge_rows m LEFT JOIN temp.merge_ext x ON x.ext = lower(m.extension) LEFT JOIN roots r ON r.path = m.root
+            WHERE true ORDER BY m.path ON CONFLICT(path) DO UPDATE SET {_MERGE_SET} WHERE {_MERGE_WINS}""")
+        changes = conn.total_changes - changes; added = conn.execute("SELECT COUNT(*) FROM files").fetchone()[0] - n
+        # metadata probed over there, for the rows that are still the file it was probed from; in file id order,
+        # so media (keyed on it) is appended to
+        conn.execute(f"INSERT OR REPLACE INTO media (file_id,size,mtime,{','.join(MEDIA_COLUMNS)}) "
+                     f"SELECT f.id, m.size, m.mtime, {','.join('m.' + c for c in MEDIA_COLUMNS)} FROM temp.merge_media m "
+                     "JOIN files f ON f.path = m.path AND f.size IS m.size AND f.modified_date IS m.mtime ORDER BY f.id")
+        conn.execute("DELETE FROM media WHERE file_id NOT IN (SELECT id FROM files)")
+        if bulk: create_indexes(conn)
+        if mbulk:
+            for name, cols in MEDIA_INDEXES.items(): conn.execute(f"CREATE INDEX IF NOT EXISTS {name} ON media({cols})")
+        conn.executemany("UPDATE roots SET file_count = ?, total_size = ? WHERE id = ?",
+                         [(c, s, rid) for rid, c, s in conn.execute(
+                             "SELECT root_id, COUNT(*), COALESCE(SUM(size),0) FROM files WHERE root_id IS NOT NULL GROUP BY root_id").fetchall()])
+        conn.commit()
+    except BaseException: conn.rollback(); raise
+    return {"added": added, "updated": changes - added, "removed": removed}
+
+# ═══════════════════════════════════════════════════════════════
+#  LIVE UPDATES
+# ═══════════════════════════════════════════════════════════════
+def _rows_by_path(conn, paths):
+    out, paths = {}, list(paths)
+    for i in range(0, len(paths), 500):
+        part = paths[i:i + 500]
+        for r in conn.execute(f"SELECT {','.join(ROW_KEYS)} FROM files WHERE path IN ({','.join('?' * len(part))})", part):
+            out[r[2]] = dict(zip(ROW_KEYS, r))
+    return out
+
+def _rows_under(conn, d):
+    return {r[2]: dict(zip(ROW_KEYS, r)) for r in
+            conn.execute(f"SELECT {','.join(ROW_KEYS)} FROM files WHERE path >= ? AND path < ?", _under(d))}
+
+def _is_dir(p): return os.path.isdir(p) and not os.path.islink(p)
+
+@perf.timed("live.reconcile")
+def reconcile(conn, paths, lookup, hash_small=False):
+    """Bring the catalog in line with the filesystem for the given paths. A file path is upserted or
+    deleted; a directory path has its direct entries compared with the catalog, and a directory the
+    catalog has never seen is walked in full. Returns (changes, new_dirs): changes is a list of
+    (old_row, new_row) pairs, either side None for an add or a delete."""
+    known = lambda d: conn.execute("SELECT 1 FROM dirs WHERE path = ?", (d,)).fetchone() is not None
+    roots = get_roots(conn); rules = lambda p: (root_for(roots, p) or {}).get("rules")
+    files, gone, dirs, new_dirs = set(), set(), {}, []
+    for p in sorted(set(paths)):
+        if _ignored(rules(p), p): gone.add(p)   # a rule may have been added since the path was cataloged
+        elif _is_dir(p):
+            if known(p):
+                try: entries, subdirs = list_dir(p, rules(p))
+                except OSError: entries, subdirs = [], []
+                files.update(e.path for e in entries); new_dirs.extend(q for q in subdirs if not known(q))
+                # direct children the catalog still has but the directory no longer does
+                seen = {e.path for e in entries}; seen.update(subdirs)
+                gone.update((_children(conn, p, "files") | _children(conn, p, "dirs")) - seen)
+                dirs[p] = _mtime_ns(p)
+            else: new_dirs.append(p)
+        elif os.path.lexists(p) and not os.path.isdir(p): files.add(p)
+        else: gone.add(p)
+    visited = set()
+    for d in new_dirs:   # grows while we walk: every directory below a new one is new as well
+        try:
+            dst = os.stat(d)
+            if dst.st_ino and (dst.st_dev, dst.st_ino) in visited: continue
+            visited.add((dst.st_dev, dst.st_ino)); entries, subdirs = list_dir(d, rules(d))
+        except OSError: continue
+        dirs[d] = dst.st_mtime_ns; files.update(e.path for e in entries); new_dirs.extend(subdirs)
+    for p in files: dirs.setdefault(os.path.dirname(p), None)
+
+    changes = []
+    for p in gone:
+        old = _rows_under(conn, p); old.update(_rows_by_path(conn, [p])); _delete_tree(conn, p)
+        changes.extend((o, None) for o in old.values())
+    before = _rows_by_path(conn, files); rows = []
+    for p in files:
+        r = root_for(roots, p)
+        try:
+            st = os.stat(p)
+            if r and r["rules"].skip_size(st.st_size):
+                if p in before: _delete_tree(conn, p); changes.append((before.pop(p), None))
+                continue
+            rows.append(file_row(p, lookup, hash_small, st, r and r["id"]))
+        except Exception: pass
+    for row in [row for row in rows if row[2] in ARCHIVE_EXTS]:
+        r = root_for(roots, row[1])
+        if not r: continue
+        old = _rows_under(conn, row[1]); members = _archive_members(conn, row, True, r["rules"], lookup)
+        if old and not members and conn.execute("SELECT 1 FROM files WHERE path >= ? AND path < ? LIMIT 1", _under(row[1])).fetchone(): continue
+        before.update(old); rows += members   # relisted: the old members are gone, the new ones are upserted below
+    conn.executemany(UPSERT_SQL, rows)
+    after = _rows_by_path(conn, (r[1] for r in rows))
+    changes.extend((before.get(p), n) for p, n in after.items() if before.get(p) != n)
+    changes.extend((o, None) for p, o in before.items() if p not in after and p not in files)
+    # parents of touched files are refreshed only if the catalog already tracks them
+    for d, m in dirs.items():
+        if m is not None: conn.execute("INSERT OR REPLACE INTO dirs VALUES (?,?)", (d, m))
+        else: conn.execute("UPDATE dirs SET mtime_ns = ? WHERE path = ?", (_mtime_ns(d), d))
+    conn.commit()
+    return changes, new_dirs
+
+def _ignored(rules, p):
+    # the path or any folder between it and its root matches a rule
+    if rules is None: return False
+    d = p
+    while d.startswith(rules.root):
+        if rules.skip(d, d != p or _is_dir(d)): return True
+        d = os.path.dirname(d)
+    return False
+
+def poll_dirs(conn):
+    # directory mtimes move on create/delete/rename of an entry; in-place edits are left to the next scan
+    return [p for p, m in conn.execute("SELECT path, mtime_ns FROM dirs").fetchall() if _mtime_ns(p) != m]
+
+
+IN_CLOSE_WRITE, IN_MOVED_FROM, IN_MOVED_TO, IN_CREATE, IN_DELETE = 0x8, 0x40, 0x80, 0x100, 0x200
+IN_DELETE_SELF, IN_MOVE_SELF, IN_Q_OVERFLOW, IN_IGNORED, IN_ISDIR = 0x400, 0x800, 0x4000, 0x8000, 0x40000000
+IN_ONLYDIR, IN_EXCL_UNLINK, IN_NONBLOCK, IN_CLOEXEC = 0x01000000, 0x04000000, 0o4000, 0o2000000
+WATCH_MASK = (IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE | IN_DELETE_SELF
+              | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK)
+
+class Inotify:
+    # one watch per directory; raises OSError when inotify is missing or the watch limit runs out
+    def __init__(self):
+        import ctypes, ctypes.util
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        self._errno = ctypes.get_errno
+        self.fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0: raise OSError(self._errno(), "inotify_init1 failed")
+        self._wds = {}
+
+    def add(self, path):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+        if wd >= 0: self._wds[wd] = path; return
+        err = self._errno()
+        if err not in (2, 20): raise OSError(err, f"inotify_add_watch failed for {path}")   # ENOENT/ENOTDIR: already gone
+
+    def read(self, timeout):
+        # -> (paths, overflowed)
+        if not select.select([self.fd], [], [], timeout)[0]: return [], False
+        try: buf = os.read(self.fd, 256 * 1024)
+        except BlockingIOError: return [], False
+        paths, overflow, i = [], False, 0
+        while i + 16 <= len(buf):
+            wd, mask, _, n = struct.unpack_from("iIII", buf, i); name = buf[i + 16:i + 16 + n].rstrip(b"\0"); i += 16 + n
+            if mask & IN_Q_OVERFLOW: overflow = True; continue
+            d = self._wds.get(wd)
+            if mask & IN_IGNORED: self._wds.pop(wd, None); continue
+            if d is None: continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF): paths.append(d); continue
+            paths.append(os.path.join(d, os.fsdecode(name)))
+        return paths, overflow
+
+    def close(self): os.close(self.fd)
+
+
+class Watcher:
+    """Keeps a catalog in step with its scanned roots until stop() is called. run() blocks; on_changes
+    receives each applied batch as reconcile() returns it. Uses inotify on Linux and falls back to
+    sweeping the stored directory mtimes every POLL_INTERVAL seconds."""
+    def __init__(self, db_path, on_changes, hash_small=False, poll_interval=POLL_INTERVAL):
+        self.db_path = db_path; self.on_changes = on_changes; self.hash_small = hash_small
+        self.poll_interval = poll_interval; self.mode = None; self._stop = threading.Event()
+
+    def stop(self): self._stop.set()
+
+    def run(self):
+        conn = connect(self.db_path); init_schema(conn); lookup = ext_lookup(load_categories(conn))
+        ino = None
+        try:
+            if not get_roots(conn): return
+            ino = self._inotify(conn); self.mode = "inotify" if ino else "polling"
+            pending = set(poll_dirs(conn))   # catch up on whatever changed while nobody was watching
+            while not self._stop.is_set():
+                if pending:
+                    try: changes, new_dirs = reconcile(conn, pending, lookup, self.hash_small)
+                    except sqlite3.OperationalError: conn.rollback(); self._stop.wait(1.0); continue   # a scan holds the lock
+                    pending.clear()
+                    if ino:
+                        # look once more at new directories: files may have landed before their watch existed
+                        try:
+                            for d in new_dirs: ino.add(d)
+                            pending.update(new_dirs)
+                        except OSError: ino.close(); ino = None; self.mode = "polling"
+                    if changes: self.on_changes(changes)
+                if ino: pending.update(self._collect(ino, conn))
+                elif not self._stop.wait(self.poll_interval): pending.update(poll_dirs(conn))
+        finally:
+            if ino: ino.close()
+            conn.close()
+
+    def _inotify(self, conn):
+        if not sys.platform.startswith("linux"): return None
+        try: ino = Inotify()
+        except (OSError, AttributeError): return None
+        try:
+            for (d,) in conn.execute("SELECT path FROM dirs"): ino.add(d)
+            return ino
+        except OSError: ino.close(); return None
+
+    def _collect(self, ino, conn):
+        # block until something happens, then keep reading until the burst settles
+        paths, t0 = set(), None
+        while not self._stop.is_set():
+            got, overflow = ino.read(WATCH_SETTLE if t0 else 0.25)
+            if overflow: paths.update(poll_dirs(conn))
+            if got or overflow: paths.update(got); t0 = t0 or time.monotonic()
+            elif t0: break
+            if t0 and time.monotonic() - t0 > WATCH_MAX_DELAY: break
+        return paths
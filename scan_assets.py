@@ -1,139 +1,245 @@
 #!/usr/bin/env python3
 """
 Asset Catalog — CLI Scanner
-Standalone tool to create / update .db files compatible with the desktop app.
+Standalone tool to create / update .db files compatible with the desktop app, and to query them
+without starting it (no PySide6 needed; results stream, so they can be piped).
 
 Usage:
     python scan_assets.py                        # interactive mode
     python scan_assets.py /path/to/folder        # quick scan → scan.db
     python scan_assets.py /path/to/folder my.db  # scan into specific db
+    python scan_assets.py /path/to/folder my.db --update  # refresh an existing db in place
+    python scan_assets.py /path/to/folder my.db --resume  # continue a scan that was interrupted
+    python scan_assets.py /path/to/folder my.db --ignore "*.bak" --max-size 2GB  # extra ignore rules
+    python scan_assets.py /path/to/folder my.db --archives  # also catalog what is inside zip / tar files
+    python scan_assets.py /path/to/folder my.db --no-metadata  # skip reading resolution / duration / codec / font names
+    python scan_assets.py /path/to/folder my.db --trace scan.json  # time each scan phase, save a trace
+    python scan_assets.py scan /path/to/folder my.db ...  # the same, spelled out
+
+    python scan_assets.py search my.db "whoosh ext:wav"   # matching paths, one per line (search box syntax)
+    python scan_assets.py search my.db "res:4k" --format jsonl --sort size --limit 20
+    python scan_assets.py stats my.db [--json]           # totals by category and extension, scanned folders
+    python scan_assets.py dupes my.db [--min-size 1MB] [--json]
+    python scan_assets.py export my.db out.csv "cat:video modified:>30d"   # .csv, .jsonl or .db
+    python scan_assets.py merge all.db ws-01.db ws-02.db "Edit Bay=//nas/cat/bay.db"  # fold catalogs into one
 """
 
-import os, sys, sqlite3, json, time
+import os, sys, csv, json, time, sqlite3, argparse
 from pathlib import Path
-from datetime import datetime
-
-DEFAULT_CATEGORIES = {
-    "Archives":          [".zip",".rar",".7z",".tar",".gz",".bz2",".xz"],
-    "After Effects":     [".aep",".aet",".ffx"],
-    "Videos - MP4":      [".mp4"],
-    "Videos - MOV":      [".mov"],
-    "Videos - AVI":      [".avi"],
-    "Videos - Other":    [".mkv",".m4v",".wmv",".flv",".webm",".mpg",".mpeg"],
-    "Images - PNG":      [".png"],
-    "Images - JPG":      [".jpg",".jpeg"],
-    "Images - Other":    [".webp",".tiff",".tif",".gif",".bmp",".heic",".svg"],
-    "Icons":             [".ico"],
-    "Audio":             [".mp3",".wav",".aac",".flac",".ogg",".m4a",".wma",".aiff",".opus"],
-    "Photoshop":         [".psd",".psb",".abr",".asl",".grd",".pat"],
-    "Blender":           [".blend",".blend1"],
-    "Vegas":             [".veg",".vf"],
-    "Premiere":          [".prproj",".prel"],
-    "Documents":         [".pdf",".doc",".docx",".txt",".rtf",".md",".odt"],
-    "Spreadsheets":      [".xlsx",".xls",".csv",".ods"],
-    "Fonts":             [".ttf",".otf",".woff",".woff2"],
-    "3D Models":         [".obj",".fbx",".dae",".stl",".3ds",".gltf",".glb"],
-    "Code":              [".py",".js",".html",".css",".cpp",".java",".c",".h",".ts",".json",".xml"],
-    "Other":             [],
-}
-
-def ensure_db(path):
-    conn = sqlite3.connect(str(path))
-    c = conn.cursor()
-    c.execute("""CREATE TABLE IF NOT EXISTS files (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT, path TEXT UNIQUE, extension TEXT,
-        category TEXT, size INTEGER,
-        modified_date TEXT, created_date TEXT, file_hash TEXT)""")
-    c.execute("""CREATE TABLE IF NOT EXISTS categories (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        name TEXT UNIQUE, extensions TEXT)""")
-    c.execute("SELECT COUNT(*) FROM categories")
-    if c.fetchone()[0] == 0:
-        for n, exts in DEFAULT_CATEGORIES.items():
-            c.execute("INSERT INTO categories (name,extensions) VALUES (?,?)",
-                      (n, json.dumps(exts)))
-    c.execute("CREATE INDEX IF NOT EXISTS idx_files_name ON files(name COLLATE NOCASE)")
-    conn.commit()
-    conn.close()
-
-def get_category(ext, cats):
-    e = ext.lower()
-    for name, exts in cats.items():
-        if e in (x.lower() for x in exts):
-            return name
-    return "Other"
-
-def load_cats(db_path):
-    conn = sqlite3.connect(str(db_path))
-    rows = conn.execute("SELECT name, extensions FROM categories").fetchall()
-    conn.close()
-    return {r[0]: json.loads(r[1]) for r in rows}
-
-def scan(root, db_path):
-    ensure_db(db_path)
-    cats = load_cats(db_path)
-    conn = sqlite3.connect(str(db_path))
-    conn.execute("DELETE FROM files")
-    conn.commit()
-
-    print(f"\n  Counting files in: {root}")
-    all_files = []
-    for r, _, fnames in os.walk(root):
-        for fn in fnames:
-            all_files.append(os.path.join(r, fn))
-    total = len(all_files)
-    print(f"  Found {total:,} files. Scanning...\n")
-
-    batch, bs, errors = [], 800, 0
+
+import eam_core as core
+
+def scan(root, db_path, update=False, hash_small=False, resume=False, rate=None):
+    verb, finish = ("Updating", "Removing deleted files") if update else ("Scanning", "Building indexes")
+    if resume:
+        conn = core.connect(db_path); core.init_schema(conn)
+        state = core.get_scan_state(conn, os.path.abspath(root)); conn.close()
+        if state:
+            verb = f"Resuming after {state['done']:,} files"
+            finish = "Removing deleted files" if state["update"] else "Building indexes"
+        else: print("  No interrupted scan of this folder — starting from the beginning.")
+    print(f"\n  {verb}: {root}\n")
     t0 = time.time()
-    for i, fp in enumerate(all_files):
-        try:
-            st = os.stat(fp)
-            ext = Path(fp).suffix.lower()
-            batch.append((
-                Path(fp).name, fp, ext,
-                get_category(ext, cats),
-                st.st_size,
-                datetime.fromtimestamp(st.st_mtime).isoformat(),
-                datetime.fromtimestamp(st.st_ctime).isoformat(),
-                None
-            ))
-            if len(batch) >= bs:
-                conn.executemany(
-                    "INSERT OR REPLACE INTO files "
-                    "(name,path,extension,category,size,modified_date,created_date,file_hash) "
-                    "VALUES (?,?,?,?,?,?,?,?)", batch)
-                conn.commit()
-                batch.clear()
-        except Exception:
-            errors += 1
-
-        if (i + 1) % 500 == 0 or i + 1 == total:
-            pct = (i + 1) / total * 100
+
+    def progress(done, total, status):
+        if status == "scanning" and total:
+            pct = min(done / total * 100, 99.9)
             bar = "█" * int(pct / 2) + "░" * (50 - int(pct / 2))
-            print(f"\r  {bar}  {pct:5.1f}%  ({i+1:,}/{total:,})", end="", flush=True)
+            print(f"\r  {bar}  {pct:5.1f}%  ({done:,}/~{total:,})", end="", flush=True)
+        elif status == "scanning":
+            print(f"\r  {done:,} files", end="", flush=True)
+        elif status == "indexing":
+            print(f"\r  {done:,} files{' ' * 60}\n\n  {finish}...", end="", flush=True)
 
-    if batch:
-        conn.executemany(
-            "INSERT OR REPLACE INTO files "
-            "(name,path,extension,category,size,modified_date,created_date,file_hash) "
-            "VALUES (?,?,?,?,?,?,?,?)", batch)
-        conn.commit()
-    conn.close()
+    try:
+        res = core.scan(db_path, root, hash_small=hash_small, update=update, resume=resume, progress=progress,
+                        throttle=core.RateLimiter(rate) if rate else None)
+    except KeyboardInterrupt:
+        print("\n\n  ■ Stopped — progress up to the last checkpoint is saved.")
+        print("  Run again with --resume to continue.\n")
+        sys.exit(130)
 
     elapsed = time.time() - t0
-    print(f"\n\n  ✓ Done in {elapsed:.1f}s  —  {total - errors:,} indexed, {errors} skipped")
+    print(f"\n\n  ✓ Done in {elapsed:.1f}s  —  {res['indexed']:,} indexed, {res['errors']} skipped")
     print(f"  Database: {db_path}\n")
 
+def enrich(db_path, workers=None):
+    print("  Reading media metadata...", end="", flush=True); t0 = time.time()
+    def progress(done, total):
+        print(f"\r  Reading media metadata: {done:,} / {total:,} files", end="", flush=True)
+    try: n = core.enrich(db_path, progress, workers=workers)
+    except KeyboardInterrupt:
+        print("\n\n  ■ Stopped — files read so far are kept; the next run continues with the rest.\n"); sys.exit(130)
+    print(f"\r  ✓ Media metadata read for {n:,} new or changed files in {time.time() - t0:.1f}s{' ' * 20}\n")
+
+def write_trace(path):
+    n = core.perf.write_trace(path)
+    print(f"  {'Phase':<18}{'count':>10}{'mean':>12}{'p95':>12}{'total':>12}")
+    for name, op in core.perf.snapshot().items():
+        print(f"  {name:<18}{op['count']:>10,}{op['mean_ms']:>10.2f}ms{op['p95_ms']:>10.2f}ms{op['total_ms'] / 1000:>11.2f}s")
+    print(f"\n  Trace: {path} ({n:,} spans; open in chrome://tracing or ui.perfetto.dev)\n")
+
+def apply_rules(root, db_path, args):
+    # ignore flags are added to the folder's saved rules (the defaults, for a new folder) and kept in the catalog
+    conn = core.connect(db_path); core.init_schema(conn)
+    root = os.path.abspath(root)
+    cur = next((r["rules"] for r in core.get_roots(conn) if r["path"] == root), None) or core.IgnoreRules(root)
+    patterns = [] if args.no_default_ignores else list(cur.patterns)
+    if args.ignore_file:
+        with open(args.ignore_file, encoding="utf-8") as f: patterns += f.read().splitlines()
+    patterns += [p for p in args.ignore or [] if p not in patterns]
+    try:
+        rules = core.IgnoreRules(root, patterns, False if args.skip_hidden else args.hidden or cur.hidden,
+                                 cur.min_size if args.min_size is None else core.parse_size(args.min_size),
+                                 cur.max_size if args.max_size is None else core.parse_size(args.max_size),
+                                 args.archives or cur.archives)
+    except ValueError as e:
+        print(f"  ✗ {e}"); sys.exit(1)
+    core.set_root_rules(conn, root, rules); conn.close()
+    sizes = [f"{k} {v:,} bytes" for k, v in (("min", rules.min_size), ("max", rules.max_size)) if v]
+    print(f"  Ignoring: {', '.join(rules.patterns) or '(nothing)'}"
+          f"{'' if rules.hidden else ', hidden files'}{''.join('; ' + s for s in sizes)}"
+          f"{'; listing zip / tar contents' if rules.archives else ''}")
+
+# ═══════════════════════════════════════════════════════════════
+#  QUERIES — search / stats / dupes / export / merge
+# ═══════════════════════════════════════════════════════════════
+COMMANDS = ("search", "stats", "dupes", "export", "merge")
+
+def fmt_size(b):
+    for u in ("B", "KB", "MB", "GB", "TB"):
+        if b < 1024 or u == "TB": return f"{b:.0f} {u}" if u == "B" else f"{b:.1f} {u}"
+        b /= 1024
+
+def open_catalog(path):
+    # an existing catalog only; one on a read-only share or snapshot is opened immutable instead of migrated
+    if not os.path.isfile(path): sys.exit(f"✗ No catalog at {path}")
+    try:
+        conn = core.connect(path); core.init_schema(conn)
+    except sqlite3.OperationalError:
+        conn = sqlite3.connect(Path(path).resolve().as_uri() + "?immutable=1", uri=True)
+    return conn
+
+def cmd_search(args):
+    conn = open_catalog(args.db)
+    if args.count:
+        w, params = core.search_where(conn, args.query, args.cat, args.ext)
+        print(conn.execute(f"SELECT COUNT(*) FROM files WHERE {w}", params).fetchone()[0]); return
+    cur = core.search_cursor(conn, ",".join(core.ROW_KEYS[1:]), args.query, args.cat, args.ext, args.sort)
+    out = csv.writer(sys.stdout, delimiter="\t", lineterminator="\n") if args.format == "tsv" else None
+    for i, r in enumerate(cur):
+        if args.limit and i >= args.limit: break
+        if args.format == "path": sys.stdout.write(r[1] + "\n")
+        elif out: out.writerow(r)
+        else: sys.stdout.write(json.dumps(dict(zip(core.ROW_KEYS[1:], r)), ensure_ascii=False) + "\n")
+
+def cmd_stats(args):
+    conn = open_catalog(args.db); st = core.stats(conn, args.top); roots = core.get_roots(conn)
+    if args.json:
+        st["roots"] = [{k: r[k] for k in ("path", "scanned", "file_count", "total_size")} for r in roots]
+        print(json.dumps(st, indent=2, ensure_ascii=False)); return
+    print(f"{st['total_files']:,} files, {fmt_size(st['total_size'])}\n")
+    for c in sorted(st["by_category"], key=lambda c: -c["size"]):
+        print(f"  {c['category'] or '?':<18} {c['count']:>12,}  {fmt_size(c['size']):>10}")
+    print()
+    for e in st["by_extension"]: print(f"  {e['extension'] or '(none)':<18} {e['count']:>12,}")
+    if st["by_machine"]: print()
+    for m in st["by_machine"]: print(f"  from {m['machine']:<13} {m['count']:>12,}  {fmt_size(m['size']):>10}")
+    if roots: print()
+    for r in roots: print(f"  {r['path']}  —  {r['file_count'] or 0:,} files, scanned {(r['scanned'] or 'never')[:16].replace('T', ' ')}")
+
+def cmd_dupes(args):
+    conn = open_catalog(args.db); min_size = core.parse_size(args.min_size) or 0; groups = wasted = 0
+    for g in core.iter_duplicates(conn):
+        if g["size"] < min_size: continue
+        groups += 1; wasted += g["size"] * (g["copies"] - 1)
+        if args.json: sys.stdout.write(json.dumps(g, ensure_ascii=False) + "\n"); continue
+        print(f"{g['count']} × {fmt_size(g['size'])}{'  (hardlinks)' if g['hardlinks'] else ''}")
+        for p in g["paths"]: print(f"    {p}")
+    if not args.json: print(f"\n{groups:,} groups, {fmt_size(wasted)} reclaimable", file=sys.stderr)
+
+def cmd_export(args):
+    def progress(n, total): print(f"\r  {n:,} / {total:,} files", end="", file=sys.stderr, flush=True)
+    open_catalog(args.db).close()
+    try: n = core.export(args.db, args.out, args.query, args.cat, args.ext, args.sort, progress)
+    except ValueError as e: sys.exit(f"✗ {e}")
+    print(f"\r  ✓ {n:,} files → {args.out}{' ' * 20}", file=sys.stderr)
+
+def cmd_merge(args):
+    # a source is a catalog path, or LABEL=path to name the machine it came from (default: the file name)
+    sources = [(a, None) if os.path.isfile(a) or "=" not in a else tuple(reversed(a.split("=", 1))) for a in args.sources]
+    def progress(i, n, label):
+        print(f"\r  {f'[{i + 1}/{n}] {label}' if i < n else 'Merging'} …{' ' * 30}", end="", file=sys.stderr, flush=True)
+    t0 = time.time()
+    try: r = core.merge(args.db, sources, progress)
+    except (ValueError, FileNotFoundError, sqlite3.DatabaseError) as e: sys.exit(f"\n✗ {e}")
+    print(f"\r  ✓ {r['sources']} catalogs, {r['rows']:,} rows in {time.time() - t0:.1f}s: {r['added']:,} added, "
+          f"{r['updated']:,} updated, {r['removed']:,} removed → {args.db}{' ' * 10}", file=sys.stderr)
+
+def query_main(argv):
+    ap = argparse.ArgumentParser(prog="scan_assets.py", description="Query an EAM catalog.")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    def filters(p):
+        p.add_argument("query", nargs="?", default="", help='search box syntax, e.g. "whoosh ext:wav size:>1MB"')
+        p.add_argument("--cat", help="exact category name"); p.add_argument("--ext", help="extension, e.g. .wav")
+        p.add_argument("--sort", choices=list(core.SORT_ORDER), default="name")
+    p = sub.add_parser("search", help="list matching files"); p.add_argument("db"); filters(p)
+    p.add_argument("--format", choices=("path", "tsv", "jsonl"), default="path",
+                   help="path: one per line; tsv: name, path, extension, category, size, modified, created")
+    p.add_argument("--limit", type=int, metavar="N"); p.add_argument("--count", action="store_true", help="print the number of matches only")
+    p.set_defaults(fn=cmd_search)
+    p = sub.add_parser("stats", help="totals by category and extension"); p.add_argument("db")
+    p.add_argument("--top", type=int, default=30, metavar="N", help="extensions to list"); p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_stats)
+    p = sub.add_parser("dupes", help="groups of identical files (scan with --hash to find copies)"); p.add_argument("db")
+    p.add_argument("--min-size", metavar="SIZE", help="ignore groups of files smaller than SIZE"); p.add_argument("--json", action="store_true")
+    p.set_defaults(fn=cmd_dupes)
+    p = sub.add_parser("export", help="write matching files to .csv, .jsonl or a .db catalog"); p.add_argument("db"); p.add_argument("out")
+    filters(p); p.set_defaults(fn=cmd_export)
+    p = sub.add_parser("merge", help="combine catalogs from other machines into one (created if missing)")
+    p.add_argument("db"); p.add_argument("sources", nargs="+", metavar="[LABEL=]CATALOG")
+    p.set_defaults(fn=cmd_merge)
+    args = ap.parse_args(argv)
+    try: args.fn(args); sys.stdout.flush()
+    except BrokenPipeError:
+        # the reader (head, grep -m) has gone; not an error
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno()); sys.exit(0)
+    except KeyboardInterrupt: sys.exit(130)
+
 def main():
+    if len(sys.argv) > 1 and sys.argv[1] in COMMANDS: return query_main(sys.argv[1:])
+    if len(sys.argv) > 1 and sys.argv[1] == "scan": del sys.argv[1]
     print("\n  ═══════════════════════════════════════")
     print("             EAM  —  CLI Scanner           ")
     print("  ═══════════════════════════════════════\n")
 
-    if len(sys.argv) >= 2:
-        root = sys.argv[1]
-        db_out = sys.argv[2] if len(sys.argv) >= 3 else "scan.db"
+    ap = argparse.ArgumentParser(description="Scan a folder into an EAM catalog.")
+    ap.add_argument("root", nargs="?", help="directory to scan")
+    ap.add_argument("db", nargs="?", default="scan.db", help="output .db file (default: scan.db)")
+    ap.add_argument("--update", action="store_true",
+                    help="update the catalog in place instead of rebuilding it")
+    ap.add_argument("--hash", action="store_true", help="hash files under 10 MB")
+    ap.add_argument("--resume", action="store_true",
+                    help="continue an interrupted scan of this folder from its last checkpoint")
+    ap.add_argument("--rate", type=int, metavar="N", help="stat at most N files per second (go easy on a busy disk)")
+    ap.add_argument("--no-metadata", action="store_true",
+                    help="don't read resolution, duration, codec and font names after the scan")
+    ap.add_argument("--workers", type=int, metavar="N", help="processes reading media metadata (default: CPU count, max 8)")
+    ap.add_argument("--ignore", action="append", metavar="PATTERN",
+                    help="skip files matching PATTERN; a trailing / skips whole folders (repeatable)")
+    ap.add_argument("--ignore-file", metavar="FILE", help="read ignore patterns from FILE (.eamignore syntax)")
+    ap.add_argument("--no-default-ignores", action="store_true",
+                    help="drop the saved / built-in patterns (.git/, node_modules/, Thumbs.db, …)")
+    ap.add_argument("--skip-hidden", action="store_true", help="skip hidden files and folders (they are catalogued by default)")
+    ap.add_argument("--hidden", action="store_true", help="catalog hidden files and folders again after --skip-hidden")
+    ap.add_argument("--archives", action="store_true", help="also catalog the files inside zip and tar archives")
+    ap.add_argument("--min-size", metavar="SIZE", help="skip files smaller than SIZE (e.g. 4K)")
+    ap.add_argument("--max-size", metavar="SIZE", help="skip files larger than SIZE (e.g. 2GB)")
+    ap.add_argument("--trace", metavar="FILE", help="time every scan phase and write a trace (Chrome JSON) to FILE")
+    args = ap.parse_args()
+
+    if args.root:
+        root, db_out = args.root, args.db
     else:
         root = input("  Directory to scan: ").strip().strip('"')
         db_out = input("  Output .db file [scan.db]: ").strip() or "scan.db"
@@ -143,7 +249,12 @@ def main():
         sys.exit(1)
 
     db_path = Path(db_out).with_suffix(".db")
-    scan(root, db_path)
+    if any((args.ignore, args.ignore_file, args.no_default_ignores, args.hidden, args.skip_hidden, args.min_size, args.max_size, args.archives)):
+        apply_rules(root, db_path, args)
+    if args.trace: core.perf.enable(trace=True)
+    scan(root, db_path, update=args.update, hash_small=args.hash, resume=args.resume, rate=args.rate)
+    if not args.no_metadata: enrich(db_path, args.workers)
+    if args.trace: write_trace(args.trace)
 
 if __name__ == "__main__":
     main()
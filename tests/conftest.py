@@ -0,0 +1,27 @@
+import os, sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import eam_core as core
+
+
+@pytest.fixture
+def make_tree(tmp_path):
+    # {relative path: bytes or size} -> root folder holding those files, with a fixed mtime per file
+    def make(files, name="tree", mtime=1_700_000_000):
+        root = tmp_path / name
+        for i, (rel, data) in enumerate(sorted(files.items())):
+            p = root / rel; p.parent.mkdir(parents=True, exist_ok=True)
+            p.write_bytes(data if isinstance(data, bytes) else b"x" * data)
+            os.utime(p, (mtime + i * 86400, mtime + i * 86400))
+        return root
+    return make
+
+
+@pytest.fixture
+def catalog(tmp_path):
+    # -> scan(root, name="cat.db") building a catalog of root, returning its path
+    def build(root, name="cat.db"):
+        db = tmp_path / name; core.scan(str(db), str(root)); return db
+    return build
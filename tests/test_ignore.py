@@ -0,0 +1,32 @@
+import eam_core as core
+
+FILES = {"a.png": 10, ".hidden.png": 20, ".cache/b.png": 30, "sub/.c.txt": 40, "node_modules/x.js": 50}
+
+
+def _names(db):
+    conn = core.connect(db)
+    try: return {r[0] for r in conn.execute("SELECT name FROM files")}
+    finally: conn.close()
+
+
+def _scan_with(tmp_path, root, rules):
+    db = str(tmp_path / "cat.db"); conn = core.connect(db); core.init_schema(conn)
+    core.set_root_rules(conn, str(root), rules); conn.close()
+    core.scan(db, str(root)); return db
+
+
+def test_default_rules_catalog_hidden_files(make_tree, catalog):
+    assert core.IgnoreRules("/r").hidden and core.IgnoreRules.from_json("/r", None).hidden
+    assert _names(catalog(make_tree(FILES))) == {"a.png", ".hidden.png", "b.png", ".c.txt"}
+
+
+def test_skipping_hidden_files_is_opt_in(make_tree, tmp_path):
+    root = make_tree(FILES)
+    assert _names(_scan_with(tmp_path, root, core.IgnoreRules(str(root), hidden=False))) == {"a.png"}
+    rules = core.IgnoreRules.from_json(str(root), core.IgnoreRules(str(root), hidden=False).to_json())
+    assert not rules.hidden and rules.skip(str(root / ".cache"), True)
+
+
+def test_dot_pattern_skips_hidden_files(make_tree, tmp_path):
+    root = make_tree(FILES)
+    assert _names(_scan_with(tmp_path, root, core.IgnoreRules(str(root), core.DEFAULT_IGNORE + [".*"]))) == {"a.png"}
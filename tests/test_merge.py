@@ -0,0 +1,65 @@
+import os
+
+import pytest
+
+import eam_core as core
+
+
+@pytest.fixture
+def two_machines(tmp_path, make_tree, catalog):
+    # one share scanned twice: ws-a first, then ws-b after a.mov was rewritten, c.txt deleted and d.wav added
+    tree = make_tree({"shared/a.mov": 100, "shared/b.png": 200, "shared/c.txt": 300})
+    a = catalog(tree, "ws-a.db"); conn = core.connect(a)
+    fid, size, mtime = conn.execute("SELECT id, size, modified_date FROM files WHERE name = 'b.png'").fetchone()
+    conn.execute("INSERT INTO media (file_id, size, mtime, width, height) VALUES (?,?,?,?,?)", (fid, size, mtime, 640, 480))
+    conn.commit(); conn.close()
+    (tree / "shared/a.mov").write_bytes(b"y" * 150); os.utime(tree / "shared/a.mov", (1_900_000_000, 1_900_000_000))
+    (tree / "shared/c.txt").unlink(); (tree / "shared/d.wav").write_bytes(b"z" * 50)
+    return tree, a, catalog(tree, "ws-b.db")
+
+
+def _rows(db):
+    conn = core.connect(db)
+    rows = {os.path.basename(p): (size, machine) for p, size, machine in conn.execute("SELECT path, size, machine FROM files")}
+    conn.close()
+    return rows
+
+
+def test_overlapping_paths_newest_wins(tmp_path, two_machines):
+    tree, a, b = two_machines; out = tmp_path / "studio.db"
+    r = core.merge(str(out), [(str(a), "ws-a"), (str(b), "ws-b")])
+    assert r == {"sources": 2, "rows": 6, "added": 4, "updated": 0, "removed": 0}
+    # a.mov: ws-b's is newer; b.png: the same file on both, the tie goes to the first; c.txt only ws-a ever saw
+    assert _rows(out) == {"a.mov": (150, "ws-b"), "b.png": (200, "ws-a"), "c.txt": (300, "ws-a"), "d.wav": (50, "ws-b")}
+
+
+def test_media_and_indexes_come_through(tmp_path, two_machines):
+    tree, a, b = two_machines; out = tmp_path / "studio.db"
+    core.merge(str(out), [(str(a), "ws-a"), (str(b), "ws-b")])
+    conn = core.connect(out)
+    assert conn.execute("SELECT f.name, m.width, m.height FROM media m JOIN files f ON f.id = m.file_id").fetchall() == [("b.png", 640, 480)]
+    names = {r[1] for t in ("files", "media") for r in conn.execute(f"PRAGMA index_list({t})")}
+    assert set(core.FILES_INDEXES) | set(core.MEDIA_INDEXES) <= names   # dropped for the bulk load, then rebuilt
+    assert core.search(conn, "res:>=640x480")[1] == 1
+    conn.close()
+
+
+def test_a_fresh_copy_replaces_what_that_machine_brought(tmp_path, two_machines):
+    tree, a, b = two_machines; out = tmp_path / "studio.db"
+    core.merge(str(out), [(str(a), "ws-a"), (str(b), "ws-b")])
+    # ws-a rescans the share: its c.txt is gone, and its unchanged b.png stays as it was
+    r = core.merge(str(out), [(str(b), "ws-a")])
+    assert r["removed"] == 1 and r["added"] == 0
+    assert _rows(out) == {"a.mov": (150, "ws-b"), "b.png": (200, "ws-a"), "d.wav": (50, "ws-b")}
+
+
+def test_bad_sources(tmp_path, two_machines):
+    tree, a, b = two_machines
+    with pytest.raises(ValueError): core.merge(str(a), [(str(a), None)])
+    with pytest.raises(FileNotFoundError): core.merge(str(a), [(str(tmp_path / "nope.db"), None)])
+
+
+def test_stopped_merge_writes_nothing(tmp_path, two_machines):
+    tree, a, b = two_machines; out = tmp_path / "studio.db"
+    assert core.merge(str(out), [(str(a), "ws-a"), (str(b), "ws-b")], should_stop=lambda: True) is None
+    assert _rows(out) == {}
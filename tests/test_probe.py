@@ -0,0 +1,132 @@
+import struct, wave, zlib
+
+import pytest
+
+import eam_core as core
+
+
+@pytest.fixture(autouse=True)
+def no_ffprobe(monkeypatch):
+    # only what EAM reads itself; whether ffprobe is installed must not change the results
+    monkeypatch.setattr(core, "_ffprobe_exe", None)
+
+
+def _write(tmp_path, name, data):
+    p = tmp_path / name; p.write_bytes(data); return str(p)
+
+
+def _box(kind, *parts): payload = b"".join(parts); return struct.pack(">I4s", 8 + len(payload), kind) + payload
+
+
+def _trak(handler, w, h, scale, dur, entry, samples):
+    stbl = _box(b"stbl", _box(b"stsd", b"\0" * 4, struct.pack(">I", 1), entry),
+                _box(b"stts", b"\0" * 4, struct.pack(">I", 1), struct.pack(">II", samples, dur // max(1, samples))))
+    mdia = _box(b"mdia", _box(b"mdhd", b"\0" * 12, struct.pack(">II", scale, dur), b"\0" * 4),
+                _box(b"hdlr", b"\0" * 8, handler, b"\0" * 12), _box(b"minf", stbl))
+    return _box(b"trak", _box(b"tkhd", b"\0" * 76, struct.pack(">II", w << 16, h << 16)), mdia)
+
+
+def _mp4():
+    video = struct.pack(">I4s", 86, b"avc1") + b"\0" * 78
+    audio = struct.pack(">I4s", 36, b"mp4a") + b"\0" * 16 + struct.pack(">HHHHI", 2, 16, 0, 0, 48000 << 16)
+    moov = _box(b"moov", _box(b"mvhd", b"\0" * 12, struct.pack(">II", 600, 6000), b"\0" * 80),
+                _trak(b"vide", 1920, 1080, 24000, 240240, video, 240), _trak(b"soun", 0, 0, 48000, 480000, audio, 469))
+    return _box(b"ftyp", b"isom\0\0\0\0isom") + moov + _box(b"mdat", b"\0" * 64)
+
+
+def _flac(rate, ch, bps, total):
+    info = b"\0" * 10 + (rate << 44 | (ch - 1) << 41 | (bps - 1) << 36 | total).to_bytes(8, "big") + b"\0" * 16
+    return b"fLaC" + bytes([0x80]) + len(info).to_bytes(3, "big") + info
+
+
+def _name_table(records):
+    # [(platform, language, name id, text)] -> an OpenType 'name' table
+    strings, recs = b"", b""
+    for plat, lang, nid, text in records:
+        raw = text.encode("utf-16-be" if plat == 3 else "mac_roman")
+        recs += struct.pack(">HHHHHH", plat, 1 if plat == 3 else 0, lang, nid, len(raw), len(strings)); strings += raw
+    return struct.pack(">HHH", 0, len(records), 6 + len(recs)) + recs + strings
+
+
+NAMES = [(1, 0, 1, "Mac Name"), (3, 0x409, 1, "Roboto"), (3, 0x409, 16, "Roboto Flex")]
+
+
+def _ttf():
+    name = _name_table(NAMES)
+    return struct.pack(">IHHHH", 0x00010000, 1, 16, 0, 0) + struct.pack(">4sIII", b"name", 0, 28, len(name)) + name
+
+
+def _woff():
+    name = _name_table(NAMES); packed = zlib.compress(name)
+    head = b"wOFF" + struct.pack(">IIHH", 0x00010000, 0, 1, 0) + b"\0" * 28
+    return head + struct.pack(">4sIIII", b"name", 64, len(packed), len(name), 0) + packed
+
+
+def _pillow(tmp_path, name, size, **kw):
+    Image = pytest.importorskip("PIL.Image")
+    p = tmp_path / name; Image.new("RGB", size, (200, 30, 30)).save(p, **kw); return str(p)
+
+
+@pytest.mark.parametrize("name, size, kw", [("a.png", (123, 45), {}), ("a.jpg", (123, 45), {}),
+                                            ("p.jpg", (321, 54), {"progressive": True}), ("a.gif", (17, 9), {}),
+                                            ("a.bmp", (31, 7), {}), ("a.webp", (64, 40), {}),
+                                            ("l.webp", (65, 41), {"lossless": True}), ("a.tif", (30, 20), {})],
+                         ids=["png", "jpeg", "progressive-jpeg", "gif", "bmp", "webp", "lossless-webp", "tiff"])
+def test_image_dimensions(tmp_path, name, size, kw):
+    path = _pillow(tmp_path, name, size, **kw)
+    assert core.probe_media(path, "." + name.rsplit(".", 1)[1]) == {"width": size[0], "height": size[1]}
+
+
+def test_headers_written_by_hand(tmp_path):
+    bmp = b"BM" + b"\0" * 16 + struct.pack("<ii", 800, -600) + b"\0" * 40
+    assert core.probe_media(_write(tmp_path, "td.bmp", bmp), ".bmp") == {"width": 800, "height": 600}   # top-down rows
+    psd = b"8BPS" + b"\0" * 10 + struct.pack(">II", 300, 400) + b"\0" * 50
+    assert core.probe_media(_write(tmp_path, "a.psd", psd), ".psd") == {"width": 400, "height": 300}
+    vp8x = b"RIFF\0\0\0\0WEBPVP8X" + struct.pack("<I", 10) + b"\0" * 4 + (4095).to_bytes(3, "little") + (2159).to_bytes(3, "little") + b"\0" * 40
+    assert core.probe_media(_write(tmp_path, "x.webp", vp8x), ".webp") == {"width": 4096, "height": 2160}
+
+
+def test_wav(tmp_path):
+    p = tmp_path / "a.wav"
+    with wave.open(str(p), "wb") as w: w.setnchannels(2); w.setsampwidth(2); w.setframerate(22050); w.writeframes(b"\0" * 4 * 22050)
+    assert core.probe_media(str(p), ".wav") == {"codec": "pcm", "channels": 2, "sample_rate": 22050, "duration": 1.0}
+
+
+def test_flac(tmp_path):
+    info = core.probe_media(_write(tmp_path, "a.flac", _flac(96000, 6, 24, 96000 * 3)), ".flac")
+    assert info == {"codec": "flac", "sample_rate": 96000, "channels": 6, "duration": 3.0}
+
+
+@pytest.mark.parametrize("tag", [b"", b"ID3\x04\0\0" + bytes([0, 0, 0, 100]) + b"\0" * 100], ids=["bare", "id3"])
+def test_mp3_constant_bitrate(tmp_path, tag):
+    frames = b"\xff\xfb\x90\x64" + b"\0" * (16000 - 4)   # MPEG-1 layer III, 128 kbit/s, 44.1 kHz, joint stereo
+    info = core.probe_media(_write(tmp_path, "a.mp3", tag + frames), ".mp3")
+    assert info == {"codec": "mp3", "sample_rate": 44100, "channels": 2, "duration": pytest.approx(1.0)}
+
+
+def test_mp3_vbr_frame_count(tmp_path):
+    frame = b"\xff\xfb\x90\x64" + b"\0" * 32 + b"Xing" + struct.pack(">II", 1, 383) + b"\0" * 400
+    info = core.probe_media(_write(tmp_path, "v.mp3", frame), ".mp3")
+    assert info["duration"] == pytest.approx(383 * 1152 / 44100)
+
+
+def test_mp4(tmp_path):
+    info = core.probe_media(_write(tmp_path, "a.mp4", _mp4()), ".mp4")
+    assert info == {"duration": 10.0, "width": 1920, "height": 1080, "codec": "h264", "fps": pytest.approx(23.976, abs=1e-3),
+                    "sample_rate": 48000, "channels": 2}
+
+
+@pytest.mark.parametrize("name, data", [("a.ttf", _ttf()), ("a.woff", _woff())], ids=["ttf", "woff"])
+def test_font_family_prefers_typographic_windows_name(tmp_path, name, data):
+    assert core.probe_media(_write(tmp_path, name, data), "." + name.rsplit(".", 1)[1]) == {"family": "Roboto Flex"}
+
+
+@pytest.mark.parametrize("name, data", [("cut.png", b"\x89PNG\r\n\x1a\n\0\0"), ("cut.mp4", _mp4()[:60]),
+                                        ("junk.mkv", b"\x1aE\xdf\xa3" + b"\0" * 100), ("empty.wav", b""),
+                                        ("cut.jpg", b"\xff\xd8\xff\xe0\0\x10JFIF")], ids=lambda v: v if isinstance(v, str) else "")
+def test_unreadable_or_unknown_is_empty(tmp_path, name, data):
+    assert core.probe_media(_write(tmp_path, name, data), "." + name.rsplit(".", 1)[1]) == {}
+
+
+def test_missing_file(tmp_path):
+    assert core.probe_media(str(tmp_path / "gone.mov"), ".mov") == {}
@@ -0,0 +1,92 @@
+import pytest
+
+import eam_core as core
+
+FILES = {"logo.png": 2048, "logo_final.PNG": 900, "Logo-old.jpg": 40, "sub/clip.mov": 5000, "sub/clip2.mp4": 300,
+         "sub/deep/notes.txt": 12, "sub/deep/100%.txt": 7, "audio/take_1.wav": 1500, "Zebra.gif": 64}
+
+
+@pytest.fixture
+def root(make_tree): return make_tree(FILES)
+
+
+@pytest.fixture
+def conn(root, catalog):
+    c = core.connect(catalog(root))
+    c.execute("UPDATE files SET machine = 'WS-01' WHERE path LIKE '%/sub/%'")
+    c.execute("UPDATE files SET machine = 'ws-02' WHERE extension = '.wav'"); c.commit()
+    yield c
+    c.close()
+
+
+def _sql_ids(conn, q):
+    return {f["id"] for f in core.search(conn, q, limit=1000)[0]}
+
+
+def _py_ids(conn, q):
+    query = core.Query(q, core.load_categories(conn)); keys = core.ROW_KEYS + ("machine",)
+    rows = (dict(zip(keys, r)) for r in conn.execute(f"SELECT {','.join(keys)} FROM files"))
+    return {f["id"] for f in rows if query.matches(f)}
+
+
+@pytest.mark.parametrize("q", [
+    "", "logo", "LOGO", "logo_", "100%", "ext:png", "ext:PNG,.jpg", "extension:mov", "cat:image", "cat:video,audio",
+    "size:>1KB", "size:<=900", "size:10..2KB", "size:2KB", "modified:>=2023-11-16", "modified:2023-11", "modified:<2023-11-18",
+    "path:sub", "path:deep", "name:clip", "machine:ws-01", "machine:WS-02,nobody", "from:\"ws-01\"", "logo ext:png size:>1000",
+    "bogus:thing", "size:lots", "modified:someday",
+])
+def test_sql_and_matches_agree(conn, q):
+    assert _sql_ids(conn, q) == _py_ids(conn, q)
+
+
+def test_path_under_folder(conn, root):
+    q = f"path:{root}/sub"
+    assert {f["name"] for f in core.search(conn, q, limit=100)[0]} == {"clip.mov", "clip2.mp4", "notes.txt", "100%.txt"}
+    assert _sql_ids(conn, q) == _py_ids(conn, q)
+
+
+def test_unknown_field_and_bad_value_are_text():
+    assert core.Query("bogus:thing").text == ["bogus:thing"]
+    assert core.Query("size:lots").text == ["size:lots"]
+    assert core.Query('"two words"').text == ["two words"]
+
+
+def test_machine_is_case_insensitive(conn):
+    assert _sql_ids(conn, "machine:WS-02") == _sql_ids(conn, "machine:ws-02") != set()
+    assert core.Query("machine:WS-01").matches({"name": "a", "path": "/a", "machine": "ws-01"})
+    assert not core.Query("machine:WS-01").matches({"name": "a", "path": "/a", "machine": None})
+
+
+FRAMES = {"uhd.mov": (3840, 2160), "dci.mov": (4096, 2160), "scope.mov": (4096, 1716), "flat.mov": (3996, 2160),
+          "portrait.mov": (2160, 3840), "hd.mov": (1920, 1080), "sd.mov": (720, 576)}
+
+
+@pytest.fixture
+def media_conn(make_tree, catalog):
+    c = core.connect(catalog(make_tree({n: 10 for n in FRAMES})))
+    for fid, name in c.execute("SELECT id, name FROM files").fetchall():
+        c.execute("INSERT INTO media (file_id, width, height) VALUES (?,?,?)", (fid, *FRAMES[name]))
+    c.commit()
+    yield c
+    c.close()
+
+
+def _names(conn, q): return {f["name"] for f in core.search(conn, q, limit=100)[0]}
+
+
+def test_named_resolution_is_a_minimum(media_conn):
+    assert _names(media_conn, "res:4k") == {"uhd.mov", "dci.mov", "scope.mov", "flat.mov", "portrait.mov"}
+    assert _names(media_conn, "res:1080p") == set(FRAMES) - {"sd.mov"}
+    assert _names(media_conn, "res:1920x1080") == _names(media_conn, "res:1080p")
+
+
+def test_exact_and_compared_resolutions(media_conn):
+    assert _names(media_conn, "res:=3840x2160") == {"uhd.mov"}
+    assert _names(media_conn, "res:>=4k") == {"uhd.mov", "dci.mov", "flat.mov"}
+    assert _names(media_conn, "res:<1080p") == {"sd.mov"}
+    assert _names(media_conn, "width:>=4000 height:<2000") == {"scope.mov"}
+
+
+def test_media_terms_never_match_unprobed_rows():
+    assert not core.Query("res:4k").matches({"name": "a.mov", "path": "/a.mov"})
+    assert core.Query("res:4k") and core.Query("res:4k").media
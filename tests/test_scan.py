@@ -0,0 +1,32 @@
+import eam_core as core
+
+
+def _paths(conn, table="files"):
+    return {r[0] for r in conn.execute(f"SELECT path FROM {table}")}
+
+
+def test_rebuild_takes_over_another_roots_stopped_shadow(make_tree, tmp_path):
+    a = make_tree({"a1.png": 1, "a2.png": 2, "sub/a3.png": 3}, name="a")
+    b = make_tree({"b1.png": 1, "b2.png": 2, "sub/b3.png": 3}, name="b")
+    db = str(tmp_path / "cat.db"); core.scan(db, str(a)); core.scan(db, str(b))
+    (a / "a4.png").write_bytes(b"new"); (b / "b4.png").write_bytes(b"new")
+    assert core.scan(db, str(a), should_stop=lambda: True) is None
+    conn = core.connect(db)
+    try:
+        assert not core.get_scan_state(conn, str(a))["update"]
+        # b's rebuild drops a's shadow, so a's checkpoint goes with it rather than promising a resume
+        assert core.scan(db, str(b))["indexed"] == 4
+        assert core.get_scan_state(conn) == []
+        assert core.scan(db, str(a), resume=True)["indexed"] == 4 and len(_paths(conn)) == 8
+    finally: conn.close()
+
+
+def test_new_shadow_forgets_stopped_rebuilds(make_tree, tmp_path):
+    a = make_tree({"a1.png": 1, "sub/a2.png": 2}, name="a")
+    db = str(tmp_path / "cat.db"); core.scan(db, str(a))
+    assert core.scan(db, str(a), should_stop=lambda: True) is None
+    conn = core.connect(db)
+    try:
+        core.begin_shadow(conn)
+        assert core.get_scan_state(conn, str(a)) is None
+    finally: conn.close()
@@ -0,0 +1,64 @@
+import random
+
+import pytest
+
+import eam_core as core
+
+
+def _items(n=3000, seed=7):
+    # random hashes plus near copies of some of them, a few bits flipped, and exact duplicates
+    rnd = random.Random(seed); items = [(i, rnd.getrandbits(64)) for i in range(n)]
+    for j in range(n // 10):
+        h = items[rnd.randrange(n)][1]
+        for _ in range(rnd.randrange(0, 12)): h ^= 1 << rnd.randrange(64)
+        items.append((n + j, h))
+    return items
+
+
+def _brute(items, h, k):
+    return sorted((bin(x ^ h).count("1"), fid) for fid, x in items if bin(x ^ h).count("1") <= k)
+
+
+@pytest.fixture(params=["bktree", "numpy"])
+def backend(request, monkeypatch):
+    if request.param == "numpy": pytest.importorskip("numpy")
+    else: monkeypatch.setattr(core, "_numpy", lambda: None)
+    return request.param
+
+
+@pytest.mark.parametrize("k", [0, 4, 8, 16])
+def test_near_matches_brute_force(backend, k):
+    items = _items(); index = core.SimilarityIndex(items); rnd = random.Random(k)
+    for h in [items[rnd.randrange(len(items))][1] for _ in range(25)] + [rnd.getrandbits(64) for _ in range(5)]:
+        assert index.near(h, k) == _brute(items, h, k)
+
+
+def test_add_is_the_same_as_building_with_everything(backend):
+    items = _items(); index = core.SimilarityIndex(items[:1000]); index.add(items[1000:])
+    assert index.size == len(items)
+    for fid, h in items[::97]: assert index.near(h, 10) == _brute(items, h, 10)
+
+
+def test_empty_index(backend):
+    index = core.SimilarityIndex([]); assert index.near(123, 64) == []
+    index.add([(1, 123)]); assert index.near(123 ^ 0b111, 3) == [(3, 1)]
+
+
+def test_hashes_round_trip_through_the_catalog(make_tree, catalog):
+    conn = core.connect(catalog(make_tree({"a.png": 10, "b.png": 10, "c.png": 10})))
+    ids = [r[0] for r in conn.execute("SELECT id FROM files ORDER BY id")]
+    top = (1 << 64) - 1   # stored as a signed int64, handed back unsigned
+    assert core.set_phashes(conn, [(ids[0], top), (ids[1], 5)]) == [(ids[0], top), (ids[1], 5)]
+    assert core.set_phashes(conn, [(ids[0], 1), (ids[2], 6)]) == [(ids[2], 6)]   # a row keeps the hash it has
+    assert dict(core.load_phashes(conn)) == {ids[0]: top, ids[1]: 5, ids[2]: 6}
+    assert core.get_phash(conn, ids[0]) == top
+    conn.close()
+
+
+def test_todo_leaves_out_images_that_would_not_decode(make_tree, catalog):
+    conn = core.connect(catalog(make_tree({f"{i:02}.png": 10 for i in range(10)})))
+    ids = [r[0] for r in conn.execute("SELECT id FROM files ORDER BY id")]; failed = set(ids[:4])   # a whole first page
+    page = core.phash_todo(conn, [".png"], 0, 4, failed)
+    assert [r[0] for r in page] == ids[4:8] and core.phash_todo(conn, [".png"], page[-1][0], 4, failed)[0][0] == ids[8]
+    assert core.phash_pending(conn, [".png"], failed) == 6 and core.phash_pending(conn, [".png"]) == 10
+    conn.close()
@@ -0,0 +1,26 @@
+import os, sys, threading, time
+
+import pytest
+
+import eam_core as core
+
+pytestmark = pytest.mark.skipif(not sys.platform.startswith("linux"), reason="inotify is Linux only")
+
+
+def test_links_reach_the_live_catalog(make_tree, catalog, tmp_path):
+    # link(), symlink() and mknod() only raise IN_CREATE: no IN_CLOSE_WRITE follows
+    root = make_tree({"a.png": 10, "sub/b.png": 20}); db = catalog(root)
+    src = tmp_path / "outside.png"; src.write_bytes(b"x" * 30)
+    added, got = set(), threading.Event()
+    def on_changes(changes):
+        added.update(new["path"] for old, new in changes if new and not old)
+        if {str(root / "hard.png"), str(root / "sub/soft.png")} <= added: got.set()
+    w = core.Watcher(str(db), on_changes); t = threading.Thread(target=w.run, daemon=True); t.start()
+    try:
+        deadline = time.monotonic() + 5
+        while w.mode is None and time.monotonic() < deadline: time.sleep(0.01)
+        if w.mode != "inotify": pytest.skip("inotify is not available here")
+        time.sleep(0.3)   # run() has read the catch-up poll and is waiting on inotify
+        os.link(src, root / "hard.png"); os.symlink(src, root / "sub/soft.png")
+        assert got.wait(10), added
+    finally: w.stop(); t.join(5)